@@ -41,6 +41,7 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE = (
+    'app.middleware.query_count_middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,6 +49,7 @@ MIDDLEWARE = (
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'app.middleware.the_user_middleware.TheUserMiddleware',
     'app.middleware.reminder_middleware.ReminderMiddleware'
 )
 
@@ -140,6 +142,7 @@ LOGGING = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'api.authentication.AppTokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     )
@@ -163,6 +166,10 @@ EMAIL_HOST_USER = settings['EMAIL']['USER']
 EMAIL_HOST_PASSWORD = settings['EMAIL']['PASSWORD']
 EMAIL_USE_TLS = True
 
+# The newsletter is sent by chunks over one connection, the chunks are delayed to keep the rate of emails per hour.
+EMAIL_DISPATCH_CHUNK_SIZE = settings['EMAIL_DISPATCH']['CHUNK_SIZE']
+EMAIL_DISPATCH_RATE = settings['EMAIL_DISPATCH']['RATE_PER_HOUR']
+
 # Mailgun settings
 
 MAILGUN_DOMAIN = settings['MAILGUN']['DOMAIN']
@@ -176,10 +183,37 @@ CELERY_RESULT_BACKEND = settings['CELERY']['RESULT_BACKEND']
 CELERY_ACCEPT_CONTENT = settings['CELERY']['ACCEPT_CONTENT']
 CELERY_TASK_SERIALIZER = settings['CELERY']['TASK_SERIALIZER']
 CELERY_RESULT_SERIALIZER = settings['CELERY']['RESULT_SERIALIZER']
+CELERY_BEAT_SCHEDULE = {
+    'build-recommendations': {
+        'task': 'app.tasks.build_recommendations',
+        'schedule': 60 * 60 * 6,
+        'options': {'queue': 'default'}
+    },
+    'flush-reading-progress': {
+        'task': 'app.tasks.flush_reading_progress',
+        'schedule': 30,
+        'options': {'queue': 'default'}
+    }
+}
+
+# Cache settings, the Redis cache is shared by all workers; the local memory cache is used in tests
+
+CACHES = {
+    'default': {
+        'BACKEND': settings['CACHE']['BACKEND'],
+        'LOCATION': settings['CACHE']['LOCATION']
+    }
+}
 
-# Uploading settings
+# Uploading settings. The uploaded files are streamed to temporary files, only the other data of request is kept in
+# memory, so its size is limited.
 
-DATA_UPLOAD_MAX_MEMORY_SIZE = None
+DATA_UPLOAD_MAX_MEMORY_SIZE = 5 * 1024 * 1024
+
+FILE_UPLOAD_HANDLERS = [
+    'app.upload_handlers.HashingMemoryFileUploadHandler',
+    'app.upload_handlers.HashingTemporaryFileUploadHandler',
+]
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/1.8/howto/static-files/
@@ -190,6 +224,9 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# The book files are sent by nginx from the internal location if enabled, otherwise they are streamed by Django.
+BOOK_FILE_ACCEL_REDIRECT = settings['BOOK_FILE_ACCEL_REDIRECT']
+
 ADMIN_URL = settings['ADMIN_URL']
 
 # Additional app settings
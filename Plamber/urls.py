@@ -29,17 +29,18 @@ urlpatterns = [
 
     # Read book urls.
     url(r'read-book/(?P<book_id>\d+)/$', read_book_views.open_book, name='read_book'),
+    url(r'read-book/(?P<book_id>\d+)/file/$', read_book_views.book_file, name='book_file'),
     url(r'set-current-page', read_book_views.set_current_page, name='set_current_page'),
 
     # Add book urls.
     url(r'^add-book', add_book_views.add_book, name='add_book'),
     url(r'generate-authors', add_book_views.generate_authors, name='generate_authors'),
     url(r'generate-books', add_book_views.generate_books, name='generate_books'),
+    url(r'find-duplicate-books', add_book_views.find_duplicate_books, name='find_duplicate_books'),
     url(r'book-successful', add_book_views.add_book_successful, name='book_successful'),
 
     # Selected book urls.
     url(r'book/(?P<book_id>\d+)/$', selected_book_views.selected_book, name='book'),
-    url(r'store-book-image', selected_book_views.store_image, name='store_image'),
     url(r'home-add-book', selected_book_views.add_book_to_home, name='add_book_home_app'),
     url(r'home-remove-book', selected_book_views.remove_book_from_home, name='remove_book_home_app'),
     url(r'change-rating', selected_book_views.change_rating, name='change_rating_app'),
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework.authentication import BaseAuthentication
+
+from app.models import TheUser
+
+TOKEN_USER_TIMEOUT = 60 * 10
+
+# The fields of the cached user, the password hash and the other fields of the django user are loaded on access.
+TOKEN_USER_FIELDS = ('id', 'id_user', 'user_photo', 'user_photo_variants', 'auth_token', 'subscription',
+                     'reminder_flags', 'reminder', 'id_user__username', 'id_user__email', 'id_user__is_active')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_token_key(token):
+    return 'api_token_user:{}'.format(token)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_user_by_token(token):
+    """
+    Returns the user with the token. The users are kept in the shared cache for a limited time, so the token lookup
+    does not hit the database on each API call. Only the fields used by the API are loaded and cached.
+
+    :param str token: The user token.
+
+    :return app.models.TheUser: The user with joined django user, None if there is no user with the token.
+    """
+    the_user = cache.get(get_token_key(token))
+
+    if the_user is None:
+        the_user = TheUser.objects.select_related('id_user').only(*TOKEN_USER_FIELDS).filter(auth_token=token).first()
+
+        if the_user is not None:
+            cache.set(get_token_key(token), the_user, TOKEN_USER_TIMEOUT)
+
+    return the_user
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def invalidate_token(token):
+    """
+    Removes the cached user of the token.
+
+    :param str token: The user token.
+    """
+    if token:
+        cache.delete(get_token_key(token))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class AppTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates the API requests of the mobile application by the 'app_key' and 'user_token' params. Sets
+    the django user as 'request.user' and '.models.TheUser' instance as 'request.auth'.
+
+    The request is not authenticated if the params are missing or wrong, so the views still validate the params
+    before responding that the user is not found.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def authenticate(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        token = data.get('user_token')
+
+        if data.get('app_key') != settings.API_SECRET_KEY or not token or not isinstance(token, str):
+            return None
+
+        the_user = get_user_by_token(token)
+
+        if the_user is None or not the_user.id_user.is_active:
+            return None
+
+        return the_user.id_user, the_user
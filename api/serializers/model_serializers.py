@@ -4,6 +4,8 @@ from django.contrib.staticfiles.templatetags.staticfiles import static
 
 from rest_framework import serializers
 
+from app.utils import get_signed_book_file_url
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class BookSerializer(serializers.Serializer):
@@ -14,12 +16,21 @@ class BookSerializer(serializers.Serializer):
     description = serializers.CharField(max_length=1000)
     language = serializers.ReadOnlyField(source='language.language')
     photo = serializers.ImageField()
-    book_file = serializers.FileField()
+    photo_variants = serializers.SerializerMethodField('get_cover_variants')
+    book_file = serializers.SerializerMethodField('get_book_file_url')
     who_added = serializers.ReadOnlyField(source='who_added.id_user.username')
     upload_date = serializers.DateTimeField()
     private_book = serializers.BooleanField()
     blocked_book = serializers.BooleanField()
 
+    def get_book_file_url(self, obj):
+        user = self.context.get('user')
+
+        return get_signed_book_file_url(obj.id, user.id) if user else None
+
+    def get_cover_variants(self, obj):
+        return obj.get_cover_variants()
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class CategorySerializer(serializers.Serializer):
@@ -33,10 +44,14 @@ class ProfileSerializer(serializers.Serializer):
     username = serializers.ReadOnlyField(source='id_user.username')
     email = serializers.ReadOnlyField(source='id_user.email')
     user_photo = serializers.SerializerMethodField('get_user_photo_url')
+    photo_variants = serializers.SerializerMethodField('get_avatar_variants')
 
     def get_user_photo_url(self, obj):
         return obj.user_photo.url if obj.user_photo else static('/app/images/user.png')
 
+    def get_avatar_variants(self, obj):
+        return obj.get_avatar_variants()
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class CommentSerializer(serializers.Serializer):
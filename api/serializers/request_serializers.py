@@ -4,6 +4,8 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 
 from rest_framework import serializers
 
+from app.validators import validate_pdf
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class TokenSerializer(serializers.Serializer):
@@ -81,7 +83,15 @@ class AllCategoriesRequest(TokenSerializer):
 # ----------------------------------------------------------------------------------------------------------------------
 class SelectedCategoryRequest(TokenSerializer):
     category_id = serializers.IntegerField()
-    page = serializers.IntegerField(validators=[MinValueValidator(1)])
+    page = serializers.IntegerField(required=False, validators=[MinValueValidator(1)])
+    cursor = serializers.CharField(required=False, allow_blank=True, max_length=1000)
+    with_count = serializers.BooleanField(required=False)
+
+    def validate(self, data):
+        if 'page' not in data and 'cursor' not in data:
+            raise serializers.ValidationError('Page or cursor is missing')
+
+        return data
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -158,6 +168,7 @@ class UploadBookRequest(TokenSerializer):
     category = serializers.CharField(max_length=30)
     about = serializers.CharField(max_length=1000)
     language = serializers.CharField(max_length=30)
+    book_file = serializers.FileField(validators=[validate_pdf])
 
 
 # ----------------------------------------------------------------------------------------------------------------------
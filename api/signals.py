@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_token
+from app.models import TheUser
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=TheUser)
+@receiver(post_delete, sender=TheUser)
+def invalidate_the_user_token(sender, instance=None, **kwargs):
+    """
+    Removes the cached API user of the current and the previous token after '.models.TheUser' instance was saved or
+    deleted.
+    """
+    invalidate_token(instance.auth_token)
+
+    if instance.stored_auth_token != instance.auth_token:
+        invalidate_token(instance.stored_auth_token)
+
+    instance.stored_auth_token = instance.auth_token
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=User)
+def invalidate_user_token(sender, instance=None, created=False, update_fields=None, **kwargs):
+    """
+    Removes the cached API user after the django user was changed, e.g. deactivated or renamed. The updates of
+    the last login time are skipped.
+    """
+    if not created and set(update_fields or ()) != {'last_login'}:
+        for token in TheUser.objects.filter(id_user=instance).values_list('auth_token', flat=True):
+            invalidate_token(token)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+from rest_framework.parsers import JSONParser
+
+from ..authentication import AppTokenAuthentication, get_user_by_token
+from app.models import TheUser
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class AppTokenAuthenticationTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='api_auth', email='api_auth@email.com', password='123456')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        cache.clear()
+        self.the_user = TheUser.objects.get(id_user=self.user)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def authenticate(self, **data):
+        request = Request(APIRequestFactory().post('/', data, format='json'), parsers=[JSONParser()])
+
+        return AppTokenAuthentication().authenticate(request)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_authenticate(self):
+        self.assertEqual(self.authenticate(app_key=settings.API_SECRET_KEY, user_token=self.the_user.auth_token),
+                         (self.user, self.the_user))
+
+        self.assertIsNone(self.authenticate(app_key=settings.API_SECRET_KEY, user_token='not-existing-token'))
+        self.assertIsNone(self.authenticate(app_key='wrong_key', user_token=self.the_user.auth_token))
+        self.assertIsNone(self.authenticate(app_key=settings.API_SECRET_KEY))
+        self.assertIsNone(self.authenticate(app_key=settings.API_SECRET_KEY, user_token=['list']))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_cached_user(self):
+        """
+        Must take the user of the token from the cache after the first lookup.
+        """
+        with self.assertNumQueries(1):
+            get_user_by_token(self.the_user.auth_token)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_by_token(self.the_user.auth_token).id_user, self.user)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_cached_user_fields(self):
+        """
+        Must not cache the password hash, it's loaded from the database when it's checked.
+        """
+        get_user_by_token(self.the_user.auth_token)
+        the_user = get_user_by_token(self.the_user.auth_token)
+
+        self.assertNotIn('password', the_user.id_user.__dict__)
+        self.assertEqual(the_user.id_user.username, 'api_auth')
+
+        with self.assertNumQueries(1):
+            self.assertTrue(the_user.id_user.check_password('123456'))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_blank_token(self):
+        """
+        Must store the blank tokens as NULL, so they don't conflict and never authenticate.
+        """
+        other_the_user = TheUser.objects.get(id_user=User.objects.create_user('api_auth_other', 'other@email.com',
+                                                                               '123456'))
+
+        for the_user in (self.the_user, other_the_user):
+            the_user.auth_token = ''
+            the_user.save()
+
+        self.assertEqual(TheUser.objects.filter(auth_token__isnull=True).count(), 2)
+        self.assertIsNone(self.authenticate(app_key=settings.API_SECRET_KEY, user_token=''))
+
+        self.the_user.auth_token = ''
+        self.the_user.full_clean()
+        self.assertIsNone(self.the_user.auth_token)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_invalidation(self):
+        """
+        Must not authenticate by the token after it was changed, the user was deactivated or deleted.
+        """
+        old_token = self.the_user.auth_token
+        get_user_by_token(old_token)
+
+        self.the_user.auth_token = 'new-token'
+        self.the_user.save()
+
+        self.assertIsNone(get_user_by_token(old_token))
+        self.assertEqual(get_user_by_token('new-token'), self.the_user)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.authenticate(app_key=settings.API_SECRET_KEY, user_token='new-token'))
+
+        self.the_user.delete()
+        self.assertIsNone(get_user_by_token('new-token'))
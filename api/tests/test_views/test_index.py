@@ -9,9 +9,11 @@ from rest_framework.test import APIClient
 
 from ...views.index_views import user_login
 from app.models import TheUser
+from app.tests.utils import query_budget
 
 
 # ----------------------------------------------------------------------------------------------------------------------
+@query_budget(user_login_api=11)
 class IndexViewsTestCase(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.shortcuts import reverse
+from django.test import TestCase, mock
+
+from rest_framework.test import APIClient
+
+from ...views.library_views import selected_category
+from app.models import TheUser, Book, Category, Language, Author
+from app.tests.utils import query_budget
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, '../fixtures')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@mock.patch('api.views.library_views.OUTPUT_BOOKS_PER_PAGE', 2)
+@query_budget(category_api=4)
+class LibraryViewsTestCase(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='api_library', email='api_library@email.com', password='123456')
+        cls.other_user = User.objects.create_user(
+            username='api_library_other', email='api_library_other@email.com', password='123456'
+        )
+        cls.the_user = TheUser.objects.get(id_user=cls.user)
+        cls.the_other_user = TheUser.objects.get(id_user=cls.other_user)
+
+        cls.client = APIClient()
+        cls.api_key = settings.API_SECRET_KEY
+
+        cls.category = Category.objects.create(category_name='library_api_category')
+        cls.language = Language.objects.create(language='library_api_language')
+        cls.author = Author.objects.create(author_name='library_api_author')
+
+        test_book_path = os.path.join(TEST_DATA_DIR, 'test_book.pdf')
+
+        books_setup = [
+            ('library_api_c', cls.the_user, False),
+            ('library_api_a', cls.the_user, False),
+            ('library_api_b', cls.the_other_user, True),
+            ('library_api_a', cls.the_other_user, False),
+            ('library_api_d', cls.the_user, False)
+        ]
+
+        for (book_name, who_added, is_private) in books_setup:
+            Book.objects.create(
+                book_name=book_name,
+                id_author=cls.author,
+                id_category=cls.category,
+                language=cls.language,
+                book_file=SimpleUploadedFile('test_book.pdf', open(test_book_path, 'rb').read()),
+                who_added=who_added,
+                private_book=is_private
+            )
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def tearDownClass(cls):
+        for book in Book.objects.all():
+            if os.path.exists(book.book_file.path):
+                os.remove(book.book_file.path)
+
+        super(LibraryViewsTestCase, cls).tearDownClass()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def request_category(self, **params):
+        params.update({'app_key': self.api_key,
+                       'user_token': self.the_user.auth_token,
+                       'category_id': self.category.id})
+
+        return self.client.post(reverse('category_api'), params, format='json')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_selected_category_missing_page_and_cursor(self):
+        response = self.request_category()
+
+        self.assertEqual(response.resolver_match.func, selected_category)
+        self.assertEqual(response.status_code, 400)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_selected_category_by_page(self):
+        response = self.request_category(page=2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book['book_name'] for book in response.data['data']['books']],
+                         ['library_api_c', 'library_api_d'])
+        self.assertEqual(response.data['data']['next_page'], 0)
+        self.assertTrue(all('?user={}&signature='.format(self.the_user.id) in book['book_file']
+                            for book in response.data['data']['books']))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_selected_category_by_cursor(self):
+        response = self.request_category(cursor='', with_count=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book['book_name'] for book in response.data['data']['books']],
+                         ['library_api_a', 'library_api_a'])
+        self.assertEqual(response.data['data']['books_count'], 4)
+
+        response = self.request_category(cursor=response.data['data']['next_cursor'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book['book_name'] for book in response.data['data']['books']],
+                         ['library_api_c', 'library_api_d'])
+        self.assertIsNone(response.data['data']['next_cursor'])
+        self.assertNotIn('books_count', response.data['data'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_selected_category_invalid_cursor(self):
+        response = self.request_category(cursor='not-a-cursor')
+
+        self.assertEqual(response.status_code, 400)
@@ -12,12 +12,14 @@ from rest_framework.test import APIClient
 
 from ...views.selected_book_views import add_book_to_home
 from app.models import TheUser, Book, Category, Language, Author, AddedBook
+from app.tests.utils import query_budget
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 TEST_DATA_DIR = os.path.join(TEST_DIR, '../fixtures')
 
 
 # ----------------------------------------------------------------------------------------------------------------------
+@query_budget(add_book_home_api=5)
 class SelectedBookViewsTestCase(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -75,6 +77,8 @@ class SelectedBookViewsTestCase(TestCase):
             if book.photo and os.path.exists(book.photo.path):
                 os.remove(book.photo.path)
 
+        super(SelectedBookViewsTestCase, cls).tearDownClass()
+
     # ------------------------------------------------------------------------------------------------------------------
     def test_add_book_home_not_valid_app_key(self):
         payload = {'app_key': 'dummy_key', 'username': 'api_selected_book'}
@@ -190,3 +194,19 @@ class SelectedBookViewsTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, {'detail': 'success', 'data': {}})
         self.assertTrue(AddedBook.objects.filter(id_book=book, id_user=self.the_user).exists())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_change_rating_form_data(self):
+        book = Book.objects.get(book_name='selected_api_1')
+
+        for rating in ('7', '9'):
+            payload = {'app_key': self.api_key, 'book_id': str(book.id), 'rating': rating,
+                       'user_token': self.the_user.auth_token}
+            response = self.client.post('/api/v1/change-rating/', payload)
+
+            self.assertEqual(response.status_code, 200)
+
+        book.refresh_from_db()
+        self.assertEqual(response.data['data'], {'book_rating': 9.0, 'book_rated_count': 1})
+        self.assertEqual(book.get_rating_histogram()[9], 1)
+        self.assertEqual(book.get_rating_histogram()[7], 0)
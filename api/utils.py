@@ -8,6 +8,8 @@ from django.http import Http404
 from rest_framework import status
 from rest_framework.response import Response
 
+from app.models import TheUser
+
 logger = logging.getLogger('changes')
 
 
@@ -28,3 +30,18 @@ def validate_api_secret_key(secret_key):
     if secret_key != settings.API_SECRET_KEY:
         logger.info('Incorrect API key: "{}"'.format(secret_key))
         raise Http404('The API key isn\t correct!')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_request_user(request):
+    """
+    Returns the user authenticated by the app key and the user token of the request. If not raises 404 (not found).
+
+    :param rest_framework.request.Request request: The API request.
+
+    :return app.models.TheUser: The authenticated user.
+    """
+    if not isinstance(request.auth, TheUser):
+        raise Http404('The user with the token does not exist!')
+
+    return request.auth
@@ -11,11 +11,15 @@ from rest_framework.response import Response
 
 from ..serializers.model_serializers import CategorySerializer, BookSerializer
 from ..serializers.request_serializers import AllCategoriesRequest, SelectedCategoryRequest, FindBookRequest
-from ..utils import invalid_data_response, validate_api_secret_key
-from app.models import TheUser, Category, Book
+from ..utils import get_request_user, invalid_data_response, validate_api_secret_key
+from app.models import Category, Book
+from app.pagination import InvalidCursor, paginate_by_cursor
+from app.search import find_book_ids, get_books
 
 OUTPUT_BOOKS_PER_PAGE = 20
 
+CATEGORY_BOOKS_ORDERING = ('book_name',)
+
 logger = logging.getLogger('changes')
 
 
@@ -29,7 +33,7 @@ def all_categories(request):
     request_serializer = AllCategoriesRequest(data=request.data)
 
     if request_serializer.is_valid():
-        get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        get_request_user(request)
         categories = Category.objects.all().order_by('category_name')
 
         return Response({'detail': 'successful',
@@ -50,19 +54,23 @@ def selected_category(request):
     request_serializer = SelectedCategoryRequest(data=request.data)
 
     if request_serializer.is_valid():
-        user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        user = get_request_user(request)
         category = get_object_or_404(Category, id=request.data.get('category_id'))
 
-        books = Book.objects.filter(id_category=category).order_by('book_name')
+        books = Book.objects.filter(id_category=category).select_related('id_author', 'id_category', 'language',
+                                                                          'who_added__id_user')
         filtered_books = Book.exclude_private_books(user.id_user, books)
 
-        paginator = Paginator(filtered_books, OUTPUT_BOOKS_PER_PAGE)
+        if 'page' not in request_serializer.validated_data:
+            return selected_category_by_cursor(user, filtered_books, request_serializer.validated_data)
+
+        paginator = Paginator(filtered_books.order_by('book_name'), OUTPUT_BOOKS_PER_PAGE)
         page = paginator.page(request.data.get('page'))
         next_page = page.has_next()
         page_books = page.object_list
 
         return Response({'detail': 'successful',
-                         'data': {'books': [BookSerializer(book).data for book in page_books],
+                         'data': {'books': [BookSerializer(book, context={'user': user}).data for book in page_books],
                                   'next_page': page.next_page_number() if next_page else 0}},
                         status=status.HTTP_200_OK)
     else:
@@ -73,26 +81,50 @@ def selected_category(request):
 @api_view(['POST'])
 def find_book(request):
     """
-    Generates list with books of data which user entered. At first it check full equality in name,
-    after tries to check if contains some part of entered data.
+    Generates list with books of data which user entered. At first returns books with fully equal name or author,
+    after books where words start with entered data and after books where words contain entered data.
     """
     validate_api_secret_key(request.data.get('app_key'))
     request_serializer = FindBookRequest(data=request.data)
 
     if request_serializer.is_valid():
-        user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
-        search_data = request.data.get('search_term')
+        user = get_request_user(request)
+        book_ids = find_book_ids(user.id_user, request.data.get('search_term'))
 
-        filtered_books = Book.exclude_private_books(user.id_user, Book.fetch_books(search_data))
-
-        paginator = Paginator(filtered_books, OUTPUT_BOOKS_PER_PAGE)
+        paginator = Paginator(book_ids, OUTPUT_BOOKS_PER_PAGE)
         page = paginator.page(request.data.get('page'))
         next_page = page.has_next()
-        page_books = page.object_list
+        page_books = get_books(page.object_list)
 
         return Response({'detail': 'successful',
-                         'data': {'books': [BookSerializer(book).data for book in page_books],
+                         'data': {'books': [BookSerializer(book, context={'user': user}).data for book in page_books],
                                   'next_page': page.next_page_number() if next_page else 0}},
                         status=status.HTTP_200_OK)
     else:
         return invalid_data_response(request_serializer)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def selected_category_by_cursor(user, books, request_data):
+    """
+    Returns the page of books from selected category after the cursor. The count of books is calculated only if
+    it was requested.
+
+    :param app.models.TheUser              user:         The user who requested the books.
+    :param django.db.models.query.QuerySet books:        The books of category available for the user.
+    :param dict                            request_data: The validated request data.
+
+    :return rest_framework.response.Response: The response with books.
+    """
+    try:
+        page = paginate_by_cursor(books, CATEGORY_BOOKS_ORDERING, request_data['cursor'], OUTPUT_BOOKS_PER_PAGE)
+    except InvalidCursor:
+        return Response({'detail': 'invalid cursor', 'data': {}}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = {'books': [BookSerializer(book, context={'user': user}).data for book in page.object_list],
+            'next_cursor': page.next_cursor}
+
+    if request_data.get('with_count'):
+        data['books_count'] = books.count()
+
+    return Response({'detail': 'successful', 'data': data}, status=status.HTTP_200_OK)
@@ -5,7 +5,6 @@ import random
 
 from django.db import transaction
 from django.core.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
 
 from rest_framework import status
 from rest_framework.decorators import api_view, parser_classes
@@ -14,14 +13,10 @@ from rest_framework.response import Response
 
 from ..serializers.model_serializers import ProfileSerializer
 from ..serializers.request_serializers import ProfileRequest, ChangePasswordRequest, UploadAvatarRequest
-from ..utils import invalid_data_response, validate_api_secret_key
+from ..utils import get_request_user, invalid_data_response, validate_api_secret_key
 
 from app.constants import Queues
-from app.models import TheUser
-from app.tasks import changed_password
-from app.utils import resize_image
-
-AVATAR_WIDTH = 250
+from app.tasks import changed_password, generate_avatar_variants
 
 logger = logging.getLogger('changes')
 
@@ -36,7 +31,7 @@ def my_profile(request):
     request_serializer = ProfileRequest(data=request.data)
 
     if request_serializer.is_valid():
-        the_user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        the_user = get_request_user(request)
 
         return Response({'detail': 'successful',
                          'data': {'profile': ProfileSerializer(the_user).data}},
@@ -55,7 +50,7 @@ def change_password(request):
     request_serializer = ChangePasswordRequest(data=request.data)
 
     if request_serializer.is_valid():
-        the_user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        the_user = get_request_user(request)
 
         with transaction.atomic():
             if the_user.id_user.check_password(request.data.get('prev_password')):
@@ -91,15 +86,17 @@ def upload_avatar(request):
 
     if request_serializer.is_valid():
         with transaction.atomic():
-            profile_user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+            profile_user = get_request_user(request)
 
             try:
+                profile_user.user_photo_variants = False
                 profile_user.user_photo.save('user_{}.png'.format(profile_user.id), request.data.get('file'))
                 profile_user.save()
                 logger.info("User '{}' changed his avatar.".format(profile_user))
 
-                resize_image(profile_user.user_photo.path, AVATAR_WIDTH)
-                logger.info("Image '{}' successfully resized!".format(profile_user.user_photo.path))
+                transaction.on_commit(
+                    lambda: generate_avatar_variants.apply_async(args=(profile_user.id,), queue=Queues.images)
+                )
 
                 return Response({'detail': 'successful',
                                  'data': {'profile_image': '{}?{}'.format(profile_user.user_photo.url,
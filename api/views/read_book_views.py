@@ -9,8 +9,9 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
 from ..serializers.request_serializers import OpenBookRequest, SetCurrentPageRequest
-from ..utils import invalid_data_response, validate_api_secret_key
-from app.models import Book, AddedBook, TheUser
+from ..utils import get_request_user, invalid_data_response, validate_api_secret_key
+from app.models import Book, AddedBook
+from app.reading_progress import get_progress, record_progress
 
 logger = logging.getLogger('changes')
 
@@ -25,15 +26,17 @@ def open_book(request):
     request_serializer = OpenBookRequest(data=request.data)
 
     if request_serializer.is_valid():
-        user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        user = get_request_user(request)
         book = get_object_or_404(Book, id=request.data.get('book_id'))
         added_book = get_object_or_404(AddedBook, id_book=book, id_user=user)
+        progress = get_progress(user.id, book.id) or {'last_page': added_book.last_page,
+                                                      'last_read': added_book.last_read}
 
         logger.info("User '{}' opened book with id: '{}'.".format(user, book.id))
 
         return Response({'detail': 'successful',
-                         'data': {'last_page': added_book.last_page,
-                                  'last_read': added_book.last_read}},
+                         'data': {'last_page': progress['last_page'],
+                                  'last_read': progress['last_read']}},
                         status=status.HTTP_200_OK)
     else:
         return invalid_data_response(request_serializer)
@@ -49,16 +52,18 @@ def set_current_page(request):
     request_serializer = SetCurrentPageRequest(data=request.data)
 
     if request_serializer.is_valid():
-        user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
-        book = get_object_or_404(Book, id=request.data.get('book_id'))
-        current_page = request.data.get('current_page')
+        user = get_request_user(request)
+        book_id = request_serializer.validated_data['book_id']
+        current_page = request_serializer.validated_data['current_page']
+
+        # The buffered progress exists only for the added books, the database is checked only for the first change.
+        if not get_progress(user.id, book_id):
+            get_object_or_404(AddedBook, id_book=book_id, id_user=user)
 
-        added_book = AddedBook.objects.get(id_book=book, id_user=user)
-        added_book.last_page = current_page
-        added_book.save()
+        record_progress(user.id, book_id, current_page)
 
         logger.info("User '{}' on book with id: '{}' changed page to: '{}'."
-                    .format(user, book.id, current_page))
+                    .format(user, book_id, current_page))
 
         return Response({'detail': 'successful',
                          'data': {}},
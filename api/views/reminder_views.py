@@ -1,14 +1,11 @@
 # -*- coding: utf-8 -*-
 
-from django.shortcuts import get_object_or_404
-
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
 from ..serializers.request_serializers import GetReminderRequest, UpdateReminderRequest
-from ..utils import invalid_data_response, validate_api_secret_key
-from app.models import TheUser
+from ..utils import get_request_user, invalid_data_response, validate_api_secret_key
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -22,7 +19,7 @@ def get_reminders(request):
     request_serializer = GetReminderRequest(data=request.data)
 
     if request_serializer.is_valid():
-        the_user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        the_user = get_request_user(request)
 
         return Response({'detail': 'successful',
                          'data': the_user.get_api_reminders()},
@@ -42,8 +39,8 @@ def update_reminder(request):
     request_serializer = UpdateReminderRequest(data=request.data)
 
     if request_serializer.is_valid():
-        the_user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
-        the_user.update_reminder(request.data.get('field'), request.data.get('value'))
+        the_user = get_request_user(request)
+        the_user.update_reminder(request_serializer.validated_data['field'], request_serializer.validated_data['value'])
 
         return Response({'detail': 'successful'},
                         status=status.HTTP_200_OK)
@@ -2,7 +2,6 @@
 
 import logging
 
-from django.db.models import Avg
 from django.shortcuts import get_object_or_404
 
 from rest_framework import status
@@ -11,8 +10,8 @@ from rest_framework.response import Response
 
 from ..serializers.model_serializers import BookSerializer, CommentSerializer
 from ..serializers.request_serializers import SelectedBookRequest, ChangeRatingRequest, AddCommentRequest
-from ..utils import invalid_data_response, validate_api_secret_key
-from app.models import AddedBook, Book, BookComment, BookRating, TheUser
+from ..utils import get_request_user, invalid_data_response, validate_api_secret_key
+from app.models import AddedBook, Book, BookComment, BookRating
 
 logger = logging.getLogger('changes')
 
@@ -27,24 +26,30 @@ def selected_book(request):
     request_serializer = SelectedBookRequest(data=request.data)
 
     if request_serializer.is_valid():
-        user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        user = get_request_user(request)
         book_id = request.data.get('book_id')
 
-        rel_objects = Book.get_related_objects_selected_book(request.user, book_id, request.data.get('user_token'))
+        try:
+            rel_objects = Book.get_related_objects_selected_book(request.user, book_id, request.data.get('user_token'))
+        except Book.DoesNotExist:
+            return Response({'detail': 'not exists',
+                             'data': {}},
+                            status=status.HTTP_404_NOT_FOUND)
 
         if rel_objects['book'].private_book and rel_objects['book'].who_added != user:
             return Response({}, status=404)
 
-        book_rating = rel_objects['avg_book_rating']['rating__avg']
+        book_rating = rel_objects['avg_book_rating']
         book_rating_count = rel_objects['book_rating_count']
         comments = [CommentSerializer(comment).data for comment in rel_objects['comments']]
 
         return Response({'detail': 'success',
-                         'data': {'book': BookSerializer(rel_objects['book']).data,
+                         'data': {'book': BookSerializer(rel_objects['book'], context={'user': user}).data,
                                   'is_added_book': bool(rel_objects['added_book']),
-                                  'user_reading_count': AddedBook.get_count_added(book_id),
+                                  'user_reading_count': rel_objects['readers_count'],
                                   'book_rating': book_rating if book_rating else 0,
                                   'book_rated_count': book_rating_count if book_rating_count else 0,
+                                  'comments_count': rel_objects['book'].comments_count,
                                   'comments': comments}},
                         status=status.HTTP_200_OK)
     else:
@@ -61,7 +66,7 @@ def add_book_to_home(request):
     request_serializer = SelectedBookRequest(data=request.data)
 
     if request_serializer.is_valid():
-        user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        user = get_request_user(request)
         book = get_object_or_404(Book, id=request.data.get('book_id'))
 
         if book.private_book and book.who_added != user:
@@ -93,7 +98,7 @@ def remove_book_from_home(request):
     request_serializer = SelectedBookRequest(data=request.data)
 
     if request_serializer.is_valid():
-        user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        user = get_request_user(request)
         book = get_object_or_404(Book, id=request.data.get('book_id'))
         added_book = get_object_or_404(AddedBook, id_user=user, id_book=book)
 
@@ -115,24 +120,18 @@ def change_rating(request):
     request_serializer = ChangeRatingRequest(data=request.data)
 
     if request_serializer.is_valid():
-        user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
-        book = get_object_or_404(Book, id=request.data.get('book_id'))
-        rating = request.data.get('rating')
-
-        book_ratings = BookRating.objects.filter(id_user=user, id_book=book)
+        user = get_request_user(request)
+        book = get_object_or_404(Book, id=request_serializer.validated_data['book_id'])
+        rating = request_serializer.validated_data['rating']
 
-        if book_ratings.exists():
-            book_rating = book_ratings[0]
-            book_rating.rating = rating
-            book_rating.save()
-        else:
-            BookRating.objects.create(id_user=user, id_book=book, rating=rating)
+        BookRating.objects.update_or_create(id_user=user, id_book=book, defaults={'rating': rating})
+        book.refresh_from_db(fields=['rating_sum', 'rating_count'])
 
         logger.info("User '{}' set rating '{}' to book with id: '{}'.".format(user, rating, book.id))
 
         return Response({'detail': 'success',
-                         'data': {'book_rating': round(book_ratings.aggregate(Avg('rating'))['rating__avg'], 1),
-                                  'book_rated_count': book_ratings.count()}},
+                         'data': {'book_rating': round(book.avg_rating, 1),
+                                  'book_rated_count': book.rating_count}},
                         status=status.HTTP_200_OK)
     else:
         return invalid_data_response(request_serializer)
@@ -145,7 +144,7 @@ def add_comment(request):
     request_serializer = AddCommentRequest(data=request.data)
 
     if request_serializer.is_valid():
-        the_user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        the_user = get_request_user(request)
 
         comment = BookComment.objects.create(id_user=the_user,
                                              id_book=Book.objects.get(id=request.data.get('book_id')),
@@ -4,7 +4,6 @@ import json
 import logging
 
 from django.db import transaction
-from django.shortcuts import get_object_or_404
 
 from rest_framework import status
 from rest_framework.decorators import api_view, parser_classes
@@ -16,9 +15,10 @@ from ..serializers.request_serializers import (UploadBookRequest,
                                                GenerateAuthorsRequest,
                                                GenerateBooksRequest,
                                                GenerateLanguagesRequest)
-from ..utils import invalid_data_response, validate_api_secret_key
+from ..utils import get_request_user, invalid_data_response, validate_api_secret_key
 
-from app.models import Author, AddedBook, Book, TheUser, Language
+from app.models import Author, AddedBook, Book, Language, books_index
+from app.search import get_books
 
 logger = logging.getLogger('changes')
 
@@ -35,7 +35,7 @@ def upload_book(request):
 
     if request_serializer.is_valid():
         with transaction.atomic():
-            user = get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+            user = get_request_user(request)
             related_data = Book.get_related_objects_create_api(user, request.data)
 
             book = Book.objects.create(
@@ -55,7 +55,7 @@ def upload_book(request):
                         .format(user, book.id, book.book_name, related_data.category))
 
             return Response({'detail': 'successful',
-                             'data': {'book': BookSerializer(book).data}},
+                             'data': {'book': BookSerializer(book, context={'user': user}).data}},
                             status=status.HTTP_200_OK)
     else:
         return invalid_data_response(request_serializer)
@@ -71,7 +71,7 @@ def generate_authors(request):
     request_serializer = GenerateAuthorsRequest(data=request.data)
 
     if request_serializer.is_valid():
-        get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        get_request_user(request)
         list_of_authors = Author.get_authors_list(request.data.get('author_part'))
 
         return Response({'detail': 'successful',
@@ -91,11 +91,11 @@ def generate_books(request):
     request_serializer = GenerateBooksRequest(data=request.data)
 
     if request_serializer.is_valid():
-        get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
-        list_of_books = Book.objects.filter(book_name__icontains=request.data.get('book_part'), private_book=False)
+        user = get_request_user(request)
+        list_of_books = get_books([book_id for book_id, book_name in books_index.find(request.data.get('book_part'))])
 
         return Response({'detail': 'successful',
-                         'data': [BookSerializer(book).data for book in list_of_books]},
+                         'data': [BookSerializer(book, context={'user': user}).data for book in list_of_books]},
                         status=status.HTTP_200_OK)
     else:
         return invalid_data_response(request_serializer)
@@ -111,7 +111,7 @@ def generate_languages(request):
     request_serializer = GenerateLanguagesRequest(data=request.data)
 
     if request_serializer.is_valid():
-        get_object_or_404(TheUser, auth_token=request.data.get('user_token'))
+        get_request_user(request)
         list_of_languages = Language.objects.all()
 
         return Response({'detail': 'successful',
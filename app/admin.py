@@ -39,7 +39,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 # ----------------------------------------------------------------------------------------------------------------------
 class AuthorAdmin(admin.ModelAdmin):
-    list_display = ('id', 'author_name')
+    list_display = ('id', 'author_name', 'author_key')
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -57,6 +57,8 @@ class BookAdmin(admin.ModelAdmin):
         'language',
         'private_book',
         'blocked_book',
+        'cover_status',
+        'file_status',
         'who_added',
         'upload_date'
     )
@@ -111,7 +113,7 @@ class AddedBookAdmin(BookGeneral):
 
 # ----------------------------------------------------------------------------------------------------------------------
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('heading', 'user', 'posted_date')
+    list_display = ('heading', 'user', 'posted_date', 'dispatched_user_id')
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+AUTOCOMPLETE_COUNT = 10
+SEPARATOR = '\x00'
+
+# The count of changes after which the index is reloaded instead of applying the changes one by one.
+MAX_APPLIED_CHANGES = 100
+CHANGE_TIMEOUT = 60 * 60
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class AutocompleteIndex(object):
+    """
+    In-memory index of names for autocomplete. The index is loaded once per worker and keeps the case folded names
+    sorted for prefix matches and joined to one string for infix matches. The committed changes are numbered by the
+    shared version counter and logged in the cache, so the other workers apply the missed changes in place and reload
+    the index only if some of the changes are not in the log anymore.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, key, generate_names):
+        """
+        :param str      key:            The key of the index.
+        :param callable generate_names: The function which returns the pairs of id and name of the indexed objects.
+        """
+        self.key = key
+        self.generate_names = generate_names
+        self.lock = threading.RLock()
+        self.version = None
+        self.names = {}
+        self.prefixes = []
+        self.text = None
+        self.offsets = []
+        self.ids = []
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_version_key(self):
+        return 'autocomplete_version:{}'.format(self.key)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_change_key(self, version):
+        return 'autocomplete_change:{}:{}'.format(self.key, version)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_shared_version(self):
+        """
+        Returns the current version of the index shared by all workers, creates a new one if it's missing. The new
+        counter starts from the current time in milliseconds, so the counter recreated after the eviction does not
+        return to the versions which were loaded before.
+
+        :return int: The version.
+        """
+        version = cache.get(self.get_version_key())
+
+        if version is None:
+            cache.add(self.get_version_key(), int(time.time() * 1000), None)
+            version = cache.get(self.get_version_key())
+
+        return version
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def bump_version(self):
+        """
+        Increments the shared version without logging the change, so the indexes of all workers are reloaded.
+
+        :return int: The new version.
+        """
+        try:
+            return cache.incr(self.get_version_key())
+        except ValueError:
+            self.get_shared_version()
+            return cache.incr(self.get_version_key())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def load(self, version):
+        """
+        Loads all the names from the database.
+
+        :param int version: The shared version of the index.
+        """
+        self.names = dict(self.generate_names())
+        self.prefixes = sorted((name.casefold(), object_id) for object_id, name in self.names.items())
+        self.text = None
+        self.version = version
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def sync(self, version):
+        """
+        Applies the logged changes made after the loaded version of the index, reloads the index if some changes are
+        missing. The changes are applied in order of their versions.
+
+        :param int version: The shared version of the index.
+        """
+        changes = {}
+
+        if self.version is not None and 0 < version - self.version <= MAX_APPLIED_CHANGES:
+            keys = [self.get_change_key(number) for number in range(self.version + 1, version + 1)]
+            changes = cache.get_many(keys)
+
+        if not changes or len(changes) != len(keys):
+            self.load(version)
+        else:
+            for key in keys:
+                self.update(*changes[key])
+
+            self.version = version
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def update(self, object_id, name):
+        """
+        Changes the name of one object in the loaded index. The joined string for infix matches is rebuilt lazily.
+
+        :param int object_id: The id of object.
+        :param str name:      The new name, None if the object must be removed from the index.
+        """
+        old_name = self.names.pop(object_id, None)
+
+        if old_name is not None:
+            position = bisect.bisect_left(self.prefixes, (old_name.casefold(), object_id))
+            del self.prefixes[position]
+
+        if name is not None:
+            self.names[object_id] = name
+            bisect.insort(self.prefixes, (name.casefold(), object_id))
+
+        self.text = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def build_text(self):
+        """
+        Joins the case folded names ordered by id to one string and remembers the offset of each name.
+        """
+        self.ids = sorted(self.names)
+        self.offsets = []
+        folded_names = []
+        offset = 0
+
+        for object_id in self.ids:
+            folded_name = self.names[object_id].casefold()
+            folded_names.append(folded_name)
+            self.offsets.append(offset)
+            offset += len(folded_name) + len(SEPARATOR)
+
+        self.text = SEPARATOR.join(folded_names)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def changed(self, object_id, name):
+        """
+        Handles the change of the indexed object. The change is logged after the transaction is committed, the loaded
+        indexes of all workers get it on the next search.
+
+        :param int object_id: The id of object.
+        :param str name:      The new name, None if the object must be removed from the index.
+        """
+        transaction.on_commit(lambda: self.log_change(object_id, name))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def log_change(self, object_id, name):
+        """
+        Logs the committed change under the next shared version. The worker which reads the version before the change
+        is logged does not find it and reloads the index, which already has the committed change.
+
+        :param int object_id: The id of object.
+        :param str name:      The new name, None if the object must be removed from the index.
+        """
+        version = self.bump_version()
+        cache.set(self.get_change_key(version), (object_id, name), CHANGE_TIMEOUT)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def find(self, part, count=AUTOCOMPLETE_COUNT):
+        """
+        Returns the objects which names contain the part ignoring the case. The names which start with the part go
+        first in alphabetical order, the other matches follow ordered by id.
+
+        :param str part:  The part of name.
+        :param int count: The max count of objects.
+
+        :return list[tuple[int, str]]: The ids and names of objects.
+        """
+        part = part.casefold().replace(SEPARATOR, '')
+
+        with self.lock:
+            version = self.get_shared_version()
+
+            if self.version != version:
+                self.sync(version)
+
+            found = []
+            position = bisect.bisect_left(self.prefixes, (part,))
+
+            while len(found) < count and position < len(self.prefixes) and self.prefixes[position][0].startswith(part):
+                found.append(self.prefixes[position][1])
+                position += 1
+
+            if len(found) < count:
+                found.extend(self.find_infix(part, count - len(found), set(found)))
+
+            return [(object_id, self.names[object_id]) for object_id in found]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def find_infix(self, part, count, excluded):
+        """
+        Returns the ids of objects which names contain the part, ordered by id.
+
+        :param str      part:     The case folded part of name.
+        :param int      count:    The max count of objects.
+        :param set[int] excluded: The ids of objects which are already found.
+
+        :return list[int]: The ids of objects.
+        """
+        if self.text is None:
+            self.build_text()
+
+        found = []
+        position = self.text.find(part)
+
+        while position != -1 and len(found) < count:
+            index = bisect.bisect_right(self.offsets, position) - 1
+
+            if self.ids[index] not in excluded:
+                found.append(self.ids[index])
+
+            if index + 1 == len(self.offsets):
+                break
+
+            position = self.text.find(part, self.offsets[index + 1])
+
+        return found
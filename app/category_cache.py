@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+import uuid
+
+from django.core.cache import cache
+
+from .models import Book, Category
+
+CATEGORY_BOOKS_TIMEOUT = 60 * 60 * 24
+
+CRITERIA = ('book_name', 'author', 'estimation', 'most_readable')
+ENTRY_FIELDS = ('id', 'book_name', 'id_author__author_name', 'rating_sum', 'rating_count', 'readers_count')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_version_key(category_id):
+    return 'category_version:{}'.format(category_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_category_version(category_id):
+    """
+    Returns the current version of cached data of the category, creates a new one if it's missing.
+
+    :param int category_id: The id of category.
+
+    :return str: The version.
+    """
+    version = cache.get(get_version_key(category_id))
+
+    if version is None:
+        cache.add(get_version_key(category_id), uuid.uuid4().hex, None)
+        version = cache.get(get_version_key(category_id))
+
+    return version
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def invalidate_category(category_id):
+    """
+    Bumps the version of cached data of the category, so all the cached lists of the category are not used anymore.
+    The version is random, so it never matches the version of stale lists even if the version itself was evicted.
+
+    :param int category_id: The id of category.
+    """
+    cache.set(get_version_key(category_id), uuid.uuid4().hex, None)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def invalidate_all_categories():
+    """
+    Bumps the versions of cached data of all categories, used after the bulk changes of books which skip signals.
+    """
+    for category_id in Category.objects.values_list('id', flat=True):
+        invalidate_category(category_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def invalidate_book_category(book_id):
+    """
+    Bumps the version of cached data of the category of the book.
+
+    :param int book_id: The id of book.
+    """
+    category_id = Book.objects.filter(id=book_id).values_list('id_category', flat=True).first()
+
+    if category_id is not None:
+        invalidate_category(category_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def generate_entries(books):
+    """
+    Generates the sort entries of books for each criterion. The entry is the tuple of sort key values ending with
+    the id of book, so the entries of different lists can be merged by comparing them.
+
+    :param django.db.models.query.QuerySet books: The books.
+
+    :return dict[str, list[tuple]]: The sorted entries by criterion.
+    """
+    entries = {criterion: [] for criterion in CRITERIA}
+
+    for book_id, book_name, author_name, rating_sum, rating_count, readers_count in books.values_list(*ENTRY_FIELDS):
+        entries['book_name'].append((book_name.casefold(), book_id))
+        entries['author'].append((author_name.casefold(), book_id))
+        entries['estimation'].append((0, -rating_sum / rating_count, book_id) if rating_count else (1, 0, book_id))
+
+        if readers_count:
+            entries['most_readable'].append((-readers_count, book_id))
+
+    return {criterion: sorted(criterion_entries) for criterion, criterion_entries in entries.items()}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_public_entries(category_id, criterion):
+    """
+    Returns the sort entries of public books of the category from the shared cache. On miss the entries of all
+    criteria are generated by one query and cached together.
+
+    :param int category_id: The id of category.
+    :param str criterion:   The sorting criterion.
+
+    :return list[tuple]: The sorted entries.
+    """
+    version = get_category_version(category_id)
+    keys = {item: 'category_books:{}:{}:public:{}'.format(category_id, item, version) for item in CRITERIA}
+
+    entries = cache.get(keys[criterion])
+
+    if entries is None:
+        all_entries = generate_entries(Book.objects.filter(id_category=category_id, private_book=False))
+        cache.set_many({keys[item]: all_entries[item] for item in CRITERIA}, CATEGORY_BOOKS_TIMEOUT)
+        entries = all_entries[criterion]
+
+    return entries
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_sorted_book_ids(user, category, criterion):
+    """
+    Returns the ids of books of the category available for the user, sorted by the criterion. The public books are
+    taken from the shared cache and the private books of the user are merged in, so the cache is user independent.
+
+    :param django.contrib.auth.models.User user:      The request user.
+    :param app.models.Category             category:  The category.
+    :param str                             criterion: The sorting criterion.
+
+    :return list[int]: The ids of books.
+    """
+    entries = get_public_entries(category.id, criterion)
+
+    if not user.is_anonymous:
+        private_books = Book.objects.filter(id_category=category, private_book=True, who_added__id_user=user)
+        entries = heapq.merge(entries, generate_entries(private_books)[criterion])
+
+    return [entry[-1] for entry in entries]
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Book, BookComment
+from .pagination import CursorPage, encode_cursor, paginate_by_cursor
+
+COMMENTS_PER_PAGE = 20
+COMMENTS_ORDERING = ('-id',)
+FIRST_PAGE_TIMEOUT = 60 * 60
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_version_key(book_id):
+    return 'book_comments_version:{}'.format(book_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_first_page_key(book_id, version):
+    return 'book_comments_first_page:{}:{}'.format(book_id, version)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_comments_version(book_id):
+    """
+    Returns the current version of cached comments of the book, creates a new one if it's missing.
+
+    :param int book_id: The id of book.
+
+    :return str: The version.
+    """
+    version = cache.get(get_version_key(book_id))
+
+    if version is None:
+        cache.add(get_version_key(book_id), uuid.uuid4().hex, None)
+        version = cache.get(get_version_key(book_id))
+
+    return version
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def generate_comment(comment):
+    """
+    Returns the data of the comment shown in the feed.
+
+    :param app.models.BookComment comment: The comment with the joined author.
+
+    :return dict: The comment data.
+    """
+    return {
+        'id': comment.id,
+        'username': comment.id_user.id_user.username,
+        'avatar': comment.id_user.avatar,
+        'posted_date': comment.posted_date,
+        'text': comment.text
+    }
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_first_page(book):
+    """
+    Returns the first page of comments of the book. The page is kept in the shared cache under the current version
+    of comments of the book, so the page fetched before any change is never used after it. Whether there are more
+    comments is decided by the comments counter of the book, so the page is fetched without the extra row unless
+    the counter is not built yet.
+
+    :param app.models.Book book: The book.
+
+    :return app.pagination.CursorPage: The page with the data of comments.
+    """
+    first_page_key = get_first_page_key(book.id, get_comments_version(book.id))
+    page = cache.get(first_page_key)
+
+    if page is None:
+        if book.comments_count:
+            comments = BookComment.get_book_comments(book.id)[:COMMENTS_PER_PAGE]
+            comments = [generate_comment(comment) for comment in comments]
+            has_next = bool(comments) and book.comments_count > len(comments)
+
+            page = CursorPage(comments, encode_cursor([comments[-1]['id']]) if has_next else None)
+        else:
+            page = paginate_by_cursor(BookComment.get_book_comments(book.id), COMMENTS_ORDERING, '', COMMENTS_PER_PAGE)
+            page = CursorPage([generate_comment(comment) for comment in page.object_list], page.next_cursor)
+
+        cache.set(first_page_key, page, FIRST_PAGE_TIMEOUT)
+
+    return page
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_comments_page(book_id, cursor):
+    """
+    Returns the page of comments of the book after the cursor, the empty cursor returns the cached first page.
+
+    :param int book_id: The id of book.
+    :param str cursor:  The cursor of previous page or empty string for the first page.
+
+    :return app.pagination.CursorPage: The page with the data of comments.
+
+    :raises app.pagination.InvalidCursor: If the cursor is malformed.
+    """
+    if not cursor:
+        return get_first_page(Book.objects.only('id', 'comments_count').get(id=book_id))
+
+    page = paginate_by_cursor(BookComment.get_book_comments(book_id), COMMENTS_ORDERING, cursor, COMMENTS_PER_PAGE)
+
+    return CursorPage([generate_comment(comment) for comment in page.object_list], page.next_cursor)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def invalidate_first_page(book_id):
+    """
+    Bumps the version of cached comments of the book. The version is bumped at once and again after the commit,
+    so the page fetched by the concurrent request before the changes are committed is not used either.
+
+    :param int book_id: The id of book.
+    """
+    cache.set(get_version_key(book_id), uuid.uuid4().hex, None)
+    transaction.on_commit(lambda: cache.set(get_version_key(book_id), uuid.uuid4().hex, None))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def invalidate_user_comments(user_id):
+    """
+    Bumps the versions of cached comments of all books commented by the user, used after the user was renamed or
+    changed the avatar.
+
+    :param int user_id: The id of django user.
+    """
+    for book_id in BookComment.objects.filter(id_user__id_user_id=user_id).values_list('id_book', flat=True).distinct():
+        invalidate_first_page(book_id)
@@ -1,3 +1,4 @@
 class Queues:
     default = 'default'
     high_priority = 'high_priority'
+    images = 'images'
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pypdfium2
+
+BOOK_COVER_WIDTH = 350
+MAX_BOOK_COVER_HEIGHT = 700
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def render_cover(path, width=BOOK_COVER_WIDTH, max_height=MAX_BOOK_COVER_HEIGHT):
+    """
+    Renders the first page of the PDF file to the PNG image of the given width. The height of the image is bounded,
+    so the very long pages are scaled down to fit it.
+
+    :param str path:       The path to the PDF file.
+    :param int width:      The width of the image.
+    :param int max_height: The max height of the image.
+
+    :return bytes: The PNG image.
+    """
+    with pypdfium2.PdfDocument(path) as document:
+        page = document[0]
+        page_width, page_height = page.get_size()
+        image = page.render(scale=min(width / page_width, max_height / page_height)).to_pil()
+
+    output = io.BytesIO()
+    image.save(output, 'PNG')
+
+    return output.getvalue()
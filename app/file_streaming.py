@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import os
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+RANGE_REGEX = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_etag(stat):
+    """
+    Generates the ETag of the file from its modification time and size, like nginx does.
+
+    :param os.stat_result stat: The stat of the file.
+
+    :return str: The quoted ETag.
+    """
+    return '"{:x}-{:x}"'.format(int(stat.st_mtime), stat.st_size)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_byte_range(request, size, etag, last_modified):
+    """
+    Returns the requested range of bytes of the file. Multiple ranges, malformed headers and the ranges of changed
+    files (by 'If-Range' header) are ignored, so the whole file is returned in these cases.
+
+    :param django.http.HttpRequest request:       The request.
+    :param int                     size:          The size of the file.
+    :param str                     etag:          The current ETag of the file.
+    :param int                     last_modified: The modification time of the file.
+
+    :return tuple[int, int]|None: The first and the last byte of the range, None if the whole file must be returned.
+    """
+    match = RANGE_REGEX.match(request.META.get('HTTP_RANGE', '').strip())
+
+    if not match or not any(match.groups()):
+        return None
+
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        return None
+
+    first, last = match.groups()
+
+    if not first:
+        return max(size - int(last), 0), size - 1
+
+    if last and int(last) < int(first):
+        return None
+
+    return int(first), min(int(last), size - 1) if last else size - 1
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def read_file(path, start, length):
+    """
+    Yields the part of the file by chunks.
+
+    :param str path:   The path to the file.
+    :param int start:  The first byte.
+    :param int length: The count of bytes.
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+
+        while length > 0:
+            data = file.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+
+            length -= len(data)
+            yield data
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_file_response(request, path, content_type):
+    """
+    Returns the response which streams the file. The 'Range' requests get the requested part of the file with 206
+    status, the conditional requests are answered by ETag and Last-Modified of the file.
+
+    :param django.http.HttpRequest request:      The request.
+    :param str                     path:         The path to the file.
+    :param str                     content_type: The content type of the file.
+
+    :return django.http.HttpResponse: The response.
+    """
+    stat = os.stat(path)
+    etag = get_etag(stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+        byte_range = get_byte_range(request, stat.st_size, etag, last_modified)
+
+        if byte_range is None:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+            response['Content-Length'] = stat.st_size
+
+        elif byte_range[0] > byte_range[1]:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */{}'.format(stat.st_size)
+
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(read_file(path, start, end - start + 1), status=206,
+                                             content_type=content_type)
+            response['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, stat.st_size)
+            response['Content-Length'] = end - start + 1
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+
+    return response
@@ -6,6 +6,7 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.validators import MinLengthValidator, MaxLengthValidator
 from django.core.validators import RegexValidator, EmailValidator
 
+from .pagination import InvalidCursor, decode_cursor
 from .validators import validate_image, validate_pdf
 
 
@@ -85,6 +86,11 @@ class GenerateBooksForm(forms.Form):
     part = forms.CharField(max_length=150)
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+class FindDuplicateBooksForm(forms.Form):
+    file_hash = forms.RegexField('^[0-9a-f]{64}$')
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 class AddBookForm(forms.Form):
     bookname = forms.CharField(max_length=150)
@@ -96,12 +102,6 @@ class AddBookForm(forms.Form):
     private = forms.BooleanField(required=False)
 
 
-# ----------------------------------------------------------------------------------------------------------------------
-class StoreBookImageForm(forms.Form):
-    id = forms.IntegerField()
-    image = forms.CharField()
-
-
 # ----------------------------------------------------------------------------------------------------------------------
 class BookHomeForm(forms.Form):
     book = forms.IntegerField()
@@ -120,16 +120,46 @@ class AddCommentForm(forms.Form):
 
 
 # ----------------------------------------------------------------------------------------------------------------------
-class LoadCommentsForm(forms.Form):
-    page = forms.IntegerField()
+class BookPagingForm(forms.Form):
+    """
+    Accepts either the page number or the cursor; the empty cursor requests the first page in the cursor mode.
+    """
+    page = forms.IntegerField(required=False, validators=[MinValueValidator(1)])
+    cursor = forms.CharField(required=False, max_length=1000)
+
+    def clean_cursor(self):
+        """
+        Checks if the cursor can be decoded.
+        """
+        cursor = self.cleaned_data['cursor']
+
+        try:
+            if cursor:
+                decode_cursor(cursor)
+        except InvalidCursor:
+            raise ValidationError('The cursor is malformed!')
+
+        return cursor
+
+    def clean(self):
+        """
+        Checks if the page number or the cursor is received.
+        """
+        cleaned_data = super(BookPagingForm, self).clean()
+
+        if cleaned_data.get('page') is None and 'cursor' not in self.data:
+            raise ValidationError('Page or cursor is missing')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class LoadCommentsForm(BookPagingForm):
     book_id = forms.IntegerField()
 
 
 # ----------------------------------------------------------------------------------------------------------------------
-class SortForm(forms.Form):
+class SortForm(BookPagingForm):
     category = forms.IntegerField(required=False)
     criterion = forms.CharField(max_length=30)
-    page = forms.IntegerField(validators=[MinValueValidator(1)])
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -138,11 +168,6 @@ class SearchBookForm(forms.Form):
     page = forms.IntegerField(validators=[MinValueValidator(1)])
 
 
-# ----------------------------------------------------------------------------------------------------------------------
-class BookPagingForm(forms.Form):
-    page = forms.IntegerField(validators=[MinValueValidator(1)])
-
-
 # ----------------------------------------------------------------------------------------------------------------------
 class SetCurrentPageForm(forms.Form):
     page = forms.IntegerField(validators=[MinValueValidator(1)])
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+
+from PIL import Image
+
+COVER_WIDTHS = (120, 240, 350)
+AVATAR_WIDTHS = (64, 128, 250)
+
+# The format of variants and the extension of their files.
+VARIANT_FORMATS = (('jpeg', 'jpg'), ('webp', 'webp'))
+VARIANTS_DIR = 'variants'
+VARIANT_QUALITY = 80
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_image_version(field_file):
+    """
+    Returns the version of the original image which is changed with its content, e.g. when the avatar is overwritten
+    under the same name.
+
+    :param django.db.models.fields.files.FieldFile field_file: The original image.
+
+    :return str: The modification time of the image in nanoseconds as the hex string.
+    """
+    return '{:x}'.format(os.stat(field_file.path).st_mtime_ns)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_variants_dir(name):
+    """
+    Returns the directory of the variants of the original image, it keeps the variants of all versions of the image.
+
+    :param str name: The name of the original image in the storage.
+
+    :return str: The name of the directory in the storage.
+    """
+    return '{}/{}'.format(VARIANTS_DIR, os.path.splitext(name)[0])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_variant_name(name, version, width, image_format):
+    """
+    Returns the name of the image variant. The name contains the version of the original image, so the changed image
+    gets the new URLs of variants and the cached variants of the previous image are not used.
+
+    :param str name:         The name of the original image in the storage.
+    :param str version:      The version of the original image.
+    :param int width:        The width of the variant.
+    :param str image_format: The format of the variant.
+
+    :return str: The name of the variant in the storage.
+    """
+    extension = dict(VARIANT_FORMATS)[image_format]
+
+    return '{}/{}-{}w.{}'.format(get_variants_dir(name), version, width, extension)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def save_variant(image, path, image_format):
+    """
+    Saves the image to the temporary file and moves it to the path, so the partly written variants are never served.
+
+    :param PIL.Image.Image image:        The image.
+    :param str             path:         The path of the variant.
+    :param str             image_format: The format of the variant.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = '{}.tmp'.format(path)
+
+    if image_format == 'jpeg':
+        image.save(temp_path, 'JPEG', quality=VARIANT_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(temp_path, 'WEBP', quality=VARIANT_QUALITY, method=4)
+
+    os.replace(temp_path, path)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def generate_variants(field_file, widths):
+    """
+    Generates the variants of the image with each width in each format. The images are not upscaled, the variants
+    wider than the original image keep its size. The variants of the previous versions of the image are removed.
+
+    :param django.db.models.fields.files.FieldFile field_file: The original image.
+    :param tuple[int]                              widths:     The widths of variants.
+    """
+    version = get_image_version(field_file)
+    image = Image.open(field_file.path)
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # JPEG has no transparency, the transparent parts become white like the background of pages.
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        image = background
+    else:
+        image = image.convert('RGB')
+
+    for width in widths:
+        height = max(int(image.height * min(width, image.width) / image.width), 1)
+        variant = image.resize((min(width, image.width), height), Image.LANCZOS)
+
+        for image_format, extension in VARIANT_FORMATS:
+            variant_name = get_variant_name(field_file.name, version, width, image_format)
+            save_variant(variant, field_file.storage.path(variant_name), image_format)
+
+    variants_dir = field_file.storage.path(get_variants_dir(field_file.name))
+
+    for file_name in os.listdir(variants_dir):
+        if not file_name.startswith('{}-'.format(version)):
+            os.remove(os.path.join(variants_dir, file_name))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def remove_variants(field_file):
+    """
+    Removes the variants of all versions of the image.
+
+    :param django.db.models.fields.files.FieldFile field_file: The original image.
+    """
+    shutil.rmtree(field_file.storage.path(get_variants_dir(field_file.name)), ignore_errors=True)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_variants(field_file, widths):
+    """
+    Returns the URLs of the image variants, e.g. for the mobile clients which choose the size themselves.
+
+    :param django.db.models.fields.files.FieldFile field_file: The original image.
+    :param tuple[int]                              widths:     The widths of variants.
+
+    :return list[dict]: The width and the URL of the variant in each format.
+    """
+    version = get_image_version(field_file)
+    variants = []
+
+    for width in widths:
+        variant = {'width': width}
+
+        for image_format, extension in VARIANT_FORMATS:
+            variant[image_format] = field_file.storage.url(get_variant_name(field_file.name, version, width,
+                                                                            image_format))
+
+        variants.append(variant)
+
+    return variants
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_image_sources(field_file, widths, variants_ready, src_width):
+    """
+    Returns the sources of the <img> and <picture> elements. The original image is used until the variants are ready.
+
+    :param django.db.models.fields.files.FieldFile field_file:     The original image.
+    :param tuple[int]                              widths:         The widths of variants.
+    :param bool                                    variants_ready: Whether the variants are generated.
+    :param int                                     src_width:      The width of the variant used as the 'src'.
+
+    :return dict[str, str]: The 'src', the 'srcset' of JPEG variants and the 'webp_srcset' of WebP variants.
+    """
+    if not field_file:
+        return {'src': '', 'srcset': '', 'webp_srcset': ''}
+
+    if not variants_ready:
+        return {'src': field_file.url, 'srcset': '', 'webp_srcset': ''}
+
+    variants = get_variants(field_file, widths)
+
+    return {
+        'src': next(variant['jpeg'] for variant in variants if variant['width'] == src_width),
+        'srcset': ', '.join('{} {}w'.format(variant['jpeg'], variant['width']) for variant in variants),
+        'webp_srcset': ', '.join('{} {}w'.format(variant['webp'], variant['width']) for variant in variants)
+    }
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import re
+import uuid
+from functools import lru_cache
+
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import render_to_string
+from django.utils.html import escape, strip_tags
+
+MAX_CACHED_TEMPLATES = 32
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class MailTemplate(object):
+    """
+    The mail rendered once with the placeholders instead of the fields which differ between recipients. The HTML and
+    the plain text of each recipient are made by replacing the placeholders, so the templates are not rendered and
+    the tags are not stripped again for each recipient.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, template_name, subject, fields, context):
+        """
+        :param str            template_name: The name of mail template.
+        :param str            subject:       The subject of mail.
+        :param tuple[str]     fields:        The names of fields which differ between recipients.
+        :param dict[str, str] context:       The values of the other fields.
+        """
+        # The random prefix is not escaped by the template and can't be found in the text of the mail by accident.
+        prefix = 'mailfield{}'.format(uuid.uuid4().hex)
+        self.placeholders = {'{}{}'.format(prefix, field): field for field in fields}
+
+        context = dict(context, **{field: placeholder for placeholder, field in self.placeholders.items()})
+
+        self.subject = subject
+        self.html = render_to_string(template_name, context)
+        self.text = strip_tags(self.html)
+        self.pattern = re.compile('|'.join(self.placeholders)) if self.placeholders else None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def render(self, **values):
+        """
+        Returns the mail with the fields of recipient, the values are escaped like the template escapes them.
+
+        :param dict[str, str] values: The values of the fields which differ between recipients.
+
+        :return tuple[str, str]: The HTML and the plain text of the mail.
+        """
+        if self.pattern is None:
+            return self.html, self.text
+
+        escaped_values = {placeholder: escape(values[field]) for placeholder, field in self.placeholders.items()}
+
+        def replace(match):
+            return escaped_values[match.group()]
+
+        return self.pattern.sub(replace, self.html), self.pattern.sub(replace, self.text)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_email(self, recipient, **values):
+        """
+        Returns the email for the recipient with the HTML and the plain text alternatives.
+
+        :param str            recipient: The email address.
+        :param dict[str, str] values:    The values of the fields which differ between recipients.
+
+        :return django.core.mail.EmailMultiAlternatives: The email.
+        """
+        html_content, text_content = self.render(**values)
+
+        email = EmailMultiAlternatives(self.subject, text_content, to=[recipient])
+        email.attach_alternative(html_content, 'text/html')
+
+        return email
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@lru_cache(maxsize=MAX_CACHED_TEMPLATES)
+def get_mail_template(template_name, subject, fields=(), **context):
+    """
+    Returns the rendered mail template, it's rendered once for each subject and the values of common fields, e.g.
+    once for each post of the newsletter.
+
+    :param str        template_name: The name of mail template.
+    :param str        subject:       The subject of mail.
+    :param tuple[str] fields:        The names of fields which differ between recipients.
+    :param dict       context:       The values of the other fields.
+
+    :return MailTemplate: The mail template.
+    """
+    return MailTemplate(template_name, subject, fields, context)
@@ -0,0 +1,249 @@
+import json
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.shortcuts import reverse
+from django.test import Client
+from django.test.utils import override_settings
+
+from ...middleware.query_count_middleware import view_queries_recorded
+from ...models import TheUser, Author, Book, AddedBook, BookRating, BookComment
+
+PERCENTILES = (50, 95, 99)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_percentile(values, percent):
+    """
+    Returns the percentile of values by the nearest rank method.
+
+    :param list[float] values: The sorted values.
+    :param int percent:        The percent.
+
+    :return float: The percentile.
+    """
+    rank = max(int(round(percent / 100 * len(values))), 1)
+
+    return values[rank - 1]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Requests the web and API views and reports the latency percentiles and query counts as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='The count of measured requests of each view')
+        parser.add_argument('--warmup', type=int, default=1, help='The count of not measured requests of each view')
+        parser.add_argument('--username', type=str, default=None,
+                            help='The user of requests, the user with most added books by default')
+        parser.add_argument('--password', type=str, default='synthetic#password', help='The password of the user')
+        parser.add_argument('--views', type=str, nargs='*', help='The names of views to measure, all by default')
+        parser.add_argument('--output', type=str, default=None, help='The JSON file of the report, stdout by default')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('The count of measured requests must be positive.')
+
+        the_user = self.get_user(options['username'])
+
+        book = (Book.objects.filter(addedbook__id_user=the_user, private_book=False, blocked_book=False)
+                .order_by('-readers_count').first())
+
+        if book is None:
+            raise CommandError('The user "{}" has no added public books.'.format(the_user.id_user.username))
+
+        # The host of test client is allowed and the mails are kept in memory, like in the tests.
+        with override_settings(ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver'],
+                               EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            anonymous_client = Client()
+            logged_client = Client()
+
+            if not logged_client.login(username=the_user.id_user.username, password=options['password']):
+                raise CommandError('Can not log in as "{}".'.format(the_user.id_user.username))
+
+            scenarios = [scenario for scenario in self.get_scenarios(logged_client, the_user, book,
+                                                                     self.get_not_added_book(the_user))
+                         if not options['views'] or scenario[0] in options['views']]
+
+            report = {
+                'date': datetime.now().isoformat(),
+                'repeat': options['repeat'],
+                'dataset': self.get_dataset_counts(),
+                'views': {}
+            }
+
+            for name, method, path, data, is_logged in scenarios:
+                client = logged_client if is_logged else anonymous_client
+
+                try:
+                    stats = self.measure(client, method, path, data, options['repeat'], options['warmup'])
+                except Exception as exc:
+                    stats = {'method': method.upper(), 'path': path, 'error': repr(exc)}
+                    self.stderr.write('{}: {}'.format(name, stats['error']))
+                else:
+                    self.stderr.write('{}: p50={p50_ms} ms, p95={p95_ms} ms, queries={queries_max}'.format(name,
+                                                                                                          **stats))
+
+                report['views'][name] = stats
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output)
+        else:
+            self.stdout.write(output)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_user(self, username):
+        if username:
+            the_user = TheUser.objects.select_related('id_user').filter(id_user__username=username).first()
+        else:
+            the_user = (TheUser.objects.select_related('id_user').annotate(added_count=Count('addedbook'))
+                        .order_by('-added_count').first())
+
+        if the_user is None:
+            raise CommandError('The user is not found, generate the dataset by "generatedataset" command.')
+
+        return the_user
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_not_added_book(self, the_user):
+        return (Book.objects.filter(private_book=False, blocked_book=False).exclude(addedbook__id_user=the_user)
+                .order_by('-readers_count').first())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_dataset_counts(self):
+        return {model.__name__: model.objects.count()
+                for model in (TheUser, Author, Book, AddedBook, BookRating, BookComment)}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_next_cursor(self, client, method, path, data):
+        """
+        Returns the cursor of the second page of the view which is paginated by cursor, the empty cursor of the first
+        page if there is only one page.
+        """
+        response = getattr(client, method)(path, dict(data, cursor=''), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        return json.loads(response.content.decode('utf-8')).get('next_cursor') or ''
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_scenarios(self, logged_client, the_user, book, not_added_book):
+        """
+        Returns the requested views as tuples of the name, the method, the path, the data and whether the request is
+        made by the logged user. The views paginated by cursor are requested with the cursor of the second page.
+
+        :param django.test.Client logged_client:  The client of the logged user.
+        :param app.models.TheUser the_user:       The user of requests.
+        :param app.models.Book    book:           The public book added by the user.
+        :param app.models.Book    not_added_book: The public book which is not added by the user, if any.
+        """
+        search_term = book.book_name.split()[0]
+        api_data = {'app_key': settings.API_SECRET_KEY, 'user_token': the_user.auth_token}
+
+        cursor_scenarios = [
+            ('load_books_cursor', 'get', reverse('load_books', args=[book.id_category_id]), {}),
+            ('book_sort_name_cursor', 'get', reverse('book_sort'),
+             {'category': book.id_category_id, 'criterion': 'book_name'}),
+            ('book_sort_estimation_cursor', 'get', reverse('book_sort'),
+             {'category': book.id_category_id, 'criterion': 'estimation'}),
+            ('load_uploaded_books_cursor', 'get', reverse('load_uploaded_books_app', args=[the_user.id]), {}),
+            ('load_comments_cursor', 'post', reverse('load_comments_app'), {'book_id': book.id}),
+        ]
+
+        return [
+            ('index', 'get', reverse('index'), {}, False),
+            ('home', 'get', reverse('index'), {}, True),
+            ('categories', 'get', reverse('categories'), {}, True),
+            ('category', 'get', reverse('category', args=[book.id_category_id]), {}, True),
+            ('load_books', 'get', reverse('load_books', args=[book.id_category_id]), {'page': 2}, True),
+            ('book_sort_name', 'get', reverse('book_sort'),
+             {'category': book.id_category_id, 'criterion': 'book_name', 'page': 1}, True),
+            ('book_sort_estimation', 'get', reverse('book_sort'),
+             {'category': book.id_category_id, 'criterion': 'estimation', 'page': 1}, True),
+            ('book_sort_most_readable', 'get', reverse('book_sort'),
+             {'category': book.id_category_id, 'criterion': 'most_readable', 'page': 1}, True),
+            ('search_book_app', 'get', reverse('search_book_app'), {'data': search_term, 'page': 1}, True),
+            ('author', 'get', reverse('author', args=[book.id_author_id]), {}, True),
+            ('book', 'get', reverse('book', args=[book.id]), {}, True),
+            ('book_anonymous', 'get', reverse('book', args=[book.id]), {}, False),
+            ('load_comments_app', 'post', reverse('load_comments_app'), {'book_id': book.id, 'page': 2}, True),
+            ('read_book', 'get', reverse('read_book', args=[book.id]), {}, True),
+            ('profile', 'get', reverse('profile', args=[the_user.id]), {}, True),
+            ('load_uploaded_books_app', 'get', reverse('load_uploaded_books_app', args=[the_user.id]), {'page': 1},
+             True),
+            ('generate_authors', 'get', reverse('generate_authors'), {'part': book.id_author.author_name[:3]}, True),
+            ('generate_books', 'get', reverse('generate_books'), {'part': search_term[:3]}, True),
+            ('add_book_home_app', 'post', reverse('add_book_home_app'), {'book': (not_added_book or book).id}, True),
+            ('change_rating_app', 'post', reverse('change_rating_app'), {'book': book.id, 'rating': 7}, True),
+            ('add_comment_app', 'post', reverse('add_comment_app'), {'book': book.id, 'comment': 'Benchmark'}, True),
+            ('set_current_page', 'post', reverse('set_current_page'), {'book': book.id, 'page': 5}, True),
+            ('about', 'get', reverse('about'), {}, False),
+
+            ('home_api', 'post', '/api/v1/home', api_data, False),
+            ('recommend_api', 'post', '/api/v1/recommend', api_data, False),
+            ('uploaded_api', 'post', '/api/v1/uploaded', api_data, False),
+            ('categories_api', 'post', '/api/v1/categories', api_data, False),
+            ('category_api', 'post', reverse('category_api'),
+             dict(api_data, category_id=book.id_category_id, page=1), False),
+            ('search_book_api', 'post', '/api/v1/search-book', dict(api_data, search_term=search_term, page=1), False),
+            ('book_api', 'post', reverse('book_api'), dict(api_data, book_id=book.id), False),
+            ('read_book_api', 'post', '/api/v1/read-book', dict(api_data, book_id=book.id), False),
+            ('change_rating_api', 'post', '/api/v1/change-rating', dict(api_data, book_id=book.id, rating=7), False),
+            ('comment_add_api', 'post', '/api/v1/comment-add', dict(api_data, book_id=book.id, text='Benchmark'),
+             False),
+            ('my_profile_api', 'post', '/api/v1/my-profile', api_data, False),
+        ] + [
+            (name, method, path, dict(data, cursor=self.get_next_cursor(logged_client, method, path, data)), True)
+            for name, method, path, data in cursor_scenarios
+        ]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def measure(self, client, method, path, data, repeat, warmup):
+        """
+        Requests the view and returns the stats of requests. The query counts are taken from the query count
+        middleware. The changes made by the view are rolled back, so the requests do not change the dataset.
+        """
+        wall_times = []
+        query_counts = []
+        status_codes = set()
+
+        def record_queries(sender, query_count=0, **kwargs):
+            query_counts.append(query_count)
+
+        view_queries_recorded.connect(record_queries)
+        try:
+            for number in range(warmup + repeat):
+                if number == warmup:
+                    del query_counts[:]
+
+                with transaction.atomic():
+                    start_time = time.time()
+                    response = getattr(client, method)(path, data, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+                    wall_time = (time.time() - start_time) * 1000
+
+                    transaction.set_rollback(True)
+
+                if number >= warmup:
+                    wall_times.append(wall_time)
+                    status_codes.add(response.status_code)
+        finally:
+            view_queries_recorded.disconnect(record_queries)
+
+        wall_times.sort()
+        stats = {'p{}_ms'.format(percent): round(get_percentile(wall_times, percent), 2) for percent in PERCENTILES}
+        stats.update({
+            'method': method.upper(),
+            'path': path,
+            'status_codes': sorted(status_codes),
+            'mean_ms': round(sum(wall_times) / len(wall_times), 2),
+            'queries_min': min(query_counts, default=None),
+            'queries_max': max(query_counts, default=None)
+        })
+
+        return stats
@@ -0,0 +1,52 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.authentication import get_token_key
+from ...middleware.reminder_middleware import get_web_reminders_key
+from ...models import TheUser
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Converts the reminders stored in JSON to the reminder flags. The converted users are skipped on next runs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='The count of users converted at once')
+
+    def handle(self, *args, **options):
+        print('Start processing...')
+
+        converted_count = 0
+        last_id = 0
+
+        while True:
+            users = list(TheUser.objects.filter(id__gt=last_id).exclude(reminder='').order_by('id')
+                         .values_list('id', 'id_user_id', 'auth_token', 'reminder')[:options['batch_size']])
+
+            if not users:
+                break
+
+            # The users are updated by groups of the same flags, there are only a few combinations of them.
+            user_ids = defaultdict(list)
+            for the_user_id, user_id, auth_token, reminder in users:
+                user_ids[TheUser.parse_reminder_flags(reminder)].append(the_user_id)
+
+            # The users who changed the reminders after the select have the JSON cleared, so they are skipped.
+            with transaction.atomic():
+                for reminder_flags, ids in user_ids.items():
+                    TheUser.objects.filter(id__in=ids).exclude(reminder='').update(reminder_flags=reminder_flags,
+                                                                                   reminder='')
+
+            cache.delete_many([get_web_reminders_key(user_id) for the_user_id, user_id, auth_token, reminder in users])
+            cache.delete_many([get_token_key(auth_token) for the_user_id, user_id, auth_token, reminder in users
+                               if auth_token])
+
+            converted_count += len(users)
+            last_id = users[-1][0]
+
+            print('{} users converted'.format(converted_count))
+
+        print('Reminders of {} users converted.'.format(converted_count))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from ...constants import Queues
+from ...models import Book, TheUser
+from ...tasks import generate_book_cover, generate_avatar_variants
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Queues the generation of missing covers and of the image variants of covers and avatars.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help='Queue also the books with failed covers')
+        parser.add_argument('--avatars', action='store_true', help='Queue also the avatars without variants')
+
+    def handle(self, *args, **options):
+        print('Start processing...')
+
+        statuses = [Book.COVER_PENDING, Book.COVER_FAILED] if options['failed'] else [Book.COVER_PENDING]
+        book_ids = Book.objects.filter(cover_status__in=statuses).values_list('id', flat=True)
+
+        for number, book_id in enumerate(book_ids, 1):
+            generate_book_cover.apply_async(args=(book_id,), queue=Queues.images)
+
+            if number % 1000 == 0:
+                print('{} books queued'.format(number))
+
+        print('Generation of {} covers queued.'.format(len(book_ids)))
+
+        if options['avatars']:
+            user_ids = (TheUser.objects.exclude(user_photo='').filter(user_photo_variants=False)
+                        .values_list('id', flat=True))
+
+            for user_id in user_ids:
+                generate_avatar_variants.apply_async(args=(user_id,), queue=Queues.images)
+
+            print('Generation of {} avatars queued.'.format(len(user_ids)))
@@ -0,0 +1,251 @@
+import random
+import uuid
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from .helpers.categories_mapper import mapper
+from ...models import (TheUser, Category, Author, Language, Book, AddedBook, BookRating, BookComment, authors_index,
+                       books_index)
+from ...recommend import rebuild_neighbours
+
+LANGUAGES = ['English', 'Russian', 'Ukrainian', 'German', 'French']
+
+FIRST_NAMES = ['Anna', 'Boris', 'Clara', 'Dmitry', 'Elena', 'Fedor', 'Galina', 'Henry', 'Irina', 'James', 'Kate',
+               'Leo', 'Maria', 'Nikolay', 'Olga', 'Peter', 'Rosa', 'Sergey', 'Tatiana', 'Victor']
+LAST_NAMES = ['Andersen', 'Bulgakov', 'Chekhov', 'Dickens', 'Esenin', 'Fitzgerald', 'Gogol', 'Hemingway', 'Ibsen',
+              'Joyce', 'Kuprin', 'London', 'Mann', 'Nabokov', 'Orwell', 'Pushkin', 'Remarque', 'Shevchenko',
+              'Tolstoy', 'Verne']
+BOOK_WORDS = ['the', 'last', 'journey', 'of', 'night', 'garden', 'history', 'war', 'peace', 'silent', 'river',
+              'city', 'old', 'secret', 'letters', 'winter', 'kingdom', 'stars', 'house', 'sea', 'theory', 'python',
+              'mountain', 'children', 'lost', 'empire', 'dream', 'machine', 'forest', 'song']
+COMMENT_PHRASES = ['Great book.', 'Could not put it down.', 'A bit too long in the middle.', 'Recommended.',
+                   'The ending was unexpected.', 'Read it twice.', 'Not my genre, but well written.',
+                   'The translation could be better.', 'A classic.', 'Boring.']
+
+# The weights of ratings from 1 to 10, the real ratings are skewed to the high values.
+RATING_WEIGHTS = [2, 1, 2, 3, 5, 8, 13, 18, 15, 10]
+
+PRIVATE_BOOKS_SHARE = 0.05
+BLOCKED_BOOKS_SHARE = 0.005
+ZIPF_EXPONENT = 1.1
+MAX_PAIRS_ATTEMPTS = 100
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Generates the large synthetic dataset of books, authors, users and their activity for the benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=100000, help='The count of books')
+        parser.add_argument('--authors', type=int, default=20000, help='The count of authors')
+        parser.add_argument('--users', type=int, default=50000, help='The count of users')
+        parser.add_argument('--added-books', type=int, default=1000000, help='The count of books added by users')
+        parser.add_argument('--ratings', type=int, default=500000, help='The count of ratings')
+        parser.add_argument('--comments', type=int, default=300000, help='The count of comments')
+        parser.add_argument('--prefix', type=str, default='synthetic', help='The prefix of usernames')
+        parser.add_argument('--password', type=str, default='synthetic#password', help='The password of users')
+        parser.add_argument('--batch-size', type=int, default=5000, help='The count of objects inserted at once')
+        parser.add_argument('--seed', type=int, default=None, help='The seed of the random generator')
+        parser.add_argument('--skip-search-index', action='store_true', help='Do not rebuild the search index')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def handle(self, *args, **options):
+        print('Start processing...')
+
+        if User.objects.filter(username__startswith='{}_'.format(options['prefix'])).exists():
+            raise CommandError('The users with prefix "{}" already exist.'.format(options['prefix']))
+
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        user_ids = self.create_users(options['users'], options['prefix'], options['password'])
+        author_ids = self.create_authors(options['authors'])
+        book_ids = self.create_books(options['books'], author_ids, user_ids)
+
+        added_pairs = self.generate_pairs(options['added_books'], user_ids, book_ids)
+        self.create_added_books(added_pairs)
+        self.create_ratings(self.random.sample(added_pairs, min(options['ratings'], len(added_pairs))))
+        self.create_comments(options['comments'], added_pairs)
+
+        call_command('rebuildreaders')
+        call_command('rebuildcomments')
+        call_command('rebuildratings')
+
+        if not options['skip_search_index']:
+            call_command('rebuildsearchindex')
+
+        authors_index.bump_version()
+        books_index.bump_version()
+
+        print('Building recommendations...')
+        rebuild_neighbours()
+
+        print('Dataset generated. Users are "{}_<number>" with password "{}".'.format(options['prefix'],
+                                                                                     options['password']))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_skewed_chooser(self, population):
+        """
+        Returns the function which chooses the items with Zipf distribution, i.e. a few items are very popular and
+        most of items are rare. The popular items are spread randomly over the population.
+
+        :param list population: The items.
+
+        :return function: The function which takes the count of items and returns the list of chosen items.
+        """
+        ranked = list(population)
+        self.random.shuffle(ranked)
+        cum_weights = list(accumulate(1 / rank ** ZIPF_EXPONENT for rank in range(1, len(ranked) + 1)))
+
+        return lambda count: self.random.choices(ranked, cum_weights=cum_weights, k=count)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def bulk_create(self, model, objects):
+        """
+        Inserts the objects by batches and returns the ids of created objects.
+
+        :param django.db.models.Model model: The model of objects.
+        :param iterable objects:             The objects to insert.
+
+        :return list[int]: The ids of inserted objects.
+        """
+        last_id = model.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        batch = []
+
+        with transaction.atomic():
+            for number, obj in enumerate(objects, 1):
+                batch.append(obj)
+
+                if len(batch) >= self.batch_size:
+                    model.objects.bulk_create(batch)
+                    batch = []
+                    print('{}: {} inserted'.format(model.__name__, number))
+
+            model.objects.bulk_create(batch)
+
+        return list(model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_users(self, count, prefix, password):
+        password_hash = make_password(password)
+
+        user_ids = self.bulk_create(User, (
+            User(username='{}_{}'.format(prefix, number),
+                 email='{}_{}@example.com'.format(prefix, number),
+                 password=password_hash)
+            for number in range(count)
+        ))
+
+        return self.bulk_create(TheUser, (
+            TheUser(id_user_id=user_id, auth_token=str(uuid.uuid4()), subscription=self.random.random() < 0.7)
+            for user_id in user_ids
+        ))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_authors(self, count):
+        # The names are numbered after the existing authors, so the names of each run are unique.
+        last_id = Author.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+        def generate_authors():
+            for number in range(last_id, last_id + count):
+                author_name = '{} {} {}'.format(self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES), number)
+
+                yield Author(author_name=author_name, author_key=Author.get_author_key(author_name))
+
+        return self.bulk_create(Author, generate_authors())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_category_ids(self):
+        for category_name in sorted(set(mapper.values())):
+            Category.objects.get_or_create(category_name=category_name)
+
+        return list(Category.objects.values_list('id', flat=True))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_language_ids(self):
+        for language in LANGUAGES:
+            Language.objects.get_or_create(language=language)
+
+        return list(Language.objects.filter(language__in=LANGUAGES).values_list('id', flat=True))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_books(self, count, author_ids, user_ids):
+        choose_authors = self.get_skewed_chooser(author_ids)
+        choose_categories = self.get_skewed_chooser(self.get_category_ids())
+        choose_uploaders = self.get_skewed_chooser(user_ids)
+        language_ids = self.get_language_ids()
+
+        def generate_books():
+            for number, (author_id, category_id, user_id) in enumerate(
+                    zip(choose_authors(count), choose_categories(count), choose_uploaders(count))):
+                words = self.random.sample(BOOK_WORDS, self.random.randint(1, 5))
+
+                yield Book(book_name='{} {}'.format(' '.join(words).capitalize(), number),
+                           id_author_id=author_id,
+                           id_category_id=category_id,
+                           description=' '.join(self.random.choices(BOOK_WORDS, k=50)),
+                           language_id=self.random.choice(language_ids),
+                           book_file='book_file/synthetic_{}.pdf'.format(number),
+                           who_added_id=user_id,
+                           private_book=self.random.random() < PRIVATE_BOOKS_SHARE,
+                           blocked_book=self.random.random() < BLOCKED_BOOKS_SHARE)
+
+        return self.bulk_create(Book, generate_books())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def generate_pairs(self, count, user_ids, book_ids):
+        """
+        Returns the unique pairs of user and book with skewed activity of users and popularity of books.
+
+        :param int count:            The count of pairs.
+        :param list[int] user_ids:   The ids of users.
+        :param list[int] book_ids:   The ids of books.
+
+        :return list[tuple[int, int]]: The pairs, fewer than the count if there are not enough distinct pairs.
+        """
+        count = min(count, len(user_ids) * len(book_ids))
+        choose_users = self.get_skewed_chooser(user_ids)
+        choose_books = self.get_skewed_chooser(book_ids)
+        pairs = set()
+
+        for attempt in range(MAX_PAIRS_ATTEMPTS):
+            missing = count - len(pairs)
+            if not missing:
+                break
+
+            pairs.update(zip(choose_users(missing), choose_books(missing)))
+
+        return sorted(pairs)[:count]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_added_books(self, pairs):
+        self.bulk_create(AddedBook, (
+            AddedBook(id_user_id=user_id, id_book_id=book_id, last_page=self.random.randint(1, 300))
+            for user_id, book_id in pairs
+        ))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_ratings(self, pairs):
+        ratings = self.random.choices(range(1, 11), weights=RATING_WEIGHTS, k=len(pairs))
+
+        self.bulk_create(BookRating, (
+            BookRating(id_user_id=user_id, id_book_id=book_id, rating=rating)
+            for (user_id, book_id), rating in zip(pairs, ratings)
+        ))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_comments(self, count, pairs):
+        if not pairs:
+            return
+
+        self.bulk_create(BookComment, (
+            BookComment(id_user_id=user_id, id_book_id=book_id,
+                        text=' '.join(self.random.sample(COMMENT_PHRASES, self.random.randint(1, 3))))
+            for user_id, book_id in self.random.choices(pairs, k=count)
+        ))
@@ -0,0 +1,45 @@
+import os
+import re
+
+from django.core.management.base import BaseCommand
+
+from ...models import Book
+from ...storage import get_file_hash
+
+HASHED_NAME_REGEX = re.compile(r'(^|/)[0-9a-f]{64}(\.\w+)?$')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Renames the book files by the SHA-256 of their content, the files of the same content are stored once.'
+
+    def handle(self, *args, **options):
+        print('Start processing...')
+
+        storage = Book._meta.get_field('book_file').storage
+        names = Book.objects.order_by('book_file').values_list('book_file', flat=True).distinct()
+        removed_count = 0
+
+        for number, name in enumerate(names, 1):
+            if HASHED_NAME_REGEX.search(name):
+                continue
+
+            if not storage.exists(name):
+                print('The file "{}" does not exist!'.format(name))
+                continue
+
+            with storage.open(name) as book_file:
+                new_name = storage.get_content_name(name, get_file_hash(book_file))
+
+            if storage.exists(new_name):
+                os.remove(storage.path(name))
+                removed_count += 1
+            else:
+                os.rename(storage.path(name), storage.path(new_name))
+
+            Book.objects.filter(book_file=name).update(book_file=new_name)
+
+            if number % 1000 == 0:
+                print('{} files processed'.format(number))
+
+        print('Book files renamed, {} duplicate files removed.'.format(removed_count))
@@ -0,0 +1,77 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...category_cache import invalidate_category
+from ...models import Author, Book
+from ...search import index_author_books
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Merges the authors with the same normalized name and fills the keys of authors.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Print the duplicates without merging them')
+
+    def handle(self, *args, **options):
+        print('Start processing...')
+
+        author_ids = defaultdict(list)
+        stale_keys = set()
+
+        for author_id, author_name, author_key in Author.objects.order_by('id').values_list('id', 'author_name',
+                                                                                            'author_key'):
+            normalized_key = Author.get_author_key(author_name)
+            author_ids[normalized_key].append(author_id)
+
+            if author_key != normalized_key:
+                stale_keys.add(normalized_key)
+
+        duplicates = {author_key: ids for author_key, ids in author_ids.items() if len(ids) > 1}
+
+        for number, (author_key, ids) in enumerate(sorted(duplicates.items()), 1):
+            print('Author "{}": merging ids {} to {}'.format(author_key, ids[1:], ids[0]))
+
+            if not options['dry_run']:
+                self.merge_authors(ids[0], ids[1:])
+
+            if number % 1000 == 0:
+                print('{} authors merged'.format(number))
+
+        if not options['dry_run']:
+            # The stale keys are cleared first, the key of one author can be the new key of another author.
+            stale_ids = [author_ids[author_key][0] for author_key in stale_keys]
+            Author.objects.filter(id__in=stale_ids).update(author_key=None)
+
+            for author_key in stale_keys:
+                Author.objects.filter(id=author_ids[author_key][0]).update(author_key=author_key)
+
+        print('{} duplicate authors {}, {} keys updated.'.format(
+            sum(len(ids) - 1 for ids in duplicates.values()), 'found' if options['dry_run'] else 'merged',
+            0 if options['dry_run'] else len(stale_keys)))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def merge_authors(self, author_id, duplicate_ids):
+        """
+        Repoints the books of the duplicate authors to the author and removes the duplicates. The oldest author is
+        kept, its name is shown on the author page.
+
+        :param int       author_id:     The id of kept author.
+        :param list[int] duplicate_ids: The ids of duplicate authors.
+        """
+        with transaction.atomic():
+            books = Book.objects.filter(id_author_id__in=duplicate_ids)
+            category_ids = set(books.values_list('id_category_id', flat=True))
+
+            books.update(id_author_id=author_id)
+
+            # The duplicates are removed one by one, so the autocomplete index is updated by the signals.
+            for author in Author.objects.filter(id__in=duplicate_ids):
+                author.delete()
+
+            index_author_books(Author.objects.get(id=author_id))
+
+            for category_id in category_ids:
+                invalidate_category(category_id)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from ...comments import invalidate_first_page
+from ...models import Book, BookComment
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Rebuilds the precomputed comments counters of books from the comments.'
+
+    def handle(self, *args, **options):
+        print('Start processing...')
+
+        counts = BookComment.objects.values('id_book').annotate(count=Count('id')).order_by()
+
+        with transaction.atomic():
+            Book.objects.update(comments_count=0)
+
+            for item in counts:
+                Book.objects.filter(id=item['id_book']).update(comments_count=item['count'])
+
+        for book_id in Book.objects.values_list('id', flat=True):
+            invalidate_first_page(book_id)
+
+        print('Comments counters rebuilt for books: ' + str(len(counts)))
@@ -0,0 +1,29 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from ...category_cache import invalidate_all_categories
+from ...models import Book, BookRating
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Rebuilds the precomputed rating counters of books from the stored ratings.'
+
+    def handle(self, *args, **options):
+        print('Start processing...')
+
+        histograms = defaultdict(dict)
+        for item in BookRating.objects.values('id_book', 'rating').annotate(count=Count('id')).order_by():
+            histograms[item['id_book']][item['rating']] = item['count']
+
+        with transaction.atomic():
+            Book.objects.update(**Book.generate_rating_counters({}))
+
+            for book_id, histogram in histograms.items():
+                Book.objects.filter(id=book_id).update(**Book.generate_rating_counters(histogram))
+
+        invalidate_all_categories()
+        print('Rating counters rebuilt for books: ' + str(len(histograms)))
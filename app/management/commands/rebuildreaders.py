@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from ...category_cache import invalidate_all_categories
+from ...models import AddedBook, Book
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Rebuilds the precomputed readers counters of books from the added books.'
+
+    def handle(self, *args, **options):
+        print('Start processing...')
+
+        counts = AddedBook.objects.values('id_book').annotate(count=Count('id')).order_by()
+
+        with transaction.atomic():
+            Book.objects.update(readers_count=0)
+
+            for item in counts:
+                Book.objects.filter(id=item['id_book']).update(readers_count=item['count'])
+
+        invalidate_all_categories()
+        print('Readers counters rebuilt for books: ' + str(len(counts)))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import Book, SearchToken
+from ...search import generate_suffixes
+
+BATCH_SIZE = 1000
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Rebuilds the search index of books and authors.'
+
+    def handle(self, *args, **options):
+        print('Start processing...')
+
+        with transaction.atomic():
+            SearchToken.objects.all().delete()
+
+            tokens = []
+            for number, book in enumerate(Book.objects.select_related('id_author').iterator(), 1):
+                tokens += [SearchToken(suffix=suffix, id_book=book) for suffix in generate_suffixes(book)]
+
+                if len(tokens) >= BATCH_SIZE:
+                    SearchToken.objects.bulk_create(tokens)
+                    tokens = []
+
+                if number % BATCH_SIZE == 0:
+                    print('Processed books: ' + str(number))
+
+            SearchToken.objects.bulk_create(tokens)
+
+        print('Search index rebuilt, tokens count: ' + str(SearchToken.objects.count()))
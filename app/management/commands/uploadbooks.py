@@ -1,103 +1,252 @@
-import os
 import json
+import os
 import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
+from django.core.exceptions import ValidationError
 from django.core.files import File
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
 from .helpers.categories_mapper import mapper
 from ...models import Book, Author, Category, Language, TheUser
-
-from app.utils import resize_image
+from ...storage import get_file_hash
+from ...validators import validate_image, validate_pdf
 
 MAX_AUTHOR_NAME_LENGTH = 96
 MAX_BOOK_NAME_LENGTH = 146
 MAX_DESCRIPTION_LENGTH = 996
 
-BOOK_COVER_HEIGHT = 350
+MANIFEST_NAME = '.uploadbooks-manifest'
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def prepare_meta(data):
+    if len(data['author']) > MAX_AUTHOR_NAME_LENGTH:
+        data['author'] = data['author'][:MAX_AUTHOR_NAME_LENGTH - 1] + '...'
+
+    if len(data['name']) > MAX_BOOK_NAME_LENGTH:
+        data['name'] = data['name'][:MAX_BOOK_NAME_LENGTH - 1] + '...'
+
+    if len(data['description']) > MAX_DESCRIPTION_LENGTH:
+        data['description'] = data['description'][:MAX_DESCRIPTION_LENGTH - 1] + '...'
+
+    data['category'] = mapper[data['category']]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def prepare_book(folder, dry_run=False):
+    """
+    Reads the meta of the book, validates and copies the book file and the cover to the storages. Runs in the worker
+    processes, so it does not touch the database.
+
+    :param str  folder:  The path to the folder of the book.
+    :param bool dry_run: Whether the files are only validated and not copied.
+
+    :return dict: The folder with the meta and the names of stored files, or with the error.
+    """
+    try:
+        with open(os.path.join(folder, 'meta.json')) as json_file:
+            data = json.loads(json_file.read())
+
+        prepare_meta(data)
+
+        file_names = sorted(os.listdir(folder))
+        book_path = next(os.path.join(folder, name) for name in file_names if name.endswith('.pdf'))
+        cover_path = next((os.path.join(folder, name) for name in file_names if name.endswith('.png')), None)
+
+        with open(book_path, 'rb') as book_file:
+            book_file = File(book_file)
+            validate_pdf(book_file)
+            book_file.sha256 = get_file_hash(book_file)
+
+            storage = Book._meta.get_field('book_file').storage
+            book_name = 'book_file/{}'.format(os.path.basename(book_path))
+
+            if dry_run:
+                data['book_file'] = storage.get_content_name(book_name, book_file.sha256)
+            else:
+                data['book_file'] = storage.save(book_name, book_file)
+
+        data['photo'] = None
+
+        if cover_path:
+            with open(cover_path, 'rb') as cover_file:
+                validate_image(cover_file)
+
+                if not dry_run:
+                    # The cover is resized to the variants by the images worker after the book is created.
+                    storage = Book._meta.get_field('photo').storage
+                    data['photo'] = storage.save('book_cover/{}'.format(os.path.basename(cover_path)), cover_file)
+
+    except (OSError, ValueError, KeyError, StopIteration, ValidationError) as error:
+        return {'folder': folder, 'error': '{}: {}'.format(type(error).__name__, error)}
+
+    return {'folder': folder, 'data': data}
 
 
 # ----------------------------------------------------------------------------------------------------------------------
 class Command(BaseCommand):
-    help = 'Uploads the books to the server.'
+    help = 'Uploads the books to the server. The interrupted upload continues from the last uploaded batch.'
 
     def add_arguments(self, parser):
         parser.add_argument('--path',
                             type=str,
                             help='The path to the folder from where to get data')
-
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='The count of processes which copy and validate the files')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='The count of books created in one transaction')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate the books without copying the files and changing the database')
+
+    # ------------------------------------------------------------------------------------------------------------------
     def handle(self, *args, **options):
         print('Start processing...')
-        current_iteration = 1
 
-        for root, dirs, files in os.walk(options['path']):
-            if current_iteration > 1:
-                print('Folder "{}" processing'.format(root))
-                
-                with open('{}/{}'.format(root, 'meta.json')) as json_file:
-                    data = json.loads(json_file.read())
+        self.path = options['path']
+        self.dry_run = options['dry_run']
+        self.manifest_path = os.path.join(self.path, MANIFEST_NAME)
+
+        uploaded_folders = self.read_manifest()
+        folders = [root for root, dirs, files in sorted(os.walk(self.path))
+                   if root != self.path and 'meta.json' in files
+                   and os.path.relpath(root, self.path) not in uploaded_folders]
+
+        print('{} books to upload, {} books uploaded before.'.format(len(folders), len(uploaded_folders)))
+
+        self.language = Language.objects.get(id=1)
+        self.the_user = TheUser.objects.get(id=1)
+        self.categories = {category.category_name: category for category in Category.objects.all()}
+        self.authors = {}
+
+        start_time = time.monotonic()
+        uploaded_count = 0
+        failed_count = 0
+
+        prepare = partial(prepare_book, dry_run=self.dry_run)
+
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            results = executor.map(prepare, folders, chunksize=max(options['batch_size'] // 10, 1))
+            batch = []
+
+            for number, result in enumerate(results, 1):
+                if 'error' in result:
+                    print('Folder "{}" is not uploaded: {}'.format(result['folder'], result['error']))
+                    failed_count += 1
+                else:
+                    batch.append(result)
+
+                if len(batch) >= options['batch_size'] or number == len(folders):
+                    uploaded_count += self.upload_batch(batch)
+                    batch = []
+
+                    elapsed = time.monotonic() - start_time
+                    print('Processed books: {}, {:.1f} books/sec'.format(number, number / elapsed))
+
+        elapsed = time.monotonic() - start_time
+        print('{} {} books, {} failed in {:.1f} sec ({:.1f} books/sec).'.format(
+            'Validated' if self.dry_run else 'Uploaded', uploaded_count, failed_count, elapsed,
+            uploaded_count / elapsed if elapsed else 0))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def read_manifest(self):
+        """
+        Returns the folders uploaded by the previous runs, the manifest has one JSON line per uploaded book.
+
+        :return set[str]: The paths of folders relative to the source path.
+        """
+        if not os.path.exists(self.manifest_path):
+            return set()
+
+        with open(self.manifest_path) as manifest_file:
+            return {json.loads(line)['folder'] for line in manifest_file if line.strip()}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def write_manifest(self, entries):
+        with open(self.manifest_path, 'a') as manifest_file:
+            for entry in entries:
+                manifest_file.write(json.dumps(entry) + '\n')
+
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def upload_batch(self, batch):
+        """
+        Creates the books of the batch in one transaction and records them to the manifest before removing their
+        folders. The books created by the run which crashed before writing the manifest are found by their file and
+        name, so they are not created again.
+
+        :param list[dict] batch: The prepared books.
+
+        :return int: The count of uploaded books.
+        """
+        entries = []
 
-                    book_path = None
-                    book_cover = None
-                    for filename in files:
-                        if filename.endswith('.pdf'):
-                            book_path = '{}/{}'.format(root, filename)
-                        if filename.endswith('.png'):
-                            book_cover = '{}/{}'.format(root, filename)
+        existing_books = self.get_existing_books(batch)
 
-                    self.prepare_meta(data)
+        with transaction.atomic():
+            authors = self.get_authors({item['data']['author'] for item in batch})
 
-                    with transaction.atomic():
-                        author = self.get_author(data)
-                        category = self.get_category(data)
+            for item in batch:
+                data = item['data']
+                category = self.categories.get(data['category'])
 
-                        book = Book.objects.create(
-                            book_name=data['name'],
-                            id_author=author,
-                            id_category=category,
-                            description=data['description'],
-                            language=Language.objects.get(id=1),
-                            who_added=TheUser.objects.get(id=1)
-                        )
-                        book.book_file.save(os.path.basename(book_path), File(open(book_path, 'rb')))
-                        if book_cover:
-                            book.photo.save(os.path.basename(book_cover), File(open(book_cover, 'rb')))
-                            resize_image(book.photo.path, BOOK_COVER_HEIGHT)
+                if category is None:
+                    print('Folder "{}" is not uploaded: no category "{}"'.format(item['folder'], data['category']))
+                    continue
 
-                        book.save()
+                book_id = existing_books.get((data['book_file'], data['name']))
 
-                        print('Book with ID: "{}" name: "{}" uploaded successfully!'.format(
-                            book.id, book.book_name))
+                if book_id is None and not self.dry_run:
+                    book_id = Book.objects.create(
+                        book_name=data['name'],
+                        id_author=authors[data['author']],
+                        id_category=category,
+                        description=data['description'],
+                        language=self.language,
+                        book_file=data['book_file'],
+                        photo=data['photo'] or '',
+                        who_added=self.the_user
+                    ).id
 
-                        shutil.rmtree(root)
+                entries.append({'folder': os.path.relpath(item['folder'], self.path), 'book_id': book_id})
 
-            current_iteration += 1
-            print('Processed books: ' + str(current_iteration))
+        if not self.dry_run:
+            self.write_manifest(entries)
 
-    def prepare_meta(self, data):
-        if len(data['author']) > MAX_AUTHOR_NAME_LENGTH:
-            data['author'] = data['author'][:MAX_AUTHOR_NAME_LENGTH - 1] + '...'
+            for entry in entries:
+                shutil.rmtree(os.path.join(self.path, entry['folder']))
 
-        if len(data['name']) > MAX_BOOK_NAME_LENGTH:
-            data['name'] = data['name'][:MAX_BOOK_NAME_LENGTH - 1] + '...'
+        return len(entries)
 
-        if len(data['description']) > MAX_DESCRIPTION_LENGTH:
-            data['description'] = data['description'][:MAX_DESCRIPTION_LENGTH - 1] + '...'
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_existing_books(self, batch):
+        """
+        Returns the books which have the file and the name of the prepared books.
 
-        data['category'] = mapper[data['category']]
+        :param list[dict] batch: The prepared books.
 
-    def get_author(self, data):
-        author = Author.objects.filter(author_name=data['author'])
+        :return dict[tuple[str, str], int]: The ids of books by their file and name.
+        """
+        books = Book.objects.filter(book_file__in=[item['data']['book_file'] for item in batch])
 
-        if not author:
-            author = Author.objects.create(author_name=data['author'])
-        else:
-            author = author[0]
+        return {(book_file, book_name): book_id for book_id, book_file, book_name
+                in books.values_list('id', 'book_file', 'book_name')}
 
-        return author
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_authors(self, names):
+        """
+        Returns the authors by their names. The authors are cached for the whole run, the missing authors are created
+        unless it is the dry run.
 
-    def get_category(self, data):
-        return Category.objects.get(category_name=data['category'])
+        :param set[str] names: The names of authors.
 
+        :return dict[str, app.models.Author]: The authors by their names.
+        """
+        self.authors.update(Author.resolve_authors(names - set(self.authors), create=not self.dry_run))
 
+        return self.authors
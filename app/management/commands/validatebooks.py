@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from ...constants import Queues
+from ...models import Book
+from ...tasks import validate_book_file
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class Command(BaseCommand):
+    help = 'Queues the validation of the book files which were not validated yet.'
+
+    def handle(self, *args, **options):
+        print('Start processing...')
+
+        book_ids = Book.objects.filter(file_status=Book.FILE_PENDING).values_list('id', flat=True)
+
+        for number, book_id in enumerate(book_ids, 1):
+            validate_book_file.apply_async(args=(book_id,), queue=Queues.images)
+
+            if number % 1000 == 0:
+                print('{} books queued'.format(number))
+
+        print('Validation of {} books queued.'.format(len(book_ids)))
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import Signal
+
+logger = logging.getLogger('changes')
+
+view_queries_recorded = Signal(providing_args=['view_name', 'query_count', 'db_time', 'wall_time'])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class QueryStats:
+    """
+    The count and the total time of SQL queries of one request.
+    """
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def measure(self, method, *args):
+        start_time = time.time()
+
+        try:
+            return method(*args)
+        finally:
+            self.count += 1
+            self.time += time.time() - start_time
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class QueryCountCursor:
+    """
+    The cursor wrapper which only counts the queries and sums their time, the SQL strings are not stored.
+    """
+    def __init__(self, cursor, stats):
+        self.cursor = cursor
+        self.stats = stats
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.cursor.__exit__(exc_type, exc_value, traceback)
+
+    def execute(self, sql, params=None):
+        return self.stats.measure(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self.stats.measure(self.cursor.executemany, sql, param_list)
+
+    def callproc(self, procname, params=None):
+        return self.stats.measure(self.cursor.callproc, procname, params)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class QueryCountMiddleware:
+    """
+    Middleware which records the count of SQL queries, the total time of queries and the wall time of each request.
+    The stats are logged by the resolved view name, added as response headers in DEBUG mode and sent by
+    'view_queries_recorded' signal, which is used by the query budgets of tests.
+
+    The cursors of the connection of the current thread are wrapped while the request runs, so the SQL strings are
+    not kept and the query log of the connection is not touched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start_time = time.time()
+        stats = QueryStats()
+        response = self.count_queries(request, stats)
+
+        wall_time = (time.time() - start_time) * 1000
+        db_time = stats.time * 1000
+        query_count = stats.count
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+
+        logger.info('view={} method={} status={} queries={} db_time_ms={:.1f} wall_time_ms={:.1f}'
+                    .format(view_name, request.method, response.status_code, query_count, db_time, wall_time))
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = query_count
+            response['X-Query-Time-Ms'] = '{:.1f}'.format(db_time)
+            response['X-Wall-Time-Ms'] = '{:.1f}'.format(wall_time)
+
+        view_queries_recorded.send(sender=self.__class__, view_name=view_name, query_count=query_count,
+                                   db_time=db_time, wall_time=wall_time)
+
+        return response
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def count_queries(self, request, stats):
+        """
+        Returns the response of the request, the queries made while it's processed are counted to the stats.
+        The connections are local to the thread, so only the queries of this request are counted.
+        """
+        db = connections[DEFAULT_DB_ALIAS]
+        wrapped_cursor = db.__dict__.get('cursor')
+        make_cursor = db.cursor
+
+        db.cursor = lambda: QueryCountCursor(make_cursor(), stats)
+
+        try:
+            return self.get_response(request)
+        finally:
+            if wrapped_cursor is None:
+                del db.cursor
+            else:
+                db.cursor = wrapped_cursor
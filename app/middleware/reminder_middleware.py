@@ -3,64 +3,101 @@
 import random
 
 from django.conf import settings
-
-from ..models import TheUser
+from django.core.cache import cache
 
 SHOW_REMINDER_COUNT = 150
 
+REMINDER_COOKIE = 'reminder_counter'
+REMINDER_COOKIE_SALT = 'app.middleware.reminder_middleware'
+REMINDER_COOKIE_AGE = 60 * 60 * 24 * 30
+WEB_REMINDERS_TIMEOUT = 60 * 60 * 24
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_web_reminders_key(user_id):
+    return 'web_reminders:{}'.format(user_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_web_reminders(request):
+    """
+    Returns the parsed web reminders of the request user, they are kept in the shared cache until the user is changed.
+
+    :param django.http.HttpRequest request: The request of logged user.
+
+    :return dict[str, bool]: The statuses of reminders.
+    """
+    web_reminders = cache.get(get_web_reminders_key(request.user.id))
+
+    if web_reminders is None:
+        web_reminders = request.the_user.get_web_reminders()
+        cache.set(get_web_reminders_key(request.user.id), web_reminders, WEB_REMINDERS_TIMEOUT)
+
+    return web_reminders
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def invalidate_web_reminders(user_id):
+    """
+    Removes the cached web reminders of the user.
+
+    :param int user_id: The id of django user.
+    """
+    cache.delete(get_web_reminders_key(user_id))
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class ReminderMiddleware:
     """
     Middleware which handles the reminders behaviour. Adds special info in each request.
     Generates the status data used to raise reminders at the web part.
+
+    The counter of requests is kept in the signed cookie, so the session is not saved on each request.
     """
 
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        if settings.STATIC_URL not in request.path and settings.MEDIA_URL not in request.path:
-            self.set_reminder(request)
-        else:
-            request.session['reminder'] = None
+        request.reminder = None
 
-        return self.get_response(request)
+        if settings.STATIC_URL in request.path or settings.MEDIA_URL in request.path or request.user.is_anonymous:
+            return self.get_response(request)
 
-    def set_reminder(self, request):
+        counter = self.increment_counter(request)
+
+        if counter >= SHOW_REMINDER_COUNT:
+            counter = 0
+            self.select_reminder(request)
+
+        response = self.get_response(request)
+        self.set_counter(response, counter)
+
+        return response
+
+    def increment_counter(self, request):
         """
-        Sets the reminder to request object.
+        Returns the reminder counter raised in each request, the missing or the forged counter starts from zero.
         """
-        if not request.user.is_anonymous:
-            self.increment_counter(request)
+        counter = request.get_signed_cookie(REMINDER_COOKIE, default=None, salt=REMINDER_COOKIE_SALT)
 
-            if request.session['reminder_counter'] >= SHOW_REMINDER_COUNT:
-                request.session['reminder_counter'] = 0
-                self.select_reminder(request)
-            else:
-                request.session['reminder'] = None
+        try:
+            return int(counter) + 1
+        except (TypeError, ValueError):
+            return 0
 
-    def increment_counter(self, request):
+    def set_counter(self, response, counter):
         """
-        Raises the reminder counter in each request.
+        Stores the reminder counter to the signed cookie.
         """
-        if 'reminder_counter' in request.session:
-            request.session['reminder_counter'] += 1
-        else:
-            request.session['reminder_counter'] = 0
+        response.set_signed_cookie(REMINDER_COOKIE, counter, salt=REMINDER_COOKIE_SALT, max_age=REMINDER_COOKIE_AGE,
+                                   secure=settings.SESSION_COOKIE_SECURE, httponly=True)
 
     def select_reminder(self, request):
-        user = TheUser.objects.get(id_user=request.user)
-
-        all_user_reminders = user.get_web_reminders()
+        all_user_reminders = dict(get_web_reminders(request))
 
-        if not all_user_reminders['disabled_all']:
-            all_user_reminders.pop('disabled_all')
+        if not all_user_reminders.pop('disabled_all'):
             possible_reminders = [key for key in all_user_reminders if all_user_reminders[key]]
 
             if possible_reminders:
-                request.session['reminder'] = random.choice(possible_reminders)
-            else:
-                request.session['reminder'] = None
-        else:
-            request.session['reminder'] = None
+                request.reminder = random.choice(possible_reminders)
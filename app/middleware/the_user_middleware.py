@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+from django.utils.functional import SimpleLazyObject
+
+from ..models import TheUser
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_the_user(request):
+    """
+    Returns the '.models.TheUser' instance of the request user. The instance is loaded with the joined user once per
+    request and memoized on the request.
+
+    :param django.http.HttpRequest request: The request.
+
+    :return app.models.TheUser: The user instance, None for anonymous users.
+    """
+    if not hasattr(request, '_cached_the_user'):
+        if request.user.is_anonymous:
+            request._cached_the_user = None
+        else:
+            request._cached_the_user = TheUser.objects.select_related('id_user').get(id_user=request.user)
+
+    return request._cached_the_user
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class TheUserMiddleware:
+    """
+    Middleware which adds the lazy loaded '.models.TheUser' instance of the request user as 'request.the_user'.
+    The views use it instead of loading the user themselves, 'request.the_user' is None for anonymous users.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.the_user = None if request.user.is_anonymous else SimpleLazyObject(lambda: get_the_user(request))
+
+        return self.get_response(request)
@@ -2,92 +2,170 @@
 
 import json
 import logging
+import unicodedata
 from collections import namedtuple
+from functools import lru_cache
 
-from django.db import models
-from django.db.models import Avg, Count, Q
+from django.db import models, transaction, IntegrityError
+from django.db.models import Case, F, Q, Value, When
 from django.contrib.auth.models import User
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.urls import reverse
 from django.utils.html import escape
 
-from .storage import OverwriteStorage
+from .autocomplete import AutocompleteIndex
+from .image_variants import COVER_WIDTHS, AVATAR_WIDTHS, get_image_sources, get_variants
+from .storage import OverwriteStorage, ContentAddressedStorage
 
 logger = logging.getLogger('changes')
 
 
 BookRelatedData = namedtuple('BookRelatedData', ['author', 'category', 'lang', 'user'])
 
+RATING_VALUES = range(1, 11)
+EMPTY_RATING_HISTOGRAM = ','.join('0' for _ in RATING_VALUES)
+
+AUTHOR_KEY_LENGTH = 255
+MAX_CACHED_REMINDERS = 512
+
+authors_index = AutocompleteIndex('authors', lambda: Author.objects.values_list('id', 'author_name'))
+books_index = AutocompleteIndex('books', lambda: Book.objects.filter(private_book=False).values_list('id', 'book_name'))
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class TheUser(models.Model):
     """
     Class for user objects in database.
     """
-    REMINDER_TEMPLATE = json.dumps({
-        "common": {
-            "fb_page": True,
-            "fb_group": True,
-            "twitter": True,
-            "vk": True,
-            "disabled_all": False
-        },
-        "api": {
-            "app_rate": True
-        },
-        "web": {
-            "app_download": True,
-        },
-    })
+    COMMON_REMINDERS = ('fb_page', 'fb_group', 'twitter', 'vk', 'disabled_all')
+    API_REMINDERS = COMMON_REMINDERS + ('app_rate',)
+    WEB_REMINDERS = COMMON_REMINDERS + ('app_download',)
+
+    # The bits of the reminder flags, the new reminders must be appended to keep the meaning of stored flags.
+    REMINDER_BITS = {field: 1 << bit for bit, field in enumerate(COMMON_REMINDERS + ('app_rate', 'app_download'))}
+    DEFAULT_REMINDER_FLAGS = sum(bit for field, bit in REMINDER_BITS.items() if field != 'disabled_all')
 
     id_user = models.OneToOneField(User)
     user_photo = models.ImageField(blank=True, upload_to='user', storage=OverwriteStorage())
-    auth_token = models.CharField(max_length=50, null=True, blank=True)
+    user_photo_variants = models.BooleanField(default=False)
+    auth_token = models.CharField(max_length=50, null=True, blank=True, unique=True)
     subscription = models.BooleanField(default=True)
-    reminder = models.CharField(max_length=256, null=False, default=REMINDER_TEMPLATE)
+    reminder_flags = models.PositiveSmallIntegerField(default=DEFAULT_REMINDER_FLAGS)
+
+    # The reminders in JSON stored before the flags, cleared by the 'convertreminders' command after the conversion.
+    reminder = models.CharField(max_length=256, blank=True, default='')
+
+    # The token which is stored in database, used to invalidate the cached API user of previous token on change.
+    stored_auth_token = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(TheUser, cls).from_db(db, field_names, values)
+
+        if 'auth_token' in field_names:
+            instance.stored_auth_token = instance.auth_token
+
+        return instance
 
     # ------------------------------------------------------------------------------------------------------------------
     def __str__(self):
         return str(self.id_user)
 
     # ------------------------------------------------------------------------------------------------------------------
-    def get_api_reminders(self):
+    def clean(self):
+        if not self.auth_token:
+            self.auth_token = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def avatar(self):
         """
-        Returns the reminders only necessary for API endpoints.
+        Returns the sources of the avatar image for templates.
+        """
+        return get_image_sources(self.user_photo, AVATAR_WIDTHS, self.user_photo_variants, AVATAR_WIDTHS[-1])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_avatar_variants(self):
+        """
+        Returns the URLs of the avatar variants, the list is empty until the variants are generated.
+        """
+        return get_variants(self.user_photo, AVATAR_WIDTHS) if self.user_photo and self.user_photo_variants else []
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    @lru_cache(maxsize=MAX_CACHED_REMINDERS)
+    def decode_reminders(reminder_flags, fields):
+        """
+        Returns the statuses of reminders from the flags. The decoded statuses are memoized by the flags, there are only
+        a few combinations of them.
+
+        :param int        reminder_flags: The reminder flags.
+        :param tuple[str] fields:         The names of reminders.
+
+        :return tuple[tuple[str, bool]]: The names of reminders with their statuses.
         """
-        data = json.loads(self.reminder)
+        return tuple((field, bool(reminder_flags & TheUser.REMINDER_BITS[field])) for field in fields)
 
-        mobile_data = dict(data['common'])
-        mobile_data.update(data['api'])
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def parse_reminder_flags(reminder):
+        """
+        Returns the reminder flags of the reminders stored in JSON, the missing reminders get the default status.
+
+        :param str reminder: The reminders in JSON grouped by 'common', 'api' and 'web' parts.
+
+        :return int: The reminder flags.
+        """
+        try:
+            statuses = {}
+            for group in json.loads(reminder).values():
+                statuses.update(group)
+        except (ValueError, TypeError, AttributeError):
+            return TheUser.DEFAULT_REMINDER_FLAGS
 
-        return mobile_data
+        default_statuses = TheUser.decode_reminders(TheUser.DEFAULT_REMINDER_FLAGS, tuple(TheUser.REMINDER_BITS))
+
+        return sum(TheUser.REMINDER_BITS[field] for field, status in default_statuses if statuses.get(field, status))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_reminder_flags(self):
+        """
+        Returns the reminder flags of the user, the reminders in JSON are used until they are converted or changed.
+        """
+        return self.parse_reminder_flags(self.reminder) if self.reminder else self.reminder_flags
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_api_reminders(self):
+        """
+        Returns the reminders only necessary for API endpoints.
+        """
+        return dict(self.decode_reminders(self.get_reminder_flags(), self.API_REMINDERS))
 
     # ------------------------------------------------------------------------------------------------------------------
     def get_web_reminders(self):
         """
         Returns the reminders only necessary for web part.
         """
-        data = json.loads(self.reminder)
-        
-        web_data = dict(data['common'])
-        web_data.update(data['web'])
-
-        return web_data
+        return dict(self.decode_reminders(self.get_reminder_flags(), self.WEB_REMINDERS))
 
     # ------------------------------------------------------------------------------------------------------------------
     def update_reminder(self, field, value):
         """
-        Updates the reminder status.
+        Updates the reminder status, only the reminder columns are saved. The reminders in JSON are converted to the
+        flags and cleared, so the 'convertreminders' command skips the user. The unknown reminders are skipped.
         """
-        data = json.loads(self.reminder)
+        if field in self.REMINDER_BITS:
+            self.reminder_flags = self.get_reminder_flags()
+            self.reminder = ''
 
-        for key in data:
-            if field in data[key]:
-                data[key][field] = value
+            if value:
+                self.reminder_flags |= self.REMINDER_BITS[field]
+            else:
+                self.reminder_flags &= ~self.REMINDER_BITS[field]
 
-        self.reminder = json.dumps(data)
-        self.save()
+            self.save(update_fields=['reminder_flags', 'reminder'])
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -108,11 +186,88 @@ class Author(models.Model):
     Class for author objects in database.
     """
     author_name = models.CharField(max_length=100)
+    author_key = models.CharField(max_length=AUTHOR_KEY_LENGTH, null=True, unique=True)
 
     # ------------------------------------------------------------------------------------------------------------------
     def __str__(self):
         return self.author_name
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def clean(self):
+        author_key = self.get_author_key(self.author_name)
+
+        if Author.objects.filter(author_key=author_key).exclude(id=self.id).exists():
+            raise ValidationError({'author_name': 'The author with the same name already exists.'})
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def get_author_key(author_name):
+        """
+        Returns the normalized author name which identifies the author: case folded, in Unicode NFKC form, with
+        the whitespaces collapsed to single spaces. The names which differ only in these details are the same author.
+
+        :param str author_name: The name of author.
+
+        :return str: The key of author.
+        """
+        author_key = unicodedata.normalize('NFKC', author_name.casefold())
+
+        return ' '.join(author_key.split())[:AUTHOR_KEY_LENGTH]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def resolve_authors(author_names, create=True):
+        """
+        Returns the authors by their names, the existing authors are selected by one query and the missing authors
+        are inserted by one query.
+
+        :param iterable[str] author_names: The names of authors.
+        :param bool          create:       Whether the missing authors must be created.
+
+        :return dict[str, app.models.Author]: The authors by the given names, without missing authors if they are not
+                                              created.
+        """
+        names = {author_name: Author.get_author_key(author_name) for author_name in author_names}
+        author_keys = set(names.values())
+        selected_authors = list(Author.objects.filter(author_key__in=author_keys))
+        authors = {author.author_key: author for author in selected_authors if author.author_key in author_keys}
+
+        missing_keys = author_keys - set(authors)
+        if missing_keys and len(authors) < len(selected_authors):
+            # The database collation matched some keys to the authors with the different stored keys (e.g. 'rene' for
+            # 'rené' by the case insensitive MySQL collation), they are selected one by one.
+            for author_key in missing_keys:
+                author = Author.objects.filter(author_key=author_key).first()
+                if author:
+                    authors[author_key] = author
+
+        new_names = {}
+        for author_name, author_key in names.items():
+            if author_key not in authors:
+                new_names.setdefault(author_key, author_name)
+
+        if new_names and create:
+            try:
+                with transaction.atomic():
+                    Author.objects.bulk_create([Author(author_name=author_name, author_key=author_key)
+                                                for author_key, author_name in new_names.items()])
+            except IntegrityError:
+                # Some authors were created by the concurrent request, the rest are created one by one.
+                for author_key, author_name in new_names.items():
+                    authors[author_key] = Author.objects.get_or_create(
+                        author_key=author_key, defaults={'author_name': author_name}
+                    )[0]
+            else:
+                # The ids of inserted objects are not returned by MySQL, the bulk insert does not send the signals.
+                for author in Author.objects.filter(author_key__in=new_names):
+                    authors[author.author_key] = author
+                    authors_index.changed(author.id, author.author_name)
+
+                    logger.info("Created new author with name: '{}' and id: '{}'.".format(author.author_name,
+                                                                                         author.id))
+
+        return {author_name: authors[author_key] for author_name, author_key in names.items() if author_key in authors}
+
     # ------------------------------------------------------------------------------------------------------------------
     @staticmethod
     def get_authors_list(author_part, do_escape=False):
@@ -124,8 +279,8 @@ class Author(models.Model):
 
         :return list[str]:
         """
-        authors = Author.objects.filter(author_name__icontains=author_part)[:10].values_list('author_name', flat=True)
-        return [escape(author) for author in authors] if do_escape else list(authors)
+        authors = [author for author_id, author in authors_index.find(author_part)]
+        return [escape(author) for author in authors] if do_escape else authors
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -145,46 +300,179 @@ class Book(models.Model):
     """
     Class for book objects in database.
     """
+    COVER_PENDING = 0
+    COVER_READY = 1
+    COVER_FAILED = 2
+
+    COVER_STATUSES = (
+        (COVER_PENDING, 'Pending'),
+        (COVER_READY, 'Ready'),
+        (COVER_FAILED, 'Failed'),
+    )
+
+    FILE_PENDING = 0
+    FILE_VALID = 1
+    FILE_DAMAGED = 2
+    FILE_INVALID = 3
+
+    FILE_STATUSES = (
+        (FILE_PENDING, 'Pending'),
+        (FILE_VALID, 'Valid'),
+        (FILE_DAMAGED, 'Damaged'),
+        (FILE_INVALID, 'Invalid'),
+    )
+
     book_name = models.CharField(max_length=150)
     id_author = models.ForeignKey(Author)
     id_category = models.ForeignKey(Category)
     description = models.CharField(max_length=1000, blank=True)
     language = models.ForeignKey(Language)
     photo = models.ImageField(blank=True, upload_to='book_cover')
-    book_file = models.FileField(upload_to='book_file')
+    cover_status = models.PositiveSmallIntegerField(choices=COVER_STATUSES, default=COVER_PENDING)
+    book_file = models.FileField(upload_to='book_file', storage=ContentAddressedStorage(), db_index=True)
+    file_status = models.PositiveSmallIntegerField(choices=FILE_STATUSES, default=FILE_PENDING)
     who_added = models.ForeignKey(TheUser)
     upload_date = models.DateTimeField(auto_now=True)
     private_book = models.BooleanField(default=False)
     blocked_book = models.BooleanField(default=False)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_histogram = models.CharField(max_length=100, default=EMPTY_RATING_HISTOGRAM)
+    readers_count = models.PositiveIntegerField(default=0, db_index=True)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    # The category which is stored in database, used to invalidate the cached lists of previous category on change.
+    stored_category_id = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Book, cls).from_db(db, field_names, values)
+
+        if 'id_category_id' in field_names:
+            instance.stored_category_id = instance.id_category_id
+
+        return instance
 
     # ------------------------------------------------------------------------------------------------------------------
     def __str__(self):
         return "{0}, {1}, язык({2})".format(self.book_name, self.id_author, self.language)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def cover(self):
+        """
+        Returns the sources of the cover image for templates, the grids get the thumbnail by default.
+        """
+        return get_image_sources(self.photo, COVER_WIDTHS, self.cover_status == self.COVER_READY, COVER_WIDTHS[1])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_cover_variants(self):
+        """
+        Returns the URLs of the cover variants, the list is empty until the variants are generated.
+        """
+        return get_variants(self.photo, COVER_WIDTHS) if self.photo and self.cover_status == self.COVER_READY else []
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def avg_rating(self):
+        """
+        Returns the average rating of the book or None if the book was not rated yet.
+        """
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_rating_histogram(self):
+        """
+        Returns how many times the book was rated by each rating value.
+
+        :return dict[int, int]: The counts of ratings by rating value.
+        """
+        return dict(zip(RATING_VALUES, map(int, self.rating_histogram.split(','))))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def update_rating_counters(book_id, added_rating=None, removed_rating=None):
+        """
+        Changes the precomputed rating counters of the book after a rating was created, changed or removed.
+        The book row is locked while the counters are changing, so concurrent ratings are not lost.
+
+        :param int      book_id:        The id of rated book.
+        :param int|None added_rating:   The new rating value if rating was created or changed.
+        :param int|None removed_rating: The previous rating value if rating was changed or removed.
+        """
+        with transaction.atomic():
+            book = Book.objects.select_for_update().filter(id=book_id).only('rating_histogram').first()
+
+            if not book:
+                return
+
+            histogram = book.get_rating_histogram()
+
+            if added_rating:
+                histogram[added_rating] += 1
+            if removed_rating:
+                histogram[removed_rating] -= 1
+
+            Book.objects.filter(id=book_id).update(**Book.generate_rating_counters(histogram))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def generate_rating_counters(histogram):
+        """
+        Generates values of the rating counters fields of book.
+
+        :param dict[int, int] histogram: The counts of ratings by rating value.
+
+        :return dict: The values of fields.
+        """
+        return {
+            'rating_sum': sum(rating * count for rating, count in histogram.items()),
+            'rating_count': sum(histogram.values()),
+            'rating_histogram': ','.join(str(histogram.get(rating, 0)) for rating in RATING_VALUES)
+        }
+
     # ------------------------------------------------------------------------------------------------------------------
     @staticmethod
-    def get_related_objects_for_create(user_id, book_form):
+    def update_readers_count(book_id, difference):
+        """
+        Changes the precomputed readers counter of the book by the given difference in one atomic UPDATE.
+
+        :param int book_id:    The id of book which was added or removed.
+        :param int difference: The value added to the counter.
+        """
+        Book.objects.filter(id=book_id).update(readers_count=F('readers_count') + difference)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def update_comments_count(book_id, difference):
+        """
+        Changes the precomputed comments counter of the book by the given difference in one atomic UPDATE.
+
+        :param int book_id:    The id of book which was commented or which comment was removed.
+        :param int difference: The value added to the counter.
+        """
+        Book.objects.filter(id=book_id).update(comments_count=F('comments_count') + difference)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def get_related_objects_for_create(the_user, book_form):
         """
         Selects related objects to book instance when create new book; creates author object if needed.
 
-        :param int user_id: The id of user.
+        :param app.models.TheUser    the_user:  The user who adds the book.
         :param app.forms.AddBookForm book_form: The form with received data.
 
         :return: A dict of objects related to book.
         """
-        try:
-            author = Author.objects.get(author_name__iexact=book_form.cleaned_data['author'])
-        except ObjectDoesNotExist:
-            author = Author.objects.create(author_name=book_form.cleaned_data['author'])
-
-            logger.info("Created new author with name: '{}' and id: '{}'."
-                        .format(author.author_name, author.id))
+        author_name = book_form.cleaned_data['author']
+        author = Author.resolve_authors([author_name])[author_name]
 
         return BookRelatedData(
             author,
             Category.objects.get(category_name=book_form.cleaned_data['category']),
             Language.objects.get(language=book_form.cleaned_data['language']),
-            TheUser.objects.get(id_user=user_id)
+            the_user
         )
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -193,13 +481,8 @@ class Book(models.Model):
         """
         Selects related object for book instance when create a new book; creates author object if needed.
         """
-        try:
-            author = Author.objects.get(author_name__iexact=data.get('author'))
-        except ObjectDoesNotExist:
-            author = Author.objects.create(author_name=data.get('author'))
-
-            logger.info("Created new author with name: '{}' and id: '{}'."
-                        .format(author.author_name, author.id))
+        author_name = data.get('author')
+        author = Author.resolve_authors([author_name])[author_name]
 
         return BookRelatedData(
             author,
@@ -220,12 +503,11 @@ class Book(models.Model):
 
         :return: Related objects.
         """
-        book = Book.objects.get(id=book_id)
-        book_rating = BookRating.objects.filter(id_book=book)
+        book = Book.objects.select_related('id_author', 'id_category', 'language', 'who_added__id_user').get(id=book_id)
 
         try:
             if not user.is_anonymous:
-                added_book = AddedBook.objects.get(id_user=TheUser.objects.get(id_user=user), id_book=book)
+                added_book = AddedBook.objects.get(id_user__id_user=user, id_book=book)
             else:
                 the_user = TheUser.objects.get(auth_token=user_key)
                 added_book = AddedBook.objects.get(id_user=the_user, id_book=book)
@@ -233,13 +515,12 @@ class Book(models.Model):
         except ObjectDoesNotExist:
             added_book = None
 
-        comments = BookComment.objects.filter(id_book=Book.objects.get(id=book_id)).order_by('-id')
-
         return {'book': book,
-                'avg_book_rating': book_rating.aggregate(Avg('rating')),
-                'book_rating_count': book_rating.count(),
+                'avg_book_rating': book.avg_rating,
+                'book_rating_count': book.rating_count,
+                'readers_count': book.readers_count,
                 'added_book': added_book,
-                'comments': comments}
+                'comments': BookComment.get_book_comments(book.id)}
 
     # ------------------------------------------------------------------------------------------------------------------
     @staticmethod
@@ -252,7 +533,7 @@ class Book(models.Model):
 
         :return list[dict[str, str]]: list of books with data.
         """
-        books = Book.objects.filter(id_category=category).order_by('book_name')
+        books = Book.objects.filter(id_category=category).select_related('id_author').order_by('book_name')
         filtered_books = Book.exclude_private_books(user, books)
 
         return Book.generate_books(filtered_books)
@@ -268,7 +549,7 @@ class Book(models.Model):
 
         :return list[dict[str, str]]: list of books with data.
         """
-        books = Book.objects.filter(id_category=category).order_by('id_author__author_name')
+        books = Book.objects.filter(id_category=category).select_related('id_author').order_by('id_author__author_name')
         filtered_books = Book.exclude_private_books(user, books)
 
         return Book.generate_books(filtered_books)
@@ -277,26 +558,17 @@ class Book(models.Model):
     @staticmethod
     def sort_by_estimation(user, category):
         """
-        Sorts books by average count of estimation of each book. Uses aggregate function.
+        Sorts books by average count of estimation of each book. Uses precomputed rating counters of books.
 
         :param django.contrib.auth.models.User  user:     The request user.
         :param app.models.Category              category: The category.
 
         :return: The list with sorted books.
         """
-        books = []
-        filtered_books = Book.exclude_private_books(user, Book.objects.filter(id_category=category))
-
-        for item in filtered_books:
-            book_rating = BookRating.objects.filter(id_book=item).aggregate(Avg('rating'))
-            book = {
-                'id': item.id,
-                'name': escape(item.book_name),
-                'author': escape(item.id_author.author_name),
-                'url': item.photo.url if item.photo else '',
-                'rating': book_rating['rating__avg']
-            }
-            books.append(book)
+        filtered_books = Book.exclude_private_books(
+            user, Book.objects.filter(id_category=category).select_related('id_author')
+        )
+        books = Book.generate_rated_books(filtered_books)
 
         return sorted(books, key=lambda info: (info['rating'] is not None, info['rating']), reverse=True)
 
@@ -304,51 +576,52 @@ class Book(models.Model):
     @staticmethod
     def sort_by_readable(user, category=None, count=9):
         """
-        Sorts books by most readable criterion. Uses aggregate 'count' function.
+        Sorts books by most readable criterion. Uses precomputed readers counters of books, so the books are fetched
+        by one query; the books which nobody reads are skipped.
 
         :param django.contrib.auth.models.User  user:     The request user.
         :param app.models.Category              category: The category.
-        :param int                              count:    The count of books which must be returned.
+        :param int|None                         count:    The count of books which must be returned, all if None.
 
         :return: The list with sorted books.
         """
-        if category:
-            filtered_books = Book.exclude_private_books(user, Book.objects.filter(id_category=category))
-            added_books = AddedBook.objects.filter(id_book__id_category=category).values('id_book')
-        else:
-            filtered_books = Book.exclude_private_books(user, Book.objects.all())
-            added_books = AddedBook.objects.values('id_book')
+        books = Book.objects.filter(readers_count__gt=0)
 
-        annotations = added_books.annotate(read_count=Count('id_book')).order_by('-read_count')[:count]
+        if category:
+            books = books.filter(id_category=category)
 
-        filtered_books = filtered_books.filter(
-            id__in=[annotation['id_book'] for annotation in annotations]
-        )
+        filtered_books = Book.exclude_private_books(user, books).select_related('id_author')
+        filtered_books = filtered_books.order_by('-readers_count', 'id')[:count]
 
-        sorted_books = []
-        for annotation in annotations:
-            compared_book = filtered_books.filter(id=annotation['id_book'])
+        return Book.generate_readable_books(filtered_books)
 
-            if compared_book:
-                sorted_books.append(filtered_books.get(id=compared_book[0].id))
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def generate_books(filtered_books):
+        """
+        Generates list with books for specific data and special criterion.
 
-        generated_books = [
+        :param list filtered_books: The list of books after fetching them from database.
+        :return list[dict[str, str]]: list of books with data.
+        """
+        books = [
             {
                 'id': item.id,
                 'name': escape(item.book_name),
                 'author': escape(item.id_author.author_name),
-                'url': item.photo.url if item.photo else ''
+                'url': item.cover['src'],
+                'upload_date': item.upload_date.strftime('%d-%m-%Y')
             }
-            for item in sorted_books
+            for item in filtered_books
         ]
 
-        return generated_books
+        return books
 
     # ------------------------------------------------------------------------------------------------------------------
     @staticmethod
-    def generate_books(filtered_books):
+    def generate_rated_books(filtered_books):
         """
-        Generates list with books for specific data and special criterion.
+        Generates list with books data and average rating of each book for sorting by estimation.
 
         :param list filtered_books: The list of books after fetching them from database.
         :return list[dict[str, str]]: list of books with data.
@@ -358,8 +631,8 @@ class Book(models.Model):
                 'id': item.id,
                 'name': escape(item.book_name),
                 'author': escape(item.id_author.author_name),
-                'url': item.photo.url if item.photo else '',
-                'upload_date': item.upload_date.strftime('%d-%m-%Y')
+                'url': item.cover['src'],
+                'rating': item.avg_rating
             }
             for item in filtered_books
         ]
@@ -368,19 +641,24 @@ class Book(models.Model):
 
     # ------------------------------------------------------------------------------------------------------------------
     @staticmethod
-    def fetch_books(search_data):
+    def generate_readable_books(filtered_books):
         """
-        Generates list of books, fetched by different criterion depending on 'search_data' argument.
+        Generates list with books data for most readable books.
 
-        :param str search_data: The string with data by which create search books.
-        :return: The generated list of books.
+        :param list filtered_books: The list of books after fetching them from database.
+        :return list[dict[str, str]]: list of books with data.
         """
-        filtered_books = list(Book.objects.filter(book_name=search_data))
-        filtered_books += list(Book.objects.filter(book_name__icontains=search_data))
-        filtered_books += list(Book.objects.filter(id_author__author_name=search_data))
-        filtered_books += list(Book.objects.filter(id_author__author_name__icontains=search_data))
+        books = [
+            {
+                'id': item.id,
+                'name': escape(item.book_name),
+                'author': escape(item.id_author.author_name),
+                'url': item.cover['src']
+            }
+            for item in filtered_books
+        ]
 
-        return list(set(filtered_books))
+        return books
 
     # ------------------------------------------------------------------------------------------------------------------
     @staticmethod
@@ -392,8 +670,26 @@ class Book(models.Model):
         :return:
         """
         return [{'url': reverse('book', args=[escape(item[0])]), 'name': escape(item[1])} for item in
-                Book.objects.filter(book_name__icontains=book_part,
-                                    private_book=False)[:10].values_list('id', 'book_name')]
+                books_index.find(book_part)]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def get_public_duplicates(file_hash, count=5):
+        """
+        Returns the public books which have the file with the same content.
+
+        :param str file_hash: The SHA-256 of the book file.
+        :param int count:     The max count of returned books.
+
+        :return list[dict[str, str]]: The urls, the names and the authors of books.
+        """
+        book_file_dir = Book._meta.get_field('book_file').upload_to
+        file_name = ContentAddressedStorage.get_content_name(book_file_dir + '/', file_hash)
+        books = (Book.objects.filter(book_file__startswith=file_name, private_book=False, blocked_book=False)
+                 .select_related('id_author').order_by('id')[:count])
+
+        return [{'url': reverse('book', args=[book.id]), 'name': escape(book.book_name),
+                 'author': escape(book.id_author.author_name)} for book in books]
 
     # ------------------------------------------------------------------------------------------------------------------
     @staticmethod
@@ -417,6 +713,27 @@ class Book(models.Model):
         return filtered_books
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+class SearchToken(models.Model):
+    """
+    Class for search index objects in database. Each object is a normalized suffix of a word from the book name
+    or from the name of the book's author, so both prefix and infix lookups are served by the index on 'suffix'.
+    """
+    suffix = models.CharField(max_length=150, db_index=True)
+    id_book = models.ForeignKey(Book)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class BookNeighbour(models.Model):
+    """
+    Class for precomputed similar books in database. Each object is one of the most similar books of the book
+    by the users who added both of them, the objects are rebuilt offline by '.tasks.build_recommendations'.
+    """
+    id_book = models.ForeignKey(Book, related_name='neighbours')
+    id_neighbour = models.ForeignKey(Book, related_name='+')
+    score = models.FloatField()
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 class BookRating(models.Model):
     """
@@ -426,6 +743,17 @@ class BookRating(models.Model):
     id_book = models.ForeignKey(Book)
     rating = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(10)])
 
+    # The rating value which is stored in database, used to update the counters of book when the rating changes.
+    stored_rating = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(BookRating, cls).from_db(db, field_names, values)
+        instance.stored_rating = instance.rating
+
+        return instance
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class BookComment(models.Model):
@@ -437,6 +765,22 @@ class BookComment(models.Model):
     text = models.CharField(max_length=500)
     posted_date = models.DateField(auto_now=True)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def get_book_comments(book_id):
+        """
+        Returns the comments of the book with their authors joined in the same query, only the shown fields are loaded.
+
+        :param int book_id: The id of book.
+
+        :return django.db.models.query.QuerySet: The comments, the newest first.
+        """
+        return (BookComment.objects.filter(id_book_id=book_id)
+                .select_related('id_user__id_user')
+                .only('id', 'text', 'posted_date', 'id_user', 'id_user__user_photo', 'id_user__user_photo_variants',
+                      'id_user__id_user', 'id_user__id_user__username')
+                .order_by('-id'))
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class AddedBook(models.Model):
@@ -461,19 +805,54 @@ class AddedBook(models.Model):
         if user.is_anonymous:
             return []
 
-        return AddedBook.objects.filter(id_user=TheUser.objects.get(id_user=user)).order_by('-last_read')
+        return AddedBook.objects.filter(id_user__id_user=user).order_by('-last_read')
 
     # ------------------------------------------------------------------------------------------------------------------
     @staticmethod
     def get_count_added(book_id):
         """
-        Returns the added count of selected book.
+        Returns the added count of selected book. Uses precomputed readers counter of the book.
 
         :param int book_id: The id of book which we are counting.
 
         :return int: The count of added books
         """
-        return AddedBook.objects.filter(id_book__id=book_id).count()
+        readers_count = Book.objects.filter(id=book_id).values_list('readers_count', flat=True).first()
+
+        return readers_count or 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def update_reading_progress(progress, batch_size=500):
+        """
+        Updates the last pages and the last read dates of many added books, each batch is one UPDATE with CASE.
+
+        :param dict[tuple[int, int], dict] progress:   The 'last_page' and 'last_read' by the id of user and book.
+        :param int                         batch_size: The count of added books updated by one query.
+
+        :return int: The count of updated added books.
+        """
+        items = list(progress.items())
+        updated_count = 0
+
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            conditions = [Q(id_user_id=user_id, id_book_id=book_id) for (user_id, book_id), values in batch]
+
+            query = conditions[0]
+            for condition in conditions[1:]:
+                query |= condition
+
+            updated_count += AddedBook.objects.filter(query).update(
+                last_page=Case(*[When(condition, then=Value(values['last_page']))
+                                 for condition, (pair, values) in zip(conditions, batch)],
+                               output_field=models.PositiveIntegerField()),
+                last_read=Case(*[When(condition, then=Value(values['last_read']))
+                                 for condition, (pair, values) in zip(conditions, batch)],
+                               output_field=models.DateTimeField())
+            )
+
+        return updated_count
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -486,6 +865,9 @@ class Post(models.Model):
     posted_date = models.DateField(auto_now=True)
     text = models.TextField()
 
+    # The id of the last subscribed user who got the post, the dispatch continues after it.
+    dispatched_user_id = models.PositiveIntegerField(default=0)
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class SupportMessage(models.Model):
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+TIEBREAKER_FIELD = 'id'
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class InvalidCursor(ValueError):
+    """
+    Raised when the received cursor is malformed or was generated for another ordering.
+    """
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class CursorPage:
+    """
+    The page of objects fetched after a cursor.
+    """
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def encode_cursor(values):
+    """
+    Packs the values of the ordering fields of the last object on a page to the opaque cursor string.
+
+    :param list values: The values of the ordering fields.
+
+    :return str: The cursor which is safe to use in urls.
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def decode_cursor(cursor):
+    """
+    Unpacks the values of the ordering fields from the cursor string.
+
+    :param str cursor: The cursor received from the client.
+
+    :return list: The values of the ordering fields.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursor('The cursor is malformed.')
+
+    if not isinstance(values, list):
+        raise InvalidCursor('The cursor is malformed.')
+
+    return values
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_ordering(ordering):
+    """
+    Appends the unique tiebreaker field to the ordering, so each object has the unique position.
+
+    :param tuple[str] ordering: The ordering fields, the descending fields are prefixed with '-'.
+
+    :return tuple[str]: The ordering fields with tiebreaker.
+    """
+    if TIEBREAKER_FIELD in (field.lstrip('-') for field in ordering):
+        return tuple(ordering)
+
+    return tuple(ordering) + (TIEBREAKER_FIELD,)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_field_value(obj, field):
+    """
+    Returns the value of the ordering field of the object, following the related objects if needed.
+
+    :param django.db.models.Model obj:   The object.
+    :param str                    field: The ordering field, e.g. 'id_author__author_name'.
+
+    :return: The value of the field.
+    """
+    for attribute in field.lstrip('-').split('__'):
+        obj = getattr(obj, attribute)
+
+    return obj
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def filter_after(queryset, ordering, values):
+    """
+    Filters the objects which go after the given position in the ordering.
+    For ordering (a, b, id) generates: a > x OR (a = x AND b > y) OR (a = x AND b = y AND id > z).
+
+    :param django.db.models.query.QuerySet queryset: The objects.
+    :param tuple[str]                      ordering: The ordering fields with tiebreaker.
+    :param list                            values:   The values of the ordering fields at the position.
+
+    :return django.db.models.query.QuerySet: The filtered objects.
+    """
+    if len(values) != len(ordering):
+        raise InvalidCursor('The cursor does not match the ordering.')
+
+    condition = Q()
+    equal_fields = {}
+
+    for field, value in zip(ordering, values):
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        field = field.lstrip('-')
+
+        condition |= Q(**dict(equal_fields, **{'{}__{}'.format(field, lookup): value}))
+        equal_fields[field] = value
+
+    try:
+        return queryset.filter(condition)
+    except (ValueError, TypeError):
+        raise InvalidCursor('The cursor does not match the ordering.')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def paginate_by_cursor(queryset, ordering, cursor, per_page):
+    """
+    Returns the page of objects which go after the cursor. Uses the seek method: 'WHERE key > cursor LIMIT n'
+    instead of OFFSET, so the deep pages are fetched as fast as the first one and no COUNT query is needed.
+
+    :param django.db.models.query.QuerySet queryset: The objects to paginate.
+    :param tuple[str]                      ordering: The ordering fields, the descending fields are prefixed with '-'.
+    :param str                             cursor:   The cursor of previous page or empty string for the first page.
+    :param int                             per_page: The count of objects on the page.
+
+    :return CursorPage: The page.
+    """
+    ordering = get_ordering(ordering)
+    queryset = queryset.order_by(*ordering)
+
+    if cursor:
+        queryset = filter_after(queryset, ordering, decode_cursor(cursor))
+
+    objects = list(queryset[:per_page + 1])
+    next_cursor = None
+
+    if len(objects) > per_page:
+        objects = objects[:per_page]
+        next_cursor = encode_cursor([get_field_value(objects[-1], field) for field in ordering])
+
+    return CursorPage(objects, next_cursor)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def paginate_list_by_cursor(items, cursor, per_page):
+    """
+    Returns the page of the list which was sorted in memory. The cursor keeps the position in the list,
+    so the clients use the same cursor flow for all listings.
+
+    :param list   items:    The sorted items.
+    :param str    cursor:   The cursor of previous page or empty string for the first page.
+    :param int    per_page: The count of items on the page.
+
+    :return CursorPage: The page.
+    """
+    position = decode_cursor(cursor) if cursor else [0]
+
+    if len(position) != 1 or not isinstance(position[0], int) or position[0] < 0:
+        raise InvalidCursor('The cursor does not match the ordering.')
+
+    end = position[0] + per_page
+    next_cursor = encode_cursor([end]) if end < len(items) else None
+
+    return CursorPage(items[position[0]:end], next_cursor)
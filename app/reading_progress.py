@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import AddedBook
+
+# The buffered progress outlives many flushes, so it's not lost if the flusher is stopped for a while.
+PROGRESS_TIMEOUT = 60 * 60 * 24 * 7
+# The dirty flag expires soon, so the changes are logged again if the log entry of the flag was lost.
+DIRTY_TIMEOUT = 60 * 10
+# The time the flusher waits for the entry which number was taken but which is not written yet, e.g. by the request
+# running between the increment of sequence and the write of entry. The entry missing longer is treated as evicted.
+MISSING_ENTRY_TIMEOUT = 60
+FLUSH_BATCH_SIZE = 1000
+FLUSH_LOCK_TIMEOUT = 60 * 5
+
+SEQUENCE_KEY = 'reading_progress_sequence'
+FLUSHED_KEY = 'reading_progress_flushed'
+FLUSH_LOCK_KEY = 'reading_progress_flush_lock'
+MISSING_ENTRY_KEY = 'reading_progress_missing_entry'
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_progress_key(user_id, book_id):
+    return 'reading_progress:{}:{}'.format(user_id, book_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_dirty_key(user_id, book_id):
+    return 'reading_progress_dirty:{}:{}'.format(user_id, book_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_entry_key(number):
+    return 'reading_progress_entry:{}'.format(number)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def record_progress(user_id, book_id, last_page):
+    """
+    Stores the page which the user reads to the shared cache instead of the database. The first change after a flush
+    appends the user and the book to the numbered log of changes which the flusher reads, the next changes only
+    replace the stored page.
+
+    :param int user_id:   The id of user.
+    :param int book_id:   The id of book.
+    :param int last_page: The page.
+    """
+    cache.set(get_progress_key(user_id, book_id), {'last_page': last_page, 'last_read': timezone.now()},
+              PROGRESS_TIMEOUT)
+
+    # The flusher deletes the dirty flag before reading the page, so the change after that is logged again.
+    if cache.add(get_dirty_key(user_id, book_id), True, DIRTY_TIMEOUT):
+        cache.add(SEQUENCE_KEY, 0, None)
+        cache.set(get_entry_key(cache.incr(SEQUENCE_KEY)), (user_id, book_id), PROGRESS_TIMEOUT)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_progress(user_id, book_id):
+    """
+    Returns the buffered progress of the user, it's newer than the stored one if it exists.
+
+    :param int user_id: The id of user.
+    :param int book_id: The id of book.
+
+    :return dict|None: The 'last_page' and the 'last_read' date, None if there is no buffered progress.
+    """
+    return cache.get(get_progress_key(user_id, book_id))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def clear_progress(user_id, book_id):
+    """
+    Removes the buffered progress, used after the book was removed from the reading list.
+
+    :param int user_id: The id of user.
+    :param int book_id: The id of book.
+    """
+    cache.delete_many([get_progress_key(user_id, book_id), get_dirty_key(user_id, book_id)])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def is_lost_entry(number):
+    """
+    Returns whether the missing log entry is given up. The entry is waited for a while since it was found missing
+    first time, it may be written by the request which already took its number.
+
+    :param int number: The number of missing entry.
+
+    :return bool: Whether the entry is skipped.
+    """
+    missing_entry = cache.get(MISSING_ENTRY_KEY)
+
+    if missing_entry is None or missing_entry[0] != number:
+        cache.set(MISSING_ENTRY_KEY, (number, time.time()), None)
+        return False
+
+    return time.time() - missing_entry[1] >= MISSING_ENTRY_TIMEOUT
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def flush_progress():
+    """
+    Writes the buffered progress logged since the last flush to the database by batches, each batch is one UPDATE.
+    Only one flusher runs at once. The flush stops before the missing entry of the log and continues from it next
+    time, so the entry written after its number was taken is not skipped.
+
+    :return int: The count of flushed changes.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, True, FLUSH_LOCK_TIMEOUT):
+        return 0
+
+    try:
+        last_number = cache.get(SEQUENCE_KEY) or 0
+        flushed_number = cache.get(FLUSHED_KEY) or 0
+
+        # The sequence was evicted and started again.
+        if flushed_number > last_number:
+            flushed_number = 0
+
+        flushed_count = 0
+
+        while flushed_number < last_number:
+            numbers = range(flushed_number + 1, min(flushed_number + FLUSH_BATCH_SIZE, last_number) + 1)
+            entries = cache.get_many([get_entry_key(number) for number in numbers])
+
+            ready_numbers = []
+            for number in numbers:
+                if get_entry_key(number) not in entries and not is_lost_entry(number):
+                    break
+
+                ready_numbers.append(number)
+
+            if not ready_numbers:
+                break
+
+            pairs = {entries[get_entry_key(number)] for number in ready_numbers if get_entry_key(number) in entries}
+
+            cache.delete_many([get_dirty_key(*pair) for pair in pairs])
+            progress = cache.get_many([get_progress_key(*pair) for pair in pairs])
+
+            flushed_count += AddedBook.update_reading_progress({
+                pair: progress[get_progress_key(*pair)] for pair in pairs if get_progress_key(*pair) in progress
+            })
+
+            flushed_number = ready_numbers[-1]
+            cache.set(FLUSHED_KEY, flushed_number, None)
+            cache.delete_many([get_entry_key(number) for number in ready_numbers])
+
+            if len(ready_numbers) < len(numbers):
+                break
+
+        return flushed_count
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
@@ -1,75 +1,228 @@
 # -*- coding: utf-8 -*-
 
-import random
+from collections import Counter, defaultdict
 
-from .models import Book
+import numpy as np
+from django.db import transaction
+
+from .models import AddedBook, BookNeighbour
+from .sampling import get_eligible_book_ids, sample_books
+from .search import get_books
 
 START_RECOMMEND = 10
 
+NEIGHBOURS_COUNT = 20
+RECENT_BOOKS_COUNT = 10
+MAX_USER_BOOKS = 500
+PAIRS_CHUNK_SIZE = 5000000
+INSERT_CHUNK_SIZE = 1000
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 def get_recommend(user, books, result_count, extra):
     """
-    Returns the recommend books.
+    Returns the recommend books. At first returns the books which are most similar to the recently read books of the
+    user, the random books are added if there are not enough similar books (e.g. for new users).
 
     :param django.contrib.auth.models.User                    user:         The request user.
     :param django.db.models.query.QuerySet[.models.AddedBook] books:        The user's added book list.
     :param int                                                result_count: The count of random generated books.
     :param list[int]                                          extra:        The list of id's of books which must
                                                                             also be removed.
-    :return set[.models.Book]: The recommend books.
+    :return list[.models.Book]: The recommend books.
+    """
+    recommend_books = get_by_neighbours(user, books, result_count, extra)
+
+    if len(recommend_books) < result_count:
+        excluded_books = extra + [book.id for book in recommend_books]
+        recommend_books += list(get_by_added(user, books, result_count - len(recommend_books), excluded_books))
+
+    return recommend_books
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_by_neighbours(user, added_books, result_count, extra):
+    """
+    Returns the books which are most similar to the recently read books of the user. The scores of similar books
+    of all recent books are summed up, so the books similar to several read books go first.
+
+    :param django.contrib.auth.models.User                    user:         The request user.
+    :param django.db.models.query.QuerySet[.models.AddedBook] added_books:  The user's added book list.
+    :param int                                                result_count: The count of books.
+    :param list[int]                                          extra:        The list of id's of books which must
+                                                                            also be removed.
+    :return list[.models.Book]: The similar books ordered by score.
     """
-    added_books = get_by_added(user, books, result_count, extra)
+    if not added_books:
+        return []
 
-    return added_books
+    added_books_ids = list(added_books.values_list('id_book', flat=True))
+    excluded_books = set(added_books_ids + extra)
+
+    neighbours = BookNeighbour.objects.filter(
+        id_book__in=added_books_ids[:RECENT_BOOKS_COUNT], id_neighbour__blocked_book=False
+    ).values_list('id_neighbour', 'score', 'id_neighbour__private_book', 'id_neighbour__who_added__id_user')
+
+    scores = defaultdict(float)
+    for book_id, score, private_book, who_added in neighbours:
+        if book_id not in excluded_books and (not private_book or who_added == user.id):
+            scores[book_id] += score
+
+    return get_books(sorted(scores, key=lambda book_id: (-scores[book_id], book_id))[:result_count])
 
 
 # ----------------------------------------------------------------------------------------------------------------------
 def get_by_added(user, added_books, result_count, extra):
     """
     If added books is present, return random books from the most read by user category.
-    Otherwise return random books from all categories.
+    Otherwise return random books from all categories. The added books are never returned.
 
     :param django.contrib.auth.models.User                    user:         The request user.
     :param django.db.models.query.QuerySet[.models.AddedBook] added_books:  The user's added book list.
     :param int                                                result_count: The count of random generated books.
     :param list[int]                                          extra:        The list of id's of books which must
                                                                             also be removed.
-    :return set[.models.Book]: The random generated books.
+    :return list[.models.Book]: The random generated books.
     """
     if added_books:
-        books_categories = list(added_books.values_list('id_book__id_category', flat=True))
-        added_books_ids = list(added_books.values_list('id_book', flat=True))
-        added_books_ids += extra
+        added_books_data = list(added_books.values_list('id_book', 'id_book__id_category'))
+        extra = extra + [book_id for book_id, category_id in added_books_data]
+
+        most_read_category = Counter(category_id for book_id, category_id in added_books_data).most_common(1)[0][0]
+        category_books = get_eligible_book_ids(user, most_read_category, extra)
+
+        if len(category_books) > START_RECOMMEND:
+            return unique_books(category_books, result_count)
+
+    return unique_books(get_eligible_book_ids(user, excluded=extra), result_count)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def unique_books(book_ids, result_count):
+    """
+    Return unique random books from given list of ids of books. If there are too few books for random
+    recommendations, no books are returned.
+
+    :param list[int]|array.array book_ids:     The given list of ids of books.
+    :param int                   result_count: The count of unique books.
+
+    :return list[.models.Book]: The unique books.
+    """
+    if len(book_ids) <= START_RECOMMEND:
+        return []
+
+    return sample_books(book_ids, result_count)
 
-        most_read_category = max(set(books_categories), key=books_categories.count)
-        category_books = Book.objects.filter(id_category=most_read_category).exclude(id__in=added_books_ids)
 
-        if category_books.count() > START_RECOMMEND:
-            return unique_books(user, category_books, result_count)
-        else:
-            return unique_books(user, Book.objects.all().exclude(id__in=extra), result_count)
+# ----------------------------------------------------------------------------------------------------------------------
+def count_pairs(user_ids, book_indexes, books_count):
+    """
+    Counts how many users added each pair of books. The pairs are encoded to the single integer
+    'first_book_index * books_count + second_book_index' and counted by chunks, so the memory is bounded.
+
+    :param numpy.ndarray user_ids:     The sorted ids of users of unique added books.
+    :param numpy.ndarray book_indexes: The indexes of books of added books.
+    :param int           books_count:  The count of unique books.
+
+    :return tuple[numpy.ndarray, numpy.ndarray]: The unique pair codes and the counts of users of each pair.
+    """
+    boundaries = np.flatnonzero(np.diff(user_ids)) + 1
+
+    pair_codes = np.empty(0, dtype=np.int64)
+    pair_counts = np.empty(0, dtype=np.float64)
+    chunk = []
+    chunk_size = 0
+
+    for user_books in np.split(book_indexes, boundaries):
+        user_books = user_books[:MAX_USER_BOOKS].astype(np.int64)
+
+        if len(user_books) < 2:
+            continue
+
+        first = np.repeat(user_books, len(user_books))
+        second = np.tile(user_books, len(user_books))
+        different = first != second
+
+        chunk.append(first[different] * books_count + second[different])
+        chunk_size += len(chunk[-1])
+
+        if chunk_size >= PAIRS_CHUNK_SIZE:
+            pair_codes, pair_counts = merge_pair_counts(pair_codes, pair_counts, chunk)
+            chunk, chunk_size = [], 0
+
+    return merge_pair_counts(pair_codes, pair_counts, chunk)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def merge_pair_counts(pair_codes, pair_counts, chunk):
+    """
+    Adds the pair codes of the chunk to the counted pairs.
 
-    else:
-        return unique_books(user, Book.objects.all().exclude(id__in=extra), result_count)
+    :param numpy.ndarray       pair_codes:  The unique counted pair codes.
+    :param numpy.ndarray       pair_counts: The counts of pairs.
+    :param list[numpy.ndarray] chunk:       The new pair codes.
+
+    :return tuple[numpy.ndarray, numpy.ndarray]: The unique pair codes and the counts of pairs.
+    """
+    if not chunk:
+        return pair_codes, pair_counts
+
+    new_codes = np.concatenate(chunk)
+    codes, inverse = np.unique(np.concatenate((pair_codes, new_codes)), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate((pair_counts, np.ones(len(new_codes)))))
+
+    return codes, counts
 
 
 # ----------------------------------------------------------------------------------------------------------------------
-def unique_books(user, books, result_count):
+def build_neighbours(user_ids, book_ids, neighbours_count=NEIGHBOURS_COUNT):
     """
-    Return unique random books from given list of books.
+    Builds the item-item similarity of books from the added books and selects the top neighbours of each book.
+    The similarity is the cosine of the vectors of readers: 'common_readers / sqrt(readers_a * readers_b)'.
 
-    :param django.contrib.auth.models.User               user:         The request user.
-    :param django.db.models.query.QuerySet[.models.Book] books:        The given list of books.
-    :param int                                           result_count: The count of unique books.
+    :param numpy.ndarray user_ids:         The ids of users of added books.
+    :param numpy.ndarray book_ids:         The ids of books of added books.
+    :param int           neighbours_count: The max count of neighbours of each book.
 
-    :return set[.models.Book]: The unique books.
+    :return tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: The ids of books, ids of neighbours and scores.
     """
-    books = Book.exclude_private_books(user, books)
-    unique = set()
+    added_books = np.unique(np.stack((user_ids, book_ids), axis=1).astype(np.int64).reshape(-1, 2), axis=0)
+    books, book_indexes = np.unique(added_books[:, 1], return_inverse=True)
+    readers = np.bincount(book_indexes).astype(np.float64)
+
+    pair_codes, pair_counts = count_pairs(added_books[:, 0], book_indexes, len(books))
+    first, second = np.divmod(pair_codes, len(books))
+    scores = pair_counts / np.sqrt(readers[first] * readers[second])
 
-    if len(books) > START_RECOMMEND:
-        while len(unique) < result_count:
-            unique.add(books[random.randint(0, len(books) - 1)])
+    order = np.lexsort((second, -scores, first))
+    first, second, scores = first[order], second[order], scores[order]
 
-    return unique
+    ranks = np.arange(len(first)) - np.searchsorted(first, first, side='left')
+    top = ranks < neighbours_count
+
+    return books[first[top]], books[second[top]], scores[top]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def rebuild_neighbours():
+    """
+    Rebuilds the precomputed similar books of all books from the added books.
+
+    :return int: The count of stored neighbours.
+    """
+    added_books = np.array(AddedBook.objects.values_list('id_user', 'id_book'), dtype=np.int64).reshape(-1, 2)
+    book_ids, neighbour_ids, scores = build_neighbours(added_books[:, 0], added_books[:, 1])
+
+    with transaction.atomic():
+        BookNeighbour.objects.all().delete()
+
+        # The chunks are inserted without explicit batch size, so the database backend splits them further if it
+        # limits the size of a query, e.g. SQLite.
+        for start in range(0, len(book_ids), INSERT_CHUNK_SIZE):
+            chunk = slice(start, start + INSERT_CHUNK_SIZE)
+            BookNeighbour.objects.bulk_create(
+                BookNeighbour(id_book_id=int(book_id), id_neighbour_id=int(neighbour_id), score=float(score))
+                for book_id, neighbour_id, score in zip(book_ids[chunk], neighbour_ids[chunk], scores[chunk])
+            )
+
+    return len(book_ids)
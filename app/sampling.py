@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import random
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .category_cache import CATEGORY_BOOKS_TIMEOUT, get_category_version
+from .models import Book, Category
+from .search import get_books
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_book_ids_key(category_id, version):
+    return 'category_book_ids:{}:{}'.format(category_id, version)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_public_book_ids(category_ids):
+    """
+    Returns the compact arrays of ids of public not blocked books of the categories from the shared cache.
+    The arrays use the versions of cached data of categories, so they are refreshed after any change of the category
+    books. The missing arrays are generated by one query.
+
+    :param list[int] category_ids: The ids of categories.
+
+    :return dict[int, array.array]: The arrays of ids of books by category id.
+    """
+    keys = {category_id: get_book_ids_key(category_id, get_category_version(category_id))
+            for category_id in category_ids}
+    cached = cache.get_many(keys.values())
+
+    book_ids = {category_id: cached[key] for category_id, key in keys.items() if key in cached}
+    missing = [category_id for category_id in category_ids if category_id not in book_ids]
+
+    if missing:
+        for category_id in missing:
+            book_ids[category_id] = array('l')
+
+        books = Book.objects.filter(id_category__in=missing, private_book=False, blocked_book=False)
+
+        for book_id, category_id in books.order_by('id').values_list('id', 'id_category'):
+            book_ids[category_id].append(book_id)
+
+        cache.set_many({keys[category_id]: book_ids[category_id] for category_id in missing}, CATEGORY_BOOKS_TIMEOUT)
+
+    return book_ids
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_all_public_book_ids():
+    """
+    Returns the compact sorted array of ids of public not blocked books of all categories from the shared cache.
+    The array is keyed by the versions of all categories, so it is refreshed after any change of books. On miss it is
+    merged from the arrays of categories.
+
+    :return array.array: The ids of books.
+    """
+    category_ids = list(Category.objects.order_by('id').values_list('id', flat=True))
+    versions = ':'.join(get_category_version(category_id) for category_id in category_ids)
+    key = 'all_book_ids:{}'.format(hashlib.md5(versions.encode()).hexdigest())
+
+    book_ids = cache.get(key)
+
+    if book_ids is None:
+        book_ids = array('l', sorted(book_id for ids in get_public_book_ids(category_ids).values() for book_id in ids))
+        cache.set(key, book_ids, CATEGORY_BOOKS_TIMEOUT)
+
+    return book_ids
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_eligible_book_ids(user, category_id=None, excluded=()):
+    """
+    Returns the ids of books which can be recommended to the user: public not blocked books and the user's own
+    private books of the category (of all categories if the category is not passed). The cached array of public ids
+    is copied and the excluded ids are found in it by the binary search, so the ids are not iterated one by one.
+
+    :param django.contrib.auth.models.User user:        The request user.
+    :param int                             category_id: The id of category.
+    :param list[int|str]                   excluded:    The ids of books which must be removed.
+
+    :return array.array: The ids of books.
+    """
+    if category_id:
+        book_ids = array('l', get_public_book_ids([category_id])[category_id])
+    else:
+        book_ids = array('l', get_all_public_book_ids())
+
+    # The ids taken from the URL are strings.
+    excluded = {int(book_id) for book_id in excluded}
+
+    for book_id in excluded:
+        index = bisect_left(book_ids, book_id)
+
+        if index < len(book_ids) and book_ids[index] == book_id:
+            del book_ids[index]
+
+    if not user.is_anonymous:
+        private_books = Book.objects.filter(private_book=True, blocked_book=False, who_added__id_user=user)
+
+        if category_id:
+            private_books = private_books.filter(id_category=category_id)
+
+        book_ids.extend(book_id for book_id in private_books.values_list('id', flat=True) if book_id not in excluded)
+
+    return book_ids
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def sample_books(book_ids, result_count):
+    """
+    Returns the random unique books with given ids. If there are not more ids than needed all of them are returned
+    in the order of ids, so the result is deterministic.
+
+    :param list[int]|array.array book_ids:     The ids of books to sample from.
+    :param int                   result_count: The count of books.
+
+    :return list[.models.Book]: The books.
+    """
+    if len(book_ids) > result_count:
+        book_ids = [book_ids[index] for index in random.sample(range(len(book_ids)), result_count)]
+    else:
+        book_ids = sorted(book_ids)
+
+    return get_books(book_ids)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+import re
+import unicodedata
+
+from django.db.models import Min, Q
+from django.db.models.functions import Length
+
+from .models import Book, SearchToken
+
+MAX_SUFFIX_LENGTH = 150
+MAX_CANDIDATES = 1000
+
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_SUBSTRING = 2
+
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def normalize(text):
+    """
+    Brings the text to the form used in the search index: case folded, without diacritic marks (which also maps
+    'й' to 'и' and 'ё' to 'е'), with the punctuation replaced by single spaces.
+
+    :param str text: The text to normalize.
+
+    :return str: The normalized text.
+    """
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+
+    return ' '.join(WORD_PATTERN.findall(text))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_words(text):
+    """
+    Splits the text to the normalized words.
+
+    :param str text: The text to split.
+
+    :return list[str]: The list of words.
+    """
+    return normalize(text).split()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def generate_suffixes(book):
+    """
+    Generates all unique suffixes of the words of the book name and the author name.
+
+    :param app.models.Book book: The book which is indexed.
+
+    :return set[str]: The suffixes.
+    """
+    suffixes = set()
+
+    for word in get_words(book.book_name) + get_words(book.id_author.author_name):
+        word = word[:MAX_SUFFIX_LENGTH]
+        suffixes.update(word[position:] for position in range(len(word)))
+
+    return suffixes
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def index_book(book):
+    """
+    Replaces the search index entries of the book.
+
+    :param app.models.Book book: The book which must be indexed.
+    """
+    SearchToken.objects.filter(id_book=book).delete()
+    SearchToken.objects.bulk_create([SearchToken(suffix=suffix, id_book=book) for suffix in generate_suffixes(book)])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def index_author_books(author):
+    """
+    Rebuilds the search index entries of all books of the author, used after the author name was changed.
+
+    :param app.models.Author author: The author.
+    """
+    for book in Book.objects.filter(id_author=author).select_related('id_author'):
+        index_book(book)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def rank_match(phrase, search_words):
+    """
+    Ranks how the book name or the author name matches the searched words.
+
+    :param str       phrase:       The normalized book name or author name.
+    :param list[str] search_words: The normalized searched words.
+
+    :return int|None: The rank of match or None if any of searched words is missing.
+    """
+    if phrase == ' '.join(search_words):
+        return RANK_EXACT
+
+    words = phrase.split()
+    rank = RANK_PREFIX
+
+    for search_word in search_words:
+        if any(word.startswith(search_word) for word in words):
+            continue
+        elif any(search_word in word for word in words):
+            rank = RANK_SUBSTRING
+        else:
+            return None
+
+    return rank
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def find_book_ids(user, search_data):
+    """
+    Returns the ids of books which names or author names contain all the searched words, ordered by the rank of
+    match: exact matches first, then matches by the beginning of words and then matches inside the words.
+    Costs one lookup on the search index, which selects at most MAX_CANDIDATES books matched by the longest word,
+    the books where it matches the whole end of word go first.
+
+    :param django.contrib.auth.models.User user:        The request user, private books of other users are skipped.
+    :param str                             search_data: The searched data.
+
+    :return list[int]: The ids of found books.
+    """
+    search_words = get_words(search_data)
+
+    if not search_words:
+        return []
+
+    available_books = Q(id_book__private_book=False)
+    if not user.is_anonymous:
+        available_books |= Q(id_book__who_added__id_user=user)
+
+    book_fields = ('id_book', 'id_book__book_name', 'id_book__id_author__author_name')
+    candidates = (SearchToken.objects
+                  .filter(available_books, suffix__startswith=max(search_words, key=len))
+                  .values(*book_fields)
+                  .annotate(match_length=Min(Length('suffix')))
+                  .order_by('match_length', 'id_book')
+                  .values_list(*book_fields)[:MAX_CANDIDATES])
+
+    found_books = []
+    for book_id, book_name, author_name in candidates:
+        book_name = normalize(book_name)
+        ranks = [rank for rank in (rank_match(book_name, search_words),
+                                   rank_match(normalize(author_name), search_words)) if rank is not None]
+
+        if ranks:
+            found_books.append((min(ranks), book_name, book_id))
+
+    return [book_id for _, _, book_id in sorted(found_books)]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_books(book_ids):
+    """
+    Fetches the books with the given ids keeping the order of ids.
+
+    :param list[int] book_ids: The ids of books.
+
+    :return list[app.models.Book]: The books.
+    """
+    books = Book.objects.filter(id__in=book_ids).select_related('id_author', 'id_category', 'language',
+                                                               'who_added__id_user')
+    books_by_id = {book.id: book for book in books}
+
+    return [books_by_id[book_id] for book_id in book_ids if book_id in books_by_id]
@@ -5,12 +5,19 @@ import uuid
 import random
 
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 
+from .category_cache import invalidate_category, invalidate_book_category
+from .comments import invalidate_first_page, invalidate_user_comments
 from .constants import Queues
-from .models import TheUser, Post, Book
-from .tasks import email_dispatch
+from .image_variants import remove_variants
+from .middleware.reminder_middleware import invalidate_web_reminders
+from .models import TheUser, Post, Book, Author, BookRating, BookComment, AddedBook, authors_index, books_index
+from .reading_progress import clear_progress
+from .search import index_book, index_author_books
+from .tasks import email_dispatch, generate_book_cover, remove_book_file, validate_book_file
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -20,14 +27,24 @@ def create_additional_data(sender, instance=None, created=False, **kwargs):
     Creates '.models.TheUser' instance and auth_token for this instance after creating User instance.
     """
     if created:
-        the_user = TheUser.objects.create(
+        TheUser.objects.create(
             id_user=instance,
             auth_token=uuid.uuid5(
                 uuid.NAMESPACE_DNS,
                 '{}{}{}'.format(instance.username, str(instance.date_joined), random.randint(0, 10000000000))
             )
         )
-        the_user.save()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(pre_save, sender=TheUser)
+def normalize_auth_token(sender, instance=None, **kwargs):
+    """
+    Stores the blank auth_token of '.models.TheUser' instance as NULL, so the unique tokens of many users can be
+    blank and the blank token never authenticates.
+    """
+    if not instance.auth_token:
+        instance.auth_token = None
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -40,17 +57,211 @@ def remove_user_obj(sender, instance=None, **kwargs):
     user.delete()
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=TheUser)
+@receiver(post_delete, sender=TheUser)
+def remove_cached_web_reminders(sender, instance=None, **kwargs):
+    """
+    Removes the cached web reminders after '.models.TheUser' instance was saved or deleted.
+    """
+    invalidate_web_reminders(instance.id_user_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=TheUser)
+def remove_cached_user_comments(sender, instance=None, created=False, update_fields=None, **kwargs):
+    """
+    Removes the cached comments of the user after the avatar of '.models.TheUser' instance was changed.
+    """
+    if not created and (update_fields is None or {'user_photo', 'user_photo_variants'} & set(update_fields)):
+        invalidate_user_comments(instance.id_user_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=User)
+def remove_cached_comments_of_user(sender, instance=None, created=False, update_fields=None, **kwargs):
+    """
+    Removes the cached comments of the user after the username of the django user was changed.
+    """
+    if not created and (update_fields is None or 'username' in update_fields):
+        invalidate_user_comments(instance.id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=Book)
+def update_book_search_index(sender, instance=None, update_fields=None, **kwargs):
+    """
+    Updates the search index entries of '.models.Book' instance after the book name or the author was saved.
+    """
+    if update_fields is None or {'book_name', 'id_author'} & set(update_fields):
+        index_book(instance)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=Book)
+def schedule_book_processing(sender, instance=None, created=False, **kwargs):
+    """
+    Schedules the validation of the book file and the generation of the cover after '.models.Book' instance was
+    created. The tasks are sent after the commit, so the worker finds the book and its file.
+    """
+    if created:
+        book_id = instance.id
+        transaction.on_commit(lambda: validate_book_file.apply_async(args=(book_id,), queue=Queues.images))
+        transaction.on_commit(lambda: generate_book_cover.apply_async(args=(book_id,), queue=Queues.images))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(pre_save, sender=Author)
+def set_author_key(sender, instance=None, **kwargs):
+    """
+    Sets the normalized name of '.models.Author' instance which identifies the author before it is saved.
+    """
+    instance.author_key = Author.get_author_key(instance.author_name)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=Author)
+def update_author_search_index(sender, instance=None, created=False, **kwargs):
+    """
+    Updates the search index entries of the author's books after changing '.models.Author' instance.
+    """
+    if not created:
+        index_author_books(instance)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def update_authors_autocomplete(sender, instance=None, signal=None, **kwargs):
+    """
+    Updates the autocomplete index of authors after '.models.Author' instance was saved or deleted.
+    """
+    authors_index.changed(instance.id, instance.author_name if signal is post_save else None)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def update_books_autocomplete(sender, instance=None, signal=None, update_fields=None, **kwargs):
+    """
+    Updates the autocomplete index of public books after '.models.Book' instance was saved or deleted.
+    """
+    if update_fields is None or {'book_name', 'private_book'} & set(update_fields):
+        public_book = signal is post_save and not instance.private_book
+        books_index.changed(instance.id, instance.book_name if public_book else None)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=BookRating)
+def add_book_rating(sender, instance=None, **kwargs):
+    """
+    Updates the rating counters and invalidates the cached book lists of the category after '.models.BookRating'
+    instance was created or changed.
+    """
+    if instance.rating != instance.stored_rating:
+        Book.update_rating_counters(instance.id_book_id, instance.rating, instance.stored_rating)
+        invalidate_book_category(instance.id_book_id)
+        instance.stored_rating = instance.rating
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_delete, sender=BookRating)
+def remove_book_rating(sender, instance=None, **kwargs):
+    """
+    Updates the rating counters and invalidates the cached book lists of the category after '.models.BookRating'
+    instance was deleted.
+    """
+    Book.update_rating_counters(instance.id_book_id, removed_rating=instance.stored_rating or instance.rating)
+    invalidate_book_category(instance.id_book_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=BookComment)
+def add_book_comment(sender, instance=None, created=False, **kwargs):
+    """
+    Increments the comments counter after creating '.models.BookComment' instance and removes the cached first page
+    of comments of the book after the comment was saved.
+    """
+    if created:
+        Book.update_comments_count(instance.id_book_id, 1)
+
+    invalidate_first_page(instance.id_book_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_delete, sender=BookComment)
+def remove_book_comment(sender, instance=None, **kwargs):
+    """
+    Decrements the comments counter and removes the cached first page of comments of the book after deleting
+    '.models.BookComment' instance.
+    """
+    Book.update_comments_count(instance.id_book_id, -1)
+    invalidate_first_page(instance.id_book_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=AddedBook)
+def add_book_reader(sender, instance=None, created=False, **kwargs):
+    """
+    Increments the readers counter and invalidates the cached book lists of the category after creating
+    '.models.AddedBook' instance.
+    """
+    if created:
+        Book.update_readers_count(instance.id_book_id, 1)
+        invalidate_book_category(instance.id_book_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_delete, sender=AddedBook)
+def remove_book_reader(sender, instance=None, **kwargs):
+    """
+    Decrements the readers counter and invalidates the cached book lists of the category after deleting
+    '.models.AddedBook' instance.
+    """
+    Book.update_readers_count(instance.id_book_id, -1)
+    invalidate_book_category(instance.id_book_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_delete, sender=AddedBook)
+def remove_reading_progress(sender, instance=None, **kwargs):
+    """
+    Removes the buffered reading progress after deleting '.models.AddedBook' instance, so the book added again is
+    opened from the first page.
+    """
+    clear_progress(instance.id_user_id, instance.id_book_id)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book_lists(sender, instance=None, **kwargs):
+    """
+    Invalidates the cached book lists of the category after '.models.Book' instance was saved or deleted.
+    """
+    invalidate_category(instance.id_category_id)
+
+    if instance.stored_category_id not in (None, instance.id_category_id):
+        invalidate_category(instance.stored_category_id)
+
+    instance.stored_category_id = instance.id_category_id
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 @receiver(post_delete, sender=Book)
 def remove_book_media(sender, instance=None, **kwargs):
     """
-    Removes book file and book cover after deleting '.models.Book' object.
+    Removes book file, book cover and its variants after deleting '.models.Book' object. The book file is shared by
+    the books with the same content, so it is removed by the task after the commit with the last of them.
     """
-    if os.path.exists(instance.book_file.path):
-        os.remove(instance.book_file.path)
+    file_name = instance.book_file.name
+    transaction.on_commit(lambda: remove_book_file.apply_async(args=(file_name,), queue=Queues.default))
+
+    if instance.photo:
+        remove_variants(instance.photo)
 
-    if instance.photo and os.path.exists(instance.photo.path):
-        os.remove(instance.photo.path)
+        if os.path.exists(instance.photo.path):
+            os.remove(instance.photo.path)
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -60,4 +271,5 @@ def dispatch_post_emails(sender, instance=None, created=False, **kwargs):
     Sends multiple emails with new project post data to subscribed users.
     """
     if created:
-        email_dispatch.apply_async(args=(instance.heading, instance.text), queue=Queues.default)
+        post_id = instance.id
+        transaction.on_commit(lambda: email_dispatch.apply_async(args=(post_id,), queue=Queues.default))
@@ -92,6 +92,88 @@ function selectedAuthor(name) {
     $("#author-input").val(name.text);
 }
 
+// ---------------------------------------------------------------------------------------------------------------------
+/**
+ * Uploads the book.
+ *
+ * @param {FormData} formData The data of the form with the book file.
+ */
+function uploadBook(formData) {
+    $.ajax({
+        url: $("#add-book-form").attr('action'),
+        type: 'POST',
+        data: formData,
+        async: true,
+        cache: false,
+        contentType: false,
+        processData: false,
+
+        success: function(response) {
+            window.location.href = response;
+        },
+
+        error: function(jqXHR, errorThrown) {
+            alert('Вы попытались загрузить не PDF файл\n' +
+                  'или он поврежден. Попробуйте другой файл.');
+            $("#file-uploading").css("display", "none");
+        }
+    });
+}
+
+// ---------------------------------------------------------------------------------------------------------------------
+/**
+ * Warns the user if the library already has a public book with the same file. The SHA-256 of the file is computed
+ * in the browser, the check is skipped by the browsers without Web Crypto API.
+ *
+ * @param {File}     file     The selected book file.
+ * @param {Function} onUpload The function which uploads the book.
+ */
+function checkDuplicates(file, onUpload) {
+    if (!window.crypto || !window.crypto.subtle || !window.FileReader) {
+        onUpload();
+        return;
+    }
+
+    var reader = new FileReader();
+
+    reader.onload = function() {
+        window.crypto.subtle.digest("SHA-256", reader.result).then(function(digest) {
+            var fileHash = Array.prototype.map.call(new Uint8Array(digest), function(byte) {
+                return ("0" + byte.toString(16)).slice(-2);
+            }).join("");
+
+            $.ajax({
+                url: "find-duplicate-books",
+                type: "GET",
+                data: {file_hash: fileHash},
+
+                success: function(books) {
+                    if (!books.length) {
+                        onUpload();
+                        return;
+                    }
+
+                    var book = books[0];
+                    var message = "Эта книга уже есть в библиотеке: " + $("<div>").html(book["name"]).text() +
+                                  " (" + $("<div>").html(book["author"]).text() + ").\n" +
+                                  "Загрузить ее еще раз? Нажмите \"Отмена\", чтобы перейти к книге.";
+
+                    if (confirm(message)) {
+                        onUpload();
+                    }
+                    else {
+                        window.location.href = book["url"];
+                    }
+                },
+
+                error: onUpload
+            });
+        }, onUpload);
+    };
+    reader.onerror = onUpload;
+    reader.readAsArrayBuffer(file);
+}
+
 // ---------------------------------------------------------------------------------------------------------------------
 /**
  * Specifies the input button, when file is selected.
@@ -124,24 +206,8 @@ $(document).ready(function() {
 
             formData.set('bookfile', file, Date.now() + '.pdf');
 
-            $.ajax({
-                url: $("#add-book-form").attr('action'),
-                type: 'POST',
-                data: formData,
-                async: true,
-                cache: false,
-                contentType: false,
-                processData: false,
-
-                success: function(response) {
-                    window.location.href = response;
-                },
-
-                error: function(jqXHR, errorThrown) {
-                    alert('Вы попытались загрузить не PDF файл\n' +
-                          'или он поврежден. Попробуйте другой файл.');
-                    $("#file-uploading").css("display", "none");
-                }
+            checkDuplicates(file, function() {
+                uploadBook(formData);
             });
         }
 
@@ -226,32 +226,32 @@ function insertBooks(books) {
 /**
  * Loads the books with paging.
  *
- * @param {number} profileId   The user profile identifier.
- * @param {number} currentPage The current page to output identifier.
+ * @param {number} profileId The user profile identifier.
+ * @param {string} cursor    The cursor of the previous page.
  */
-function loadNextBooks(profileId, currentPage) {
+function loadNextBooks(profileId, cursor) {
     $.ajax({
         url: "/profile/" + profileId + "/load-books/",
         type: "GET",
-        data: {'page': currentPage},
+        data: {'cursor': cursor},
 
         success: function result(response) {
             removeNextBookBtn();
             insertBooks(response['books']);
 
             if (response['has_next']) {
-                addNextBookBtn(response['profile_id'], response['next_page']);
+                addNextBookBtn(response['profile_id'], response['next_cursor']);
             }
         }
     });
 }
 
 // ---------------------------------------------------------------------------------------------------------------------
-function addNextBookBtn(profile_id, page) {
+function addNextBookBtn(profile_id, cursor) {
     $('#uploaded-books-area').append(
         '<div id="load-books-area" class="align-center col-sm-12 col-md-12 col-lg-12 margin-top">' +
         '<button class="btn load-books" ' +
-        'onclick="loadNextBooks(' + profile_id + ',' + page + ')">Загрузить еще</button></div>'
+        'onclick="loadNextBooks(' + profile_id + ",'" + cursor + "'" + ')">Загрузить еще</button></div>'
     )
 }
 
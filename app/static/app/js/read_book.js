@@ -269,6 +269,9 @@ function loadPages() {
         var url = $("#book-url").text();
 
         PDFJS.workerSrc = "/static/app/js/third_party/pdf_js/pdf.worker.js";
+        // The file is loaded by ranges, only the parts of the rendered pages are requested.
+        PDFJS.disableAutoFetch = true;
+        PDFJS.disableStream = true;
 
         PDFJS.getDocument(url, null, null, progressCallBack).then(function (pdf) {
             PDF_DOCUMENT = pdf;
@@ -1,92 +1,3 @@
-var BOOK_IMAGE;
-
-// ---------------------------------------------------------------------------------------------------------------------
-/**
- * Fetches image from canvas and set it to image.
- */
-function fetchData() {
-    var canvas = document.getElementById("book-image");
-    BOOK_IMAGE = canvas.toDataURL();
-}
-
-// ---------------------------------------------------------------------------------------------------------------------
-/**
- * Renders the page of the PDF document.
- *
- * @param {Object} pdf        The instance of the pdf document.
- * @param {number} pageNumber The number of a page which we need to render.
- */
-function renderPage(pdf, pageNumber) {
-    pdf.getPage(pageNumber).then(function (page) {
-        var scale = 1.5;
-        var viewPort = page.getViewport(scale);
-
-        var canvas = document.getElementById("book-image");
-        var context = canvas.getContext("2d");
-
-        canvas.height = viewPort.height;
-        canvas.width = viewPort.width;
-
-        var renderContext = {
-            canvasContext: context,
-            viewport: viewPort
-        };
-
-        var task = page.render(renderContext);
-        task.promise.then(function() {
-            fetchData();
-            storeImage();
-        });
-    });
-}
-
-// ---------------------------------------------------------------------------------------------------------------------
-/**
- * Loads the image of a book.
- */
-function loadImage() {
-    var url = $("#book-url").text();
-    PDFJS.workerSrc = "/static/app/js/third_party/pdf_js/pdf.worker.js";
-
-    PDFJS.getDocument(url).then(function (pdf) {
-        renderPage(pdf, 1)
-    });
-}
-
-// ---------------------------------------------------------------------------------------------------------------------
-/**
- * Stores the image of a book to database.
- */
-function storeImage() {
-    $.ajax({
-        url: "store-book-image",
-        type: "POST",
-        data: {
-            id: $("#book-id").val(),
-            image: BOOK_IMAGE,
-            csrfmiddlewaretoken: getCookie("csrftoken")
-        },
-
-        success: function result(json) {
-            $("#loading").css("display", "none");
-            $("#the-book-image").attr("src", BOOK_IMAGE);
-        }
-    });
-}
-
-// ---------------------------------------------------------------------------------------------------------------------
-/**
- * Checks if image of the book is setted on the page. If no, it loads from book, and stores in database with book.
- */
-$(document).ready(function() {
-    var src = $("#the-book-image").attr("src");
-    if (src) {}
-    else {
-        $("#loading").css("display", "block");
-        loadImage();
-    }
-});
-
 // ---------------------------------------------------------------------------------------------------------------------
 /**
  * Sends ajax request for adding book to user's own library; Generates additional HTML code.
@@ -231,16 +142,16 @@ function addMessage(event, id) {
 /**
  * Fetches next page if next page is present.
  *
- * @param {number} currentPage The number of current page.
- * @param {number} bookId      ID of current book.
+ * @param {string} cursor The cursor of the current page.
+ * @param {number} bookId ID of current book.
  */
-function getNextPage(currentPage, bookId) {
+function getNextPage(cursor, bookId) {
     $("#load-comments-area").remove();
 
     $.ajax({
         url: "load-comments",
         type: "POST",
-        data: {page: currentPage,
+        data: {cursor: cursor,
                book_id: bookId,
                csrfmiddlewaretoken: getCookie("csrftoken")},
 
@@ -283,7 +194,7 @@ function generateNextPageHTML(response) {
         $("#all-comments").append(
             '<div id="load-comments-area" align="center">' +
             '<button id="load-comments" class="btn" ' +
-            'onclick="getNextPage(' + response['current_page'] + ', ' + response['book_id'] + ')' +
+            'onclick="getNextPage(\'' + response['next_cursor'] + '\', ' + response['book_id'] + ')' +
             '">Еще комментарии</button>' +
             '</div>')
     }
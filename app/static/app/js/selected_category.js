@@ -28,9 +28,9 @@ function insertBooks(books) {
  *
  * @param {string} sortCriterion The criterion by which we want to do sorting.
  * @param {number} sortCategory  The number of a category.
- * @param {number} pageNum       The number of the page to output.
+ * @param {string} cursor        The cursor of the previous page, empty for the first page.
  */
-function sort(sortCategory, sortCriterion, pageNum) {
+function sort(sortCategory, sortCriterion, cursor) {
     loadDisplay();
     $.ajax({
         url: "sort",
@@ -38,7 +38,7 @@ function sort(sortCategory, sortCriterion, pageNum) {
         data: {
             category: sortCategory,
             criterion: sortCriterion,
-            page: pageNum
+            cursor: cursor
         },
 
         success: function result(response) {
@@ -46,7 +46,7 @@ function sort(sortCategory, sortCriterion, pageNum) {
             insertBooks(response['books']);
 
             if (response['has_next']) {
-                addNextBookSortBtn(response['category'], response['criterion'], response['next_page']);
+                addNextBookSortBtn(response['category'], response['criterion'], response['next_cursor']);
             }
             loadHide();
         }
@@ -102,7 +102,7 @@ function searchBooks(searchCategory, pageNum) {
     else {
         clearBooksArea();
         sortAreaDisplay();
-        sort(searchCategory, "book_name",1);
+        sort(searchCategory, "book_name", "");
     }
 }
 
@@ -117,11 +117,11 @@ function removeNextBookBtn() {
 }
 
 // ---------------------------------------------------------------------------------------------------------------------
-function addNextBookBtn(categoryId, page) {
+function addNextBookBtn(categoryId, cursor) {
     $('.books-area').append(
         '<div id="load-books-area" class="align-center col-sm-12 col-md-12 col-lg-12">' +
         '<button class="btn load-books" ' +
-        'onclick="loadNextBooks(' + categoryId + ',' + page + ')">Загрузить еще</button></div>'
+        'onclick="loadNextBooks(' + categoryId + ",'" + cursor + "'" + ')">Загрузить еще</button></div>'
     )
 }
 
@@ -135,11 +135,11 @@ function addNextBookSearchBtn(categoryId, page) {
 }
 
 // ---------------------------------------------------------------------------------------------------------------------
-function addNextBookSortBtn(categoryId, criterion, page) {
+function addNextBookSortBtn(categoryId, criterion, cursor) {
     $('.books-area').append(
         "<div id='load-books-area' class='align-center col-sm-12 col-md-12 col-lg-12'>" +
         "<button class='btn load-books' " +
-        "onclick='sort(" + categoryId + "," + '"' + criterion + '",' + page + ")'>Загрузить еще</button></div>"
+        "onclick='sort(" + categoryId + "," + '"' + criterion + '","' + cursor + '"' + ")'>Загрузить еще</button></div>"
     )
 }
 
@@ -147,21 +147,21 @@ function addNextBookSortBtn(categoryId, criterion, page) {
 /**
  * Loads the book paging output without filters.
  *
- * @param {number} categoryId  The category identifier.
- * @param {number} currentPage The current page to output identifier.
+ * @param {number} categoryId The category identifier.
+ * @param {string} cursor     The cursor of the previous page.
  */
-function loadNextBooks(categoryId, currentPage) {
+function loadNextBooks(categoryId, cursor) {
     $.ajax({
         url: "/category/" + categoryId + "/load-books/",
         type: "GET",
-        data: {'page': currentPage},
+        data: {'cursor': cursor},
 
         success: function result(response) {
             removeNextBookBtn();
             insertBooks(response['books']);
 
             if (response['has_next']) {
-                addNextBookBtn(response['category_id'], response['next_page']);
+                addNextBookBtn(response['category_id'], response['next_cursor']);
             }
         }
     });
@@ -204,6 +204,6 @@ function returnState(searchCategory) {
         clearBooksArea();
         sortAreaDisplay();
         changeBtnColor($("#default-sort-btn"));
-        sort(searchCategory, "book_name", 1);
+        sort(searchCategory, "book_name", "");
     }
 }
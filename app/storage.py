@@ -1,10 +1,22 @@
 # -*- coding: utf-8 -*-
 
+import fcntl
+import hashlib
 import os
+import tempfile
+import time
+from contextlib import contextmanager
 
 from django.conf import settings
+from django.core.files import File
 from django.core.files.storage import FileSystemStorage
 
+LOCK_FILE_NAME = '.content_lock'
+FILE_MODE = 0o644
+
+# The file saved recently can be used by the object which is not committed yet, so it is not removed for this time.
+SAVED_FILE_GRACE = 60 * 60
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class OverwriteStorage(FileSystemStorage):
@@ -21,3 +33,131 @@ class OverwriteStorage(FileSystemStorage):
             os.remove(os.path.join(settings.MEDIA_ROOT, name))
 
         return name
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_file_hash(content):
+    """
+    Returns the SHA-256 of the file. The hash computed on upload by '.upload_handlers' is used if there is one,
+    otherwise the file is read by chunks.
+
+    :param django.core.files.File content: The file.
+
+    :return str: The hex digest.
+    """
+    if getattr(content, 'sha256', None):
+        return content.sha256
+
+    sha256 = hashlib.sha256()
+
+    for chunk in content.chunks():
+        sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Class for storing the files by the SHA-256 of their content, so the same file uploaded many times is stored once.
+    The files are shared by the objects, the file is removed only with its last object.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def get_content_name(name, file_hash):
+        """
+        Returns the name of the file with the hash in the directory of the name, the extension is kept.
+
+        :param str name:      The name of the uploaded file.
+        :param str file_hash: The hash of the file content.
+
+        :return str: The name of the stored file.
+        """
+        return os.path.join(os.path.dirname(name), file_hash + os.path.splitext(name)[1].lower())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @contextmanager
+    def lock(self):
+        """
+        Holds the lock of the storage shared by all processes, so the file is not removed while it's saved again.
+        """
+        os.makedirs(self.location, exist_ok=True)
+
+        with open(os.path.join(self.location, LOCK_FILE_NAME), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_available_name(self, name, max_length=None):
+        """
+        Returns the content name unchanged, the file with the same name has the same content.
+        """
+        return name
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.get_content_name(name, get_file_hash(content))
+
+        with self.lock():
+            if self.exists(name):
+                # The modification time is refreshed, so the pending removal of the file keeps it.
+                os.utime(self.path(name))
+                return name
+
+            return super(ContentAddressedStorage, self).save(name, content, max_length)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def _save(self, name, content):
+        """
+        Writes the content to the temporary file and renames it, so the file with the content name is always complete.
+        """
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+
+        try:
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    temp_file.write(chunk)
+
+            # The temporary file is readable only by the owner, so it gets the mode of the files saved directly.
+            os.chmod(temp_path, self.file_permissions_mode if self.file_permissions_mode is not None else FILE_MODE)
+
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return name
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def delete_unused(self, name, is_used):
+        """
+        Removes the file if it's not used anymore. The usage is checked under the lock which is held by saving too.
+        The file saved during the grace time is kept, since it can be used by the object which is not committed yet.
+
+        :param str      name:    The name of the file.
+        :param callable is_used: The function which returns whether the file is used.
+
+        :return bool: False if the unused file is kept because it was saved recently.
+        """
+        with self.lock():
+            if not self.exists(name) or is_used():
+                return True
+
+            if time.time() - os.path.getmtime(self.path(name)) < SAVED_FILE_GRACE:
+                return False
+
+            self.delete(name)
+            return True
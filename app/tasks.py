@@ -5,12 +5,23 @@ import time
 
 from celery import shared_task
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.mail import get_connection
+from django.db import DatabaseError
+from django.urls import reverse
 from django.urls.exceptions import NoReverseMatch
-from django.utils.html import strip_tags
 
-from .models import TheUser
+from .category_cache import invalidate_category
+from .constants import Queues
+from .covers import render_cover
+from .image_variants import COVER_WIDTHS, AVATAR_WIDTHS, generate_variants
+from .mail_templates import get_mail_template
+from .models import TheUser, Book, Post
+from .reading_progress import flush_progress
+from .recommend import rebuild_neighbours
+from .storage import SAVED_FILE_GRACE
+from .validators import validate_pdf_content
 
 logger = logging.getLogger('changes')
 
@@ -24,15 +35,10 @@ def successful_registration(username, recipient):
     :param str username:   The restored username.
     :param str recipient:  The mail recipient.
     """
-    html_content = render_to_string(
-        'mails/registration_success.html',
-        {'username': username, 'email_host_user': settings.EMAIL_HOST_USER}
-    )
-    subject = 'Успешная регистрация - plamber.com.ua'
-    text_content = strip_tags(html_content)
-
-    email = EmailMultiAlternatives(subject, text_content, to=[recipient])
-    email.attach_alternative(html_content, 'text/html')
+    email = get_mail_template(
+        'mails/registration_success.html', 'Успешная регистрация - plamber.com.ua',
+        fields=('username',), email_host_user=settings.EMAIL_HOST_USER
+    ).create_email(recipient, username=username)
     email.send()
 
     logger.info("Sent successful registration message to '{}'.".format(recipient))
@@ -48,15 +54,10 @@ def restore_account(username, temp_password, recipient):
     :param str temp_password:  The temporary password for restored username.
     :param str recipient:      The mail recipient.
     """
-    html_content = render_to_string(
-        'mails/account_restore.html',
-        {'username': username, 'password': temp_password, 'email_host_user': settings.EMAIL_HOST_USER}
-    )
-    text_content = strip_tags(html_content)
-    subject = 'Восстановление аккаунта - plamber.com.ua'
-
-    email = EmailMultiAlternatives(subject, text_content, to=[recipient])
-    email.attach_alternative(html_content, 'text/html')
+    email = get_mail_template(
+        'mails/account_restore.html', 'Восстановление аккаунта - plamber.com.ua',
+        fields=('username', 'password'), email_host_user=settings.EMAIL_HOST_USER
+    ).create_email(recipient, username=username, password=temp_password)
     email.send()
 
     logger.info("Sent restore account message to '{}'.".format(recipient))
@@ -71,15 +72,10 @@ def changed_password(username, recipient):
     :param str username:   The restored username.
     :param str recipient:  The mail recipient.
     """
-    html_content = render_to_string(
-        'mails/password_changed.html',
-        {'username': username, 'email_host_user': settings.EMAIL_HOST_USER}
-    )
-    text_content = strip_tags(html_content)
-    subject = 'Изменение пароля аккаунта - plamber.com.ua'
-
-    email = EmailMultiAlternatives(subject, text_content, to=[recipient])
-    email.attach_alternative(html_content, 'text/html')
+    email = get_mail_template(
+        'mails/password_changed.html', 'Изменение пароля аккаунта - plamber.com.ua',
+        fields=('username',), email_host_user=settings.EMAIL_HOST_USER
+    ).create_email(recipient, username=username)
     email.send()
 
     logger.info("Sent changed password message to '{}'.".format(recipient))
@@ -87,35 +83,215 @@ def changed_password(username, recipient):
 
 # ----------------------------------------------------------------------------------------------------------------------
 @shared_task
-def email_dispatch(heading, text):
+def build_recommendations():
+    """
+    Celery periodic task for rebuilding the precomputed similar books used by recommendations.
+    """
+    neighbours_count = rebuild_neighbours()
+
+    logger.info('Rebuilt recommendations, stored {} similar books.'.format(neighbours_count))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@shared_task
+def flush_reading_progress():
+    """
+    Celery periodic task for writing the buffered reading progress to the database.
+    """
+    flushed_count = flush_progress()
+
+    if flushed_count:
+        logger.info('Flushed the reading progress of {} added books.'.format(flushed_count))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@shared_task
+def validate_book_file(book_id):
+    """
+    Celery task for validating the whole book file after upload, the upload is checked only by the file header and
+    trailer. The invalid books are blocked, the damaged books which are readable after repair are flagged.
+
+    :param int book_id: The id of the book.
+    """
+    book = Book.objects.filter(id=book_id).first()
+
+    if book is None:
+        return
+
+    try:
+        is_repaired = validate_pdf_content(book.book_file.path)
+        book.file_status = Book.FILE_DAMAGED if is_repaired else Book.FILE_VALID
+
+    except ValidationError as exc:
+        book.file_status = Book.FILE_INVALID
+        book.blocked_book = True
+        logger.warning("The book with id: '{}' is blocked, the file is invalid: {}".format(book_id, exc.message))
+
+    # The book is saved to refresh the cached lists, the book might be deleted meanwhile.
+    try:
+        book.save(update_fields=['file_status', 'blocked_book'])
+    except DatabaseError:
+        return
+
+    logger.info("The file of book with id: '{}' is validated.".format(book_id))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@shared_task
+def remove_book_file(file_name):
     """
-    Dispatches new project post data to multiple subscribed users.
+    Celery task for removing the book file after the book was deleted. The file is shared by the books with the same
+    content, so it is removed only if no book uses it. The removal of the file saved recently is retried later.
+
+    :param str file_name: The name of the book file.
+    """
+    storage = Book._meta.get_field('book_file').storage
+
+    if not storage.delete_unused(file_name, lambda: Book.objects.filter(book_file=file_name).exists()):
+        remove_book_file.apply_async(args=(file_name,), countdown=SAVED_FILE_GRACE, queue=Queues.default)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@shared_task
+def generate_book_cover(book_id):
     """
-    recipients = TheUser.objects.filter(subscription=True)
+    Celery task for rendering the cover of the book from the first page of the book file and generating the variants
+    of the cover. The covers uploaded with the book are only used for the variants.
+
+    :param int book_id: The id of the book.
+    """
+    book = Book.objects.filter(id=book_id).first()
+
+    if book is None:
+        return
 
-    logger.info('Found {} subscribed users. Starting sending emails...'.format(len(recipients)))
+    if not book.photo:
+        try:
+            image = render_cover(book.book_file.path)
+        except Exception as exc:
+            Book.objects.filter(id=book_id).update(cover_status=Book.COVER_FAILED)
+            logger.warning("Can not render the cover of book with id: '{}': {!r}.".format(book_id, exc))
+            return
 
-    for number, recipient in enumerate(recipients):
-        if recipient.id_user.email:
-            try:
-                unsubscribe_token = '{}-{}'.format(recipient.id_user.username,
-                                                   int(time.mktime(recipient.id_user.date_joined.timetuple())))
+        book.photo.save('book_{}.png'.format(book_id), ContentFile(image), save=False)
+
+    try:
+        generate_variants(book.photo, COVER_WIDTHS)
+        cover_status = Book.COVER_READY
+    except OSError as exc:
+        cover_status = Book.COVER_FAILED
+        logger.warning("Can not generate the cover variants of book with id: '{}': {!r}.".format(book_id, exc))
+
+    # The update does not fail if the book was deleted meanwhile, the cached lists are refreshed with the new cover.
+    Book.objects.filter(id=book_id).update(photo=book.photo.name, cover_status=cover_status)
+    invalidate_category(book.id_category_id)
+
+    logger.info("The cover is processed for book with id: '{}'.".format(book_id))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@shared_task
+def generate_avatar_variants(user_id):
+    """
+    Celery task for generating the variants of the user's avatar.
+
+    :param int user_id: The id of '.models.TheUser' instance.
+    """
+    the_user = TheUser.objects.filter(id=user_id).first()
+
+    if the_user is None or not the_user.user_photo:
+        return
+
+    try:
+        generate_variants(the_user.user_photo, AVATAR_WIDTHS)
+    except OSError as exc:
+        logger.warning("Can not generate the avatar variants of user '{}': {!r}.".format(the_user, exc))
+        return
+
+    # The instance is saved to refresh the cached API user, the user might be deleted meanwhile.
+    the_user.user_photo_variants = True
+    try:
+        the_user.save(update_fields=['user_photo_variants'])
+    except DatabaseError:
+        return
+
+    logger.info("The avatar variants are ready for user '{}'.".format(the_user))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def create_dispatch_email(mail_template, recipient):
+    """
+    Returns the email with the post for the subscribed user, only the unsubscribe link differs between users.
+
+    :param app.mail_templates.MailTemplate mail_template: The rendered mail of the post.
+    :param app.models.TheUser              recipient:     The subscribed user.
+
+    :return django.core.mail.EmailMultiAlternatives: The email.
+    """
+    unsubscribe_token = '{}-{}'.format(recipient.id_user.username,
+                                       int(time.mktime(recipient.id_user.date_joined.timetuple())))
+    unsubscribe_url = reverse('unsubscribe', kwargs={'token': unsubscribe_token})
+
+    return mail_template.create_email(recipient.id_user.email, unsubscribe_url=unsubscribe_url)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@shared_task
+def email_dispatch(post_id):
+    """
+    Dispatches new project post data to multiple subscribed users. The dispatch starts after the last user who got
+    the post, so the task sent again continues the interrupted dispatch.
+    """
+    post = Post.objects.filter(id=post_id).first()
+
+    if post is None:
+        return
+
+    logger.info('Starting sending emails of post "{}" after user "{}"...'.format(post_id, post.dispatched_user_id))
+
+    send_dispatch_chunk.apply_async(args=(post_id, post.dispatched_user_id), queue=Queues.default)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@shared_task(acks_late=True)
+def send_dispatch_chunk(post_id, after_user_id):
+    """
+    Sends the post to the next chunk of subscribed users over one connection, saves the progress and schedules
+    the next chunk with the delay which keeps the configured rate. The task is acknowledged after it's done, so
+    the chunk interrupted by the restart of worker is sent again, the chunks sent before are skipped.
+    """
+    post = Post.objects.filter(id=post_id, dispatched_user_id=after_user_id).first()
+
+    # The post was deleted or this chunk was sent already.
+    if post is None:
+        return
+
+    recipients = list(TheUser.objects.filter(subscription=True, id__gt=after_user_id).exclude(id_user__email='')
+                      .select_related('id_user').order_by('id')[:settings.EMAIL_DISPATCH_CHUNK_SIZE])
+
+    if not recipients:
+        logger.info('Email dispatching of post "{}" has been finished.'.format(post_id))
+        return
+
+    mail_template = get_mail_template(
+        'mails/email_dispatch.html', '{} - plamber.com.ua'.format(post.heading),
+        fields=('unsubscribe_url',), text=post.text, email_host_user=settings.EMAIL_HOST_USER
+    )
 
-                html_content = render_to_string(
-                    'mails/email_dispatch.html',
-                    {'text': text, 'token': unsubscribe_token, 'email_host_user': settings.EMAIL_HOST_USER}
-                )
-                text_content = strip_tags(html_content)
-                subject = '{} - plamber.com.ua'.format(heading)
+    emails = []
+    for recipient in recipients:
+        try:
+            emails.append(create_dispatch_email(mail_template, recipient))
+        except NoReverseMatch:
+            logger.info('Unexpected username: "{}"'.format(recipient.id_user.username))
 
-                email = EmailMultiAlternatives(subject, text_content, to=[recipient.id_user.email])
-                email.attach_alternative(html_content, 'text/html')
-                email.send()
+    sent_count = get_connection().send_messages(emails) if emails else 0
 
-                logger.info('Successful processed "{}", sent to: "{}"'.format(number, recipient.id_user.username))
-                time.sleep(300)
+    last_user_id = recipients[-1].id
+    is_saved = Post.objects.filter(id=post_id, dispatched_user_id=after_user_id).update(dispatched_user_id=last_user_id)
 
-            except NoReverseMatch:
-                logger.info('Unexpected username: "{}"'.format(recipient.id_user.username))
+    logger.info('Post "{}" sent to {} users up to user "{}".'.format(post_id, sent_count, last_user_id))
 
-    logger.info('Email dispatching has been finished.')
+    if is_saved:
+        send_dispatch_chunk.apply_async(args=(post_id, last_user_id), queue=Queues.default,
+                                        countdown=len(emails) * 60 * 60 / settings.EMAIL_DISPATCH_RATE)
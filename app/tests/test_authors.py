@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, mock
+
+from ..models import TheUser, Category, Author, Language, Book, SearchToken
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class AuthorsTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('authors_user', 'authors_user@user.com', 'testpassword')
+
+        cls.the_user = TheUser.objects.get(id_user=user)
+        cls.category = Category.objects.create(category_name='authors_category')
+        cls.language = Language.objects.create(language='English')
+        cls.author = Author.objects.create(author_name='Лев  Толстой')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def tearDown(self):
+        for book in Book.objects.all():
+            if os.path.exists(book.book_file.path):
+                os.remove(book.book_file.path)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_book(self, book_name, author):
+        with open(os.path.join(TEST_DATA_DIR, 'test_book.pdf'), 'rb') as book_file:
+            return Book.objects.create(
+                book_name=book_name,
+                id_author=author,
+                id_category=self.category,
+                language=self.language,
+                book_file=SimpleUploadedFile('test_book.pdf', book_file.read()),
+                who_added=self.the_user
+            )
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_author_key(self):
+        self.assertEqual(Author.get_author_key('  Лев \t Толстой '), 'лев толстой')
+        self.assertEqual(Author.get_author_key('STRAßE'), 'strasse')
+        self.assertEqual(Author.get_author_key('Émile Zola'), Author.get_author_key('Émile ZOLA'))
+        self.assertEqual(Author.get_author_key('ﬁrst'), 'first')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_author_key_saved(self):
+        self.assertEqual(self.author.author_key, 'лев толстой')
+
+        self.author.author_name = 'Leo Tolstoy'
+        self.author.save()
+
+        self.assertEqual(Author.objects.get(id=self.author.id).author_key, 'leo tolstoy')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_clean_duplicate_author(self):
+        with self.assertRaises(ValidationError):
+            Author(author_name='ЛЕВ ТОЛСТОЙ').full_clean()
+
+        self.author.full_clean()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('app.models.authors_index.changed')
+    def test_resolve_authors(self, changed):
+        with self.assertNumQueries(5):
+            authors = Author.resolve_authors(['лев толстой', 'Anton Chekhov', 'anton  chekhov', 'Nikolai Gogol'])
+
+        self.assertEqual(authors['лев толстой'], self.author)
+        self.assertEqual(authors['Anton Chekhov'], authors['anton  chekhov'])
+        self.assertEqual(authors['Anton Chekhov'].author_name, 'Anton Chekhov')
+        self.assertEqual(authors['Nikolai Gogol'].author_key, 'nikolai gogol')
+        self.assertEqual(Author.objects.count(), 3)
+        self.assertEqual(changed.call_count, 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Author.resolve_authors(['ANTON CHEKHOV'])['ANTON CHEKHOV'], authors['Anton Chekhov'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_resolve_authors_without_creating(self):
+        self.assertEqual(Author.resolve_authors(['Лев Толстой', 'Anton Chekhov'], create=False),
+                         {'Лев Толстой': self.author})
+        self.assertEqual(Author.objects.count(), 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_resolve_authors_matched_by_collation(self):
+        author = Author.objects.create(author_name='Rene')
+        filter_authors = Author.objects.filter
+
+        def collation_filter(author_key=None, author_key__in=()):
+            # Emulates the case insensitive collation of MySQL which matches 'rené' to 'rene'.
+            if author_key is not None:
+                return filter_authors(author_key=author_key.replace('é', 'e'))
+            return filter_authors(author_key__in={key.replace('é', 'e') for key in author_key__in})
+
+        with mock.patch.object(Author.objects, 'filter', side_effect=collation_filter):
+            self.assertEqual(Author.resolve_authors(['René', 'лев толстой']),
+                             {'René': author, 'лев толстой': self.author})
+            self.assertEqual(Author.resolve_authors(['RENÉ'], create=False), {'RENÉ': author})
+
+        self.assertEqual(Author.objects.count(), 2)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('builtins.print', new=mock.Mock())
+    def test_merge_authors(self):
+        # The authors created before the key was added.
+        Author.objects.filter(id=self.author.id).update(author_key=None)
+        Author.objects.bulk_create([Author(author_name='лев толстой'), Author(author_name='ЛЕВ ТОЛСТОЙ')])
+        duplicate_ids = list(Author.objects.exclude(id=self.author.id).order_by('id').values_list('id', flat=True))
+
+        book = self.create_book('Война и мир', Author.objects.get(id=duplicate_ids[0]))
+        other_book = self.create_book('Анна Каренина', Author.objects.get(id=duplicate_ids[1]))
+
+        call_command('mergeauthors', dry_run=True)
+        self.assertEqual(Author.objects.count(), 3)
+
+        call_command('mergeauthors')
+
+        self.assertEqual(list(Author.objects.values_list('id', 'author_key')), [(self.author.id, 'лев толстой')])
+        self.assertEqual(Book.objects.get(id=book.id).id_author, self.author)
+        self.assertEqual(Book.objects.get(id=other_book.id).id_author, self.author)
+        self.assertTrue(SearchToken.objects.filter(id_book=other_book, suffix='лев').exists())
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+from django.core.cache import cache
+from django.test import TestCase, mock
+
+from ..autocomplete import AutocompleteIndex
+from ..models import Author, authors_index
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class AutocompleteTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        cache.clear()
+
+        self.names = [(1, 'The Best Author'), (2, 'author Zed'), (3, 'Author Adam'), (4, 'Ёлка'), (5, 'Co-Author')]
+        self.loads = 0
+        self.index = AutocompleteIndex('test', self.generate_names)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def generate_names(self):
+        self.loads += 1
+        return self.names
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_find(self):
+        """
+        Must return the prefix matches in alphabetical order first and the infix matches ordered by id after.
+        """
+        self.assertEqual(self.index.find('AUTHOR'),
+                         [(3, 'Author Adam'), (2, 'author Zed'), (1, 'The Best Author'), (5, 'Co-Author')])
+        self.assertEqual(self.index.find('author', 3), [(3, 'Author Adam'), (2, 'author Zed'), (1, 'The Best Author')])
+        self.assertEqual(self.index.find('ЁЛ'), [(4, 'Ёлка')])
+        self.assertEqual(self.index.find('-'), [(5, 'Co-Author')])
+        self.assertEqual(self.index.find('missing'), [])
+        self.assertEqual(self.loads, 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_update(self):
+        self.index.find('author')
+
+        self.index.update(2, 'Zed')
+        self.index.update(6, 'Author New')
+        self.index.update(1, None)
+
+        self.assertEqual(self.index.find('author'), [(3, 'Author Adam'), (6, 'Author New'), (5, 'Co-Author')])
+        self.assertEqual(self.index.find('zed'), [(2, 'Zed')])
+        self.assertEqual(self.loads, 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_changed(self):
+        """
+        Must apply the committed changes in place and skip the changes which are not committed yet.
+        """
+        self.index.find('author')
+
+        self.index.changed(1, None)
+        self.assertEqual(len(self.index.find('author')), 4)
+
+        self.index.log_change(1, None)
+        self.index.log_change(6, 'Author New')
+        self.assertEqual(self.index.find('author'), [(3, 'Author Adam'), (6, 'Author New'), (2, 'author Zed'),
+                                                     (5, 'Co-Author')])
+        self.assertEqual(self.loads, 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_concurrent_changes(self):
+        """
+        Must apply the changes logged by all workers in each worker without reloading.
+        """
+        other_index = AutocompleteIndex('test', self.generate_names)
+        self.index.find('author')
+        other_index.find('author')
+
+        self.index.log_change(6, 'Author New')
+        other_index.log_change(7, 'Author Other')
+
+        for index in (self.index, other_index):
+            self.assertEqual([object_id for object_id, name in index.find('author', 10)], [3, 6, 7, 2, 1, 5])
+        self.assertEqual(self.loads, 2)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_missing_change(self):
+        """
+        Must reload the index if the logged change is missing or the index is bumped.
+        """
+        self.index.find('author')
+
+        self.index.log_change(6, 'Author New')
+        cache.delete(self.index.get_change_key(self.index.get_shared_version()))
+        self.index.find('author')
+        self.assertEqual(self.loads, 2)
+
+        self.index.bump_version()
+        self.index.find('author')
+        self.assertEqual(self.loads, 3)
+
+        cache.clear()
+        self.index.find('author')
+        self.assertEqual(self.loads, 4)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('app.autocomplete.transaction.on_commit', lambda func: func())
+    def test_models_index(self):
+        """
+        Must return the new and changed authors after saving them. The changes are applied as if they were committed.
+        """
+        author = Author.objects.create(author_name='Autocomplete Author')
+        self.assertEqual(Author.get_authors_list('autocomplete'), ['Autocomplete Author'])
+
+        author.author_name = 'Changed Author'
+        author.save()
+        self.assertEqual(Author.get_authors_list('autocomplete'), [])
+        self.assertEqual(Author.get_authors_list('changed'), ['Changed Author'])
+
+        author.delete()
+        self.assertEqual(Author.get_authors_list('changed'), [])
+
+        with self.assertNumQueries(0):
+            authors_index.find('changed')
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, mock, override_settings
+
+from ..management.commands.benchmarkviews import Command, get_percentile
+from ..models import TheUser, Author, Book, AddedBook, BookRating, BookComment
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class BenchmarkCommandsTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    @mock.patch('builtins.print', new=mock.Mock())
+    def setUpTestData(cls):
+        call_command('generatedataset', books=40, authors=8, users=15, added_books=150, ratings=60, comments=30,
+                     prefix='bench', password='bench#password', seed=1, skip_search_index=True)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generated_dataset(self):
+        self.assertEqual(TheUser.objects.filter(id_user__username__startswith='bench_').count(), 15)
+        self.assertEqual(Author.objects.count(), 8)
+        self.assertEqual(Book.objects.count(), 40)
+        self.assertEqual(AddedBook.objects.count(), 150)
+        self.assertEqual(BookRating.objects.count(), 60)
+        self.assertEqual(BookComment.objects.count(), 30)
+
+        book = Book.objects.order_by('-readers_count').first()
+        self.assertEqual(book.readers_count, AddedBook.objects.filter(id_book=book).count())
+        self.assertEqual(sum(Book.objects.values_list('rating_count', flat=True)), 60)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_benchmark_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.json')
+
+            call_command('benchmarkviews', repeat=3, password='bench#password', views=['book', 'category_api'],
+                         output=output, stderr=io.StringIO())
+
+            with open(output) as report_file:
+                report = json.load(report_file)
+
+        self.assertEqual(report['dataset']['Book'], 40)
+        self.assertEqual(sorted(report['views']), ['book', 'category_api'])
+
+        for stats in report['views'].values():
+            self.assertEqual(stats['status_codes'], [200])
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+            self.assertGreater(stats['queries_max'], 0)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @override_settings(BOOKS_PER_PAGE=1)
+    @mock.patch('app.comments.COMMENTS_PER_PAGE', 1)
+    def test_benchmark_cursor_views(self):
+        """
+        Must request the views paginated by cursor with the cursor of the second page.
+        """
+        views = ['load_books_cursor', 'book_sort_name_cursor', 'book_sort_estimation_cursor',
+                 'load_uploaded_books_cursor', 'load_comments_cursor']
+        cursors = []
+        command_get_next_cursor = Command.get_next_cursor
+
+        def get_next_cursor(*args):
+            cursors.append(command_get_next_cursor(*args))
+            return cursors[-1]
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.json')
+
+            with mock.patch.object(Command, 'get_next_cursor', autospec=True, side_effect=get_next_cursor):
+                call_command('benchmarkviews', repeat=1, password='bench#password', views=views, output=output,
+                             stderr=io.StringIO())
+
+            with open(output) as report_file:
+                report = json.load(report_file)
+
+        self.assertEqual(len(cursors), len(views))
+        # The book listings of the category have more than one page, the other views depend on the dataset.
+        self.assertTrue(all(cursors[:3]))
+        self.assertEqual(sorted(report['views']), sorted(views))
+
+        for stats in report['views'].values():
+            self.assertEqual(stats['status_codes'], [200])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(get_percentile(values, 50), 50)
+        self.assertEqual(get_percentile(values, 99), 99)
+        self.assertEqual(get_percentile([5], 95), 5)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from django.contrib import auth
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client
+
+from ..models import TheUser, Category, Author, Language, Book, BookRating, AddedBook
+from .. import category_cache
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class CategoryCacheTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        client = Client()
+        cls.anonymous_user = auth.get_user(client)
+
+        cls.user1 = User.objects.create_user('cache_user1', 'cache_user1@user1.com', 'testpassword1')
+        cls.user2 = User.objects.create_user('cache_user2', 'cache_user2@user2.com', 'testpassword2')
+        cls.the_user1 = TheUser.objects.get(id_user=cls.user1)
+        cls.the_user2 = TheUser.objects.get(id_user=cls.user2)
+
+        cls.category = Category.objects.create(category_name='cache_category')
+        cls.other_category = Category.objects.create(category_name='cache_other_category')
+        cls.language = Language.objects.create(language='English')
+
+        cls.author1 = Author.objects.create(author_name='Zed Author')
+        cls.author2 = Author.objects.create(author_name='adam author')
+
+        cls.book1 = cls.create_book('b book', cls.author1, cls.the_user1)
+        cls.book2 = cls.create_book('A book', cls.author2, cls.the_user1)
+        cls.book3 = cls.create_book('c book', cls.author2, cls.the_user2)
+        cls.private_book = cls.create_book('a private book', cls.author1, cls.the_user2, True)
+
+        BookRating.objects.create(id_user=cls.the_user1, id_book=cls.book1, rating=4)
+        BookRating.objects.create(id_user=cls.the_user1, id_book=cls.book3, rating=9)
+        AddedBook.objects.create(id_user=cls.the_user1, id_book=cls.book3)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def create_book(cls, name, author, who_added, private=False):
+        test_book_path = os.path.join(TEST_DATA_DIR, 'test_book.pdf')
+
+        return Book.objects.create(
+            book_name=name,
+            id_author=author,
+            id_category=cls.category,
+            language=cls.language,
+            book_file=SimpleUploadedFile('test_book.pdf', open(test_book_path, 'rb').read()),
+            who_added=who_added,
+            private_book=private
+        )
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def tearDownClass(cls):
+        for book in Book.objects.all():
+            if os.path.exists(book.book_file.path):
+                os.remove(book.book_file.path)
+
+        super().tearDownClass()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        cache.clear()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_ids(self, criterion, user=None):
+        return category_cache.get_sorted_book_ids(user or self.anonymous_user, self.category, criterion)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_sorted_book_ids(self):
+        self.assertEqual(self.get_ids('book_name'), [self.book2.id, self.book1.id, self.book3.id])
+        self.assertEqual(self.get_ids('author'), [self.book2.id, self.book3.id, self.book1.id])
+        self.assertEqual(self.get_ids('estimation'), [self.book3.id, self.book1.id, self.book2.id])
+        self.assertEqual(self.get_ids('most_readable'), [self.book3.id])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_private_books_merged(self):
+        """
+        Must merge the private books only of the owner into the cached public lists.
+        """
+        self.assertEqual(self.get_ids('book_name', self.user2),
+                         [self.book2.id, self.private_book.id, self.book1.id, self.book3.id])
+        self.assertEqual(self.get_ids('estimation', self.user2),
+                         [self.book3.id, self.book1.id, self.book2.id, self.private_book.id])
+        self.assertEqual(self.get_ids('book_name', self.user1), [self.book2.id, self.book1.id, self.book3.id])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_cached_lists(self):
+        """
+        Must generate the lists of all criteria by one query and take them from the cache after.
+        """
+        with self.assertNumQueries(1):
+            self.get_ids('book_name')
+
+        with self.assertNumQueries(0):
+            for criterion in category_cache.CRITERIA:
+                self.get_ids(criterion)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_invalidation(self):
+        """
+        Must invalidate the cached lists after changing books, ratings and readers of the category.
+        """
+        self.get_ids('book_name')
+
+        new_book = self.create_book('0 book', self.author1, self.the_user1)
+        self.assertEqual(self.get_ids('book_name')[0], new_book.id)
+
+        BookRating.objects.create(id_user=self.the_user1, id_book=new_book, rating=10)
+        self.assertEqual(self.get_ids('estimation')[0], new_book.id)
+
+        AddedBook.objects.create(id_user=self.the_user1, id_book=new_book)
+        AddedBook.objects.create(id_user=self.the_user2, id_book=new_book)
+        self.assertEqual(self.get_ids('most_readable'), [new_book.id, self.book3.id])
+
+        new_book.id_category = self.other_category
+        new_book.save()
+        self.assertNotIn(new_book.id, self.get_ids('book_name'))
+
+        new_book = Book.objects.get(id=new_book.id)
+        new_book.id_category = self.category
+        new_book.save()
+        self.assertIn(new_book.id, self.get_ids('book_name'))
+
+        new_book_id = new_book.id
+        new_book.delete()
+        self.assertNotIn(new_book_id, self.get_ids('book_name'))
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.shortcuts import reverse
+from django.test import TestCase, Client, mock
+
+from ..comments import COMMENTS_PER_PAGE, generate_comment, get_comments_page, get_comments_version, get_first_page
+from ..models import TheUser, Category, Author, Language, Book, BookComment
+from ..pagination import InvalidCursor
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class CommentsTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('comments_user', 'comments_user@user.com', 'Dummy#password')
+        cls.the_user = TheUser.objects.get(id_user=cls.user)
+
+        with open(os.path.join(TEST_DATA_DIR, 'test_book.pdf'), 'rb') as book_file:
+            cls.book = Book.objects.create(
+                book_name='comments_book',
+                id_author=Author.objects.create(author_name='comments_author'),
+                id_category=Category.objects.create(category_name='comments_category'),
+                language=Language.objects.create(language='English'),
+                book_file=SimpleUploadedFile('test_book.pdf', book_file.read()),
+                who_added=cls.the_user
+            )
+
+        cls.logged_client = Client()
+        cls.logged_client.login(username='comments_user', password='Dummy#password')
+        cls.xhr = 'XMLHttpRequest'
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def tearDownClass(cls):
+        for book in Book.objects.all():
+            if os.path.exists(book.book_file.path):
+                os.remove(book.book_file.path)
+
+        super().tearDownClass()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        cache.clear()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_comments(self, count):
+        for number in range(count):
+            BookComment.objects.create(id_user=self.the_user, id_book=self.book, text='comment{}'.format(number))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_book(self):
+        return Book.objects.get(id=self.book.id)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_comments_count(self):
+        self.create_comments(3)
+        self.assertEqual(self.get_book().comments_count, 3)
+
+        BookComment.objects.filter(id_book=self.book).first().delete()
+        self.assertEqual(self.get_book().comments_count, 2)
+
+        Book.objects.filter(id=self.book.id).update(comments_count=0)
+
+        with mock.patch('builtins.print'):
+            call_command('rebuildcomments')
+
+        self.assertEqual(self.get_book().comments_count, 2)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_cursor_pages(self):
+        self.create_comments(COMMENTS_PER_PAGE * 2 + 5)
+
+        page = get_first_page(self.get_book())
+        texts = [comment['text'] for comment in page.object_list]
+
+        while page.has_next():
+            with self.assertNumQueries(1):
+                page = get_comments_page(self.book.id, page.next_cursor)
+
+            texts.extend(comment['text'] for comment in page.object_list)
+
+        self.assertEqual(texts, ['comment{}'.format(number) for number in reversed(range(COMMENTS_PER_PAGE * 2 + 5))])
+        self.assertEqual(page.object_list[0]['username'], 'comments_user')
+        self.assertEqual(page.object_list[0]['avatar']['src'], '')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_first_page_has_next_by_counter(self):
+        self.create_comments(COMMENTS_PER_PAGE)
+        self.assertFalse(get_first_page(self.get_book()).has_next())
+
+        self.create_comments(1)
+        self.assertTrue(get_first_page(self.get_book()).has_next())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_first_page_cached(self):
+        self.create_comments(2)
+        book = self.get_book()
+
+        with self.assertNumQueries(1):
+            get_first_page(book)
+            page = get_first_page(book)
+
+        self.assertEqual([comment['text'] for comment in page.object_list], ['comment1', 'comment0'])
+
+        response = self.logged_client.post(reverse('add_comment_app'), {'book': self.book.id, 'comment': 'new'},
+                                           HTTP_X_REQUESTED_WITH=self.xhr)
+        self.assertEqual(response.status_code, 200)
+
+        page = get_first_page(self.get_book())
+        self.assertEqual([comment['text'] for comment in page.object_list], ['new', 'comment1', 'comment0'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_first_page_without_counter(self):
+        self.create_comments(COMMENTS_PER_PAGE + 1)
+        Book.objects.filter(id=self.book.id).update(comments_count=0)
+
+        page = get_first_page(self.get_book())
+
+        self.assertEqual(len(page.object_list), COMMENTS_PER_PAGE)
+        self.assertTrue(page.has_next())
+        self.assertEqual(len(get_comments_page(self.book.id, page.next_cursor).object_list), 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_first_page_changed_while_fetched(self):
+        """
+        Must not use the page fetched before the comment was added, even if the page is cached after it.
+        """
+        self.create_comments(1)
+
+        # The comment is added by the concurrent request after the old page was fetched, but before it's cached.
+        def add_comment(comment):
+            if not BookComment.objects.filter(text='new').exists():
+                BookComment.objects.create(id_user=self.the_user, id_book=self.book, text='new')
+            return generate_comment(comment)
+
+        with mock.patch('app.comments.generate_comment', add_comment):
+            self.assertEqual([comment['text'] for comment in get_first_page(self.get_book()).object_list],
+                             ['comment0'])
+
+        self.assertEqual([comment['text'] for comment in get_first_page(self.get_book()).object_list],
+                         ['new', 'comment0'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_first_page_author_changed(self):
+        self.create_comments(1)
+        get_first_page(self.get_book())
+
+        self.user.username = 'renamed_comments_user'
+        self.user.save()
+
+        self.assertEqual(get_first_page(self.get_book()).object_list[0]['username'], 'renamed_comments_user')
+
+        version = get_comments_version(self.book.id)
+        self.the_user.save(update_fields=['user_photo_variants'])
+        self.assertNotEqual(get_comments_version(self.book.id), version)
+
+        version = get_comments_version(self.book.id)
+        self.the_user.save(update_fields=['subscription'])
+        self.assertEqual(get_comments_version(self.book.id), version)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            get_comments_page(self.book.id, 'not a cursor')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_selected_book_comments(self):
+        self.create_comments(COMMENTS_PER_PAGE + 1)
+
+        response = self.logged_client.get(reverse('book', kwargs={'book_id': self.book.id}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['comments']), COMMENTS_PER_PAGE)
+        self.assertEqual(response.context['comments_count'], COMMENTS_PER_PAGE + 1)
+        self.assertTrue(response.context['comments_has_next_page'])
+        self.assertContains(response, response.context['comments_next_cursor'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_load_comments_by_cursor(self):
+        self.create_comments(COMMENTS_PER_PAGE + 5)
+        next_cursor = get_first_page(self.get_book()).next_cursor
+
+        response = self.logged_client.post(reverse('load_comments_app'),
+                                           {'cursor': next_cursor, 'book_id': self.book.id},
+                                           HTTP_X_REQUESTED_WITH=self.xhr)
+        response_data = json.loads(response.content.decode('utf-8'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response_data['has_next_page'])
+        self.assertIsNone(response_data['next_cursor'])
+        self.assertEqual(response_data['book_id'], self.book.id)
+        self.assertEqual([comment['text'] for comment in response_data['comments']],
+                         ['comment{}'.format(number) for number in reversed(range(5))])
+        self.assertEqual(response_data['comments'][0]['username'], 'comments_user')
+
+        response = self.logged_client.post(reverse('load_comments_app'),
+                                           {'cursor': 'bm90IGEgbGlzdA==', 'book_id': self.book.id},
+                                           HTTP_X_REQUESTED_WITH=self.xhr)
+        self.assertEqual(response.status_code, 400)
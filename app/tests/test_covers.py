@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, mock
+from PIL import Image
+
+from ..constants import Queues
+from ..covers import render_cover, BOOK_COVER_WIDTH
+from ..image_variants import COVER_WIDTHS, AVATAR_WIDTHS, get_image_version, get_variant_name, remove_variants
+from ..models import TheUser, Category, Author, Language, Book
+from ..tasks import generate_book_cover, generate_avatar_variants
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+TEST_BOOK_PATH = os.path.join(TEST_DATA_DIR, 'test_book.pdf')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class CoversTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('covers_user', 'covers_user@user.com', 'testpassword')
+
+        cls.the_user = TheUser.objects.get(id_user=user)
+        cls.category = Category.objects.create(category_name='covers_category')
+        cls.author = Author.objects.create(author_name='covers_author')
+        cls.language = Language.objects.create(language='English')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def tearDown(self):
+        for book in Book.objects.all():
+            if book.photo:
+                remove_variants(book.photo)
+
+            for file in (book.book_file, book.photo):
+                if file and os.path.exists(file.path):
+                    os.remove(file.path)
+
+        the_user = TheUser.objects.get(id=self.the_user.id)
+        if the_user.user_photo:
+            remove_variants(the_user.user_photo)
+            os.remove(the_user.user_photo.path)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_book(self, content=None):
+        if content is None:
+            with open(TEST_BOOK_PATH, 'rb') as book_file:
+                content = book_file.read()
+
+        return Book.objects.create(
+            book_name='covers_book',
+            id_author=self.author,
+            id_category=self.category,
+            language=self.language,
+            book_file=SimpleUploadedFile('test_book.pdf', content),
+            who_added=self.the_user
+        )
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_render_cover(self):
+        image = Image.open(io.BytesIO(render_cover(TEST_BOOK_PATH)))
+
+        self.assertEqual(image.format, 'PNG')
+        self.assertEqual(image.width, BOOK_COVER_WIDTH)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_render_cover_bounded_height(self):
+        image = Image.open(io.BytesIO(render_cover(TEST_BOOK_PATH, width=400, max_height=100)))
+
+        self.assertEqual(image.size, (100, 100))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('app.signals.validate_book_file.apply_async')
+    def test_book_created_schedules_cover(self, validate_apply_async):
+        with mock.patch('app.signals.transaction.on_commit', side_effect=lambda func: func()):
+            with mock.patch('app.signals.generate_book_cover.apply_async') as apply_async:
+                book = self.create_book()
+                book.save()
+
+        apply_async.assert_called_once_with(args=(book.id,), queue=Queues.images)
+        validate_apply_async.assert_called_once_with(args=(book.id,), queue=Queues.images)
+        self.assertEqual(book.cover_status, Book.COVER_PENDING)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generate_book_cover(self):
+        book = self.create_book()
+
+        generate_book_cover(book.id)
+
+        book.refresh_from_db()
+        self.assertEqual(book.cover_status, Book.COVER_READY)
+        self.assertEqual(book.photo.name, 'book_cover/book_{}.png'.format(book.id))
+        self.assertEqual(Image.open(book.photo.path).width, BOOK_COVER_WIDTH)
+
+        version = get_image_version(book.photo)
+
+        for variant in book.get_cover_variants():
+            variant_name = get_variant_name(book.photo.name, version, variant['width'], 'webp')
+            self.assertTrue(os.path.exists(book.photo.storage.path(variant_name)))
+
+        variant_name = get_variant_name(book.photo.name, version, COVER_WIDTHS[1], 'jpeg')
+        self.assertEqual(book.cover['src'], book.photo.storage.url(variant_name))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generate_book_cover_existing_photo(self):
+        book = self.create_book()
+        with open(os.path.join(TEST_DATA_DIR, 'test_book_image.png'), 'rb') as image_file:
+            book.photo.save('existing.png', SimpleUploadedFile('existing.png', image_file.read()))
+
+        with mock.patch('app.tasks.render_cover') as render_cover_mock:
+            generate_book_cover(book.id)
+
+        book.refresh_from_db()
+        self.assertFalse(render_cover_mock.called)
+        self.assertEqual(book.cover_status, Book.COVER_READY)
+        self.assertEqual(book.photo.name, 'book_cover/existing.png')
+        self.assertEqual(len(book.get_cover_variants()), len(COVER_WIDTHS))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generate_book_cover_invalid_photo(self):
+        book = self.create_book()
+        book.photo.save('existing.png', SimpleUploadedFile('existing.png', b'not an image'))
+
+        generate_book_cover(book.id)
+
+        book.refresh_from_db()
+        self.assertEqual(book.cover_status, Book.COVER_FAILED)
+        self.assertEqual(book.get_cover_variants(), [])
+        self.assertEqual(book.cover['src'], book.photo.url)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generate_book_cover_invalid_file(self):
+        book = self.create_book(b'not a pdf file')
+
+        generate_book_cover(book.id)
+
+        book.refresh_from_db()
+        self.assertEqual(book.cover_status, Book.COVER_FAILED)
+        self.assertFalse(book.photo)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generate_book_cover_deleted_book(self):
+        generate_book_cover(0)
+
+        self.assertFalse(Book.objects.exists())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generate_avatar_variants(self):
+        the_user = TheUser.objects.get(id=self.the_user.id)
+
+        with open(os.path.join(TEST_DATA_DIR, 'test_book_image.png'), 'rb') as image_file:
+            the_user.user_photo.save('user_{}.png'.format(the_user.id), SimpleUploadedFile('avatar.png',
+                                                                                          image_file.read()))
+
+        self.assertEqual(the_user.get_avatar_variants(), [])
+
+        generate_avatar_variants(the_user.id)
+
+        the_user.refresh_from_db()
+        self.assertTrue(the_user.user_photo_variants)
+        self.assertEqual([variant['width'] for variant in the_user.get_avatar_variants()], list(AVATAR_WIDTHS))
+        self.assertTrue(the_user.avatar['webp_srcset'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generate_avatar_variants_changed_avatar(self):
+        the_user = TheUser.objects.get(id=self.the_user.id)
+        sources = []
+
+        for mtime, image_name in ((1, 'test_book_image.png'), (2, 'test_resize_image.png')):
+            with open(os.path.join(TEST_DATA_DIR, image_name), 'rb') as image_file:
+                the_user.user_photo.save('user_{}.png'.format(the_user.id), SimpleUploadedFile('avatar.png',
+                                                                                              image_file.read()))
+
+            # The avatar is overwritten under the same name, only the modification time is changed.
+            os.utime(the_user.user_photo.path, ns=(mtime, mtime))
+            generate_avatar_variants(the_user.id)
+
+            the_user.refresh_from_db()
+            sources.append(the_user.avatar['src'])
+
+        storage, name = the_user.user_photo.storage, the_user.user_photo.name
+
+        self.assertNotEqual(sources[0], sources[1])
+        self.assertFalse(os.path.exists(storage.path(get_variant_name(name, '1', AVATAR_WIDTHS[-1], 'jpeg'))))
+        self.assertTrue(os.path.exists(storage.path(get_variant_name(name, '2', AVATAR_WIDTHS[-1], 'jpeg'))))
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, mock, override_settings
+
+from ..constants import Queues
+from ..models import TheUser, Post
+from ..tasks import email_dispatch, send_dispatch_chunk
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@override_settings(EMAIL_DISPATCH_CHUNK_SIZE=2, EMAIL_DISPATCH_RATE=60)
+class EmailDispatchTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(5):
+            User.objects.create_user('dispatch_user{}'.format(number), 'dispatch{}@user.com'.format(number), 'password')
+
+        TheUser.objects.filter(id_user__username='dispatch_user1').update(subscription=False)
+        User.objects.filter(username='dispatch_user3').update(email='')
+
+        cls.the_users = list(TheUser.objects.order_by('id'))
+        cls.post = Post.objects.create(user=cls.the_users[0], heading='News', text='Post <b>text</b>')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_next_chunk(self, apply_async):
+        args, kwargs = apply_async.call_args
+        return kwargs['args']
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('app.tasks.send_dispatch_chunk.apply_async')
+    def test_email_dispatch_starts_from_checkpoint(self, apply_async):
+        Post.objects.filter(id=self.post.id).update(dispatched_user_id=self.the_users[2].id)
+
+        email_dispatch(self.post.id)
+
+        apply_async.assert_called_once_with(args=(self.post.id, self.the_users[2].id), queue=Queues.default)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('app.tasks.send_dispatch_chunk.apply_async')
+    def test_send_dispatch_chunks(self, apply_async):
+        with mock.patch('app.tasks.get_connection', wraps=mail.get_connection) as get_connection:
+            send_dispatch_chunk(self.post.id, 0)
+
+        # The chunk of subscribed users is sent over one connection.
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual([email.to for email in mail.outbox], [['dispatch0@user.com'], ['dispatch2@user.com']])
+        self.assertEqual(mail.outbox[0].subject, 'News - plamber.com.ua')
+        self.assertIn('Post <b>text</b>', mail.outbox[0].alternatives[0][0])
+        self.assertEqual(Post.objects.get(id=self.post.id).dispatched_user_id, self.the_users[2].id)
+
+        # The next chunk is delayed by a minute per email.
+        apply_async.assert_called_once_with(args=(self.post.id, self.the_users[2].id), queue=Queues.default,
+                                            countdown=120)
+
+        send_dispatch_chunk(*self.get_next_chunk(apply_async))
+
+        self.assertEqual(mail.outbox[-1].to, ['dispatch4@user.com'])
+        self.assertEqual(len(mail.outbox), 3)
+
+        send_dispatch_chunk(*self.get_next_chunk(apply_async))
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(apply_async.call_count, 2)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('app.tasks.send_dispatch_chunk.apply_async')
+    def test_send_dispatch_chunk_sent_before(self, apply_async):
+        Post.objects.filter(id=self.post.id).update(dispatched_user_id=self.the_users[2].id)
+
+        # The redelivered task of the chunk which was sent before the restart.
+        send_dispatch_chunk(self.post.id, 0)
+        send_dispatch_chunk(0, 0)
+
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(apply_async.called)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_post_created_schedules_dispatch(self):
+        with mock.patch('app.signals.transaction.on_commit', side_effect=lambda func: func()):
+            with mock.patch('app.signals.email_dispatch.apply_async') as apply_async:
+                post = Post.objects.create(user=self.the_users[0], heading='Other', text='Other text')
+
+        apply_async.assert_called_once_with(args=(post.id,), queue=Queues.default)
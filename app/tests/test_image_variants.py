@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from .. import image_variants
+from ..models import Book
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class ImageVariantsTest(SimpleTestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+        self.settings_override.enable()
+
+        os.makedirs(os.path.join(self.media_root, 'book_cover'))
+        shutil.copy(os.path.join(TEST_DATA_DIR, 'test_resize_image.png'),
+                    os.path.join(self.media_root, 'book_cover', 'book_1.png'))
+
+        self.photo = Book(photo='book_cover/book_1.png').photo
+        os.utime(self.photo.path, ns=(0xabc, 0xabc))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_variant_path(self, file_name):
+        return os.path.join(self.media_root, 'variants', 'book_cover', 'book_1', file_name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_image_version(self):
+        self.assertEqual(image_variants.get_image_version(self.photo), 'abc')
+
+        os.utime(self.photo.path, ns=(0xabd, 0xabd))
+        self.assertEqual(image_variants.get_image_version(self.photo), 'abd')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_variant_name(self):
+        self.assertEqual(image_variants.get_variant_name('book_cover/book_1.png', 'abc', 240, 'jpeg'),
+                         'variants/book_cover/book_1/abc-240w.jpg')
+        self.assertEqual(image_variants.get_variant_name('user/user_5.png', 'abc', 64, 'webp'),
+                         'variants/user/user_5/abc-64w.webp')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generate_variants(self):
+        image_variants.generate_variants(self.photo, (120, 350, 1000))
+
+        jpeg_image = Image.open(self.get_variant_path('abc-120w.jpg'))
+        self.assertEqual(jpeg_image.format, 'JPEG')
+        self.assertTrue(jpeg_image.info.get('progressive'))
+        self.assertEqual(jpeg_image.size, (120, 150))
+
+        webp_image = Image.open(self.get_variant_path('abc-350w.webp'))
+        self.assertEqual(webp_image.format, 'WEBP')
+        self.assertEqual(webp_image.size, (350, 437))
+
+        # The image is not upscaled.
+        self.assertEqual(Image.open(self.get_variant_path('abc-1000w.jpg')).size, (400, 500))
+
+        self.assertEqual(Image.open(self.photo.path).size, (400, 500))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generate_variants_changed_image(self):
+        image_variants.generate_variants(self.photo, (120,))
+
+        os.utime(self.photo.path, ns=(0xabd, 0xabd))
+        image_variants.generate_variants(self.photo, (120,))
+
+        self.assertEqual(sorted(os.listdir(self.get_variant_path(''))), ['abd-120w.jpg', 'abd-120w.webp'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_remove_variants(self):
+        image_variants.generate_variants(self.photo, (120,))
+        image_variants.remove_variants(self.photo)
+
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'variants', 'book_cover')), [])
+        self.assertTrue(os.path.exists(self.photo.path))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_variants(self):
+        self.assertEqual(image_variants.get_variants(self.photo, (120, 240)), [
+            {'width': 120, 'jpeg': '/media/variants/book_cover/book_1/abc-120w.jpg',
+             'webp': '/media/variants/book_cover/book_1/abc-120w.webp'},
+            {'width': 240, 'jpeg': '/media/variants/book_cover/book_1/abc-240w.jpg',
+             'webp': '/media/variants/book_cover/book_1/abc-240w.webp'}
+        ])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_image_sources(self):
+        self.assertEqual(image_variants.get_image_sources(self.photo, (120, 240), True, 240), {
+            'src': '/media/variants/book_cover/book_1/abc-240w.jpg',
+            'srcset': '/media/variants/book_cover/book_1/abc-120w.jpg 120w, '
+                      '/media/variants/book_cover/book_1/abc-240w.jpg 240w',
+            'webp_srcset': '/media/variants/book_cover/book_1/abc-120w.webp 120w, '
+                           '/media/variants/book_cover/book_1/abc-240w.webp 240w'
+        })
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_image_sources_not_ready(self):
+        self.assertEqual(image_variants.get_image_sources(self.photo, (120, 240), False, 240),
+                         {'src': '/media/book_cover/book_1.png', 'srcset': '', 'webp_srcset': ''})
+        self.assertEqual(image_variants.get_image_sources(Book().photo, (120, 240), True, 240),
+                         {'src': '', 'srcset': '', 'webp_srcset': ''})
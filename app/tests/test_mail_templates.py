@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.template.loader import render_to_string
+from django.test import TestCase, mock
+from django.utils.html import strip_tags
+
+from ..mail_templates import MailTemplate, get_mail_template
+from ..models import TheUser, Post
+from ..tasks import successful_registration, restore_account, send_dispatch_chunk
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class MailTemplatesTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        get_mail_template.cache_clear()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_template_rendered_once(self):
+        with mock.patch('app.mail_templates.render_to_string', return_value='<p>Hello</p>') as render_mock:
+            for number in range(3):
+                get_mail_template('mails/registration_success.html', 'Subject', fields=('username',),
+                                  email_host_user='host@user.com')
+
+        self.assertEqual(render_mock.call_count, 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_render_fields(self):
+        template = MailTemplate('mails/registration_success.html', 'Subject', ('username',),
+                                {'email_host_user': 'host@user.com'})
+
+        html, text = template.render(username='mail_user')
+        expected_html = render_to_string('mails/registration_success.html', {'username': 'mail_user',
+                                                                              'email_host_user': 'host@user.com'})
+
+        self.assertEqual(html, expected_html)
+        self.assertEqual(text, strip_tags(expected_html))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_render_escapes_values(self):
+        template = MailTemplate('mails/registration_success.html', 'Subject', ('username',), {})
+
+        html, text = template.render(username='<b>user</b>')
+
+        self.assertIn('&lt;b&gt;user&lt;/b&gt;', html)
+        self.assertNotIn('<b>user</b>', html)
+        self.assertIn('&lt;b&gt;user&lt;/b&gt;', text)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_create_email(self):
+        template = get_mail_template('mails/account_restore.html', 'Restore', fields=('username', 'password'))
+
+        email = template.create_email('mail_user@user.com', username='mail_user', password='temp_password')
+
+        self.assertEqual(email.to, ['mail_user@user.com'])
+        self.assertEqual(email.subject, 'Restore')
+        self.assertIn('temp_password', email.body)
+        self.assertIn('mail_user', email.alternatives[0][0])
+        self.assertEqual(email.alternatives[0][1], 'text/html')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_tasks_send_recipient_fields(self):
+        successful_registration('first_user', 'first@user.com')
+        successful_registration('second_user', 'second@user.com')
+        restore_account('second_user', 'temp_password', 'second@user.com')
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('first_user', mail.outbox[0].body)
+        self.assertNotIn('first_user', mail.outbox[1].body)
+        self.assertIn('second_user', mail.outbox[1].body)
+        self.assertIn('temp_password', mail.outbox[2].alternatives[0][0])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('app.tasks.send_dispatch_chunk.apply_async')
+    def test_dispatch_unsubscribe_links(self, apply_async):
+        for number in range(2):
+            User.objects.create_user('mail_user{}'.format(number), 'mail{}@user.com'.format(number), 'password')
+
+        the_users = list(TheUser.objects.order_by('id'))
+        post = Post.objects.create(user=the_users[0], heading='News', text='Post text')
+
+        with mock.patch('app.mail_templates.render_to_string', wraps=render_to_string) as render_mock:
+            send_dispatch_chunk(post.id, 0)
+
+        self.assertEqual(render_mock.call_count, 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+        for the_user, email in zip(the_users, mail.outbox):
+            self.assertIn('/unsubscribe/{}-'.format(the_user.id_user.username), email.alternatives[0][0])
@@ -6,6 +6,7 @@ import os
 from django.contrib import auth
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.db.models import QuerySet
 from django.test import TestCase, Client, mock
 from django.urls import reverse
@@ -386,14 +387,15 @@ class ModelTest(TestCase):
         form_with_new_author = AddBookForm(data=form_data_new_author)
         form_with_new_author.is_valid()
 
-        related_data = Book.get_related_objects_for_create(self.user1.id, form)
+        related_data = Book.get_related_objects_for_create(self.the_user1, form)
 
         self.assertTrue(isinstance(related_data, BookRelatedData))
         self.assertEqual(len(related_data), 4)
         self.assertEqual(related_data.author, Author.objects.get(author_name='trueAuthorNew'))
+        self.assertEqual(related_data.user, self.the_user1)
         self.assertEqual(Author.objects.all().count(), 5)
 
-        related_data_new_author = Book.get_related_objects_for_create(self.user1.id, form_with_new_author)
+        related_data_new_author = Book.get_related_objects_for_create(self.the_user1, form_with_new_author)
 
         self.assertTrue(isinstance(related_data, BookRelatedData))
         self.assertEqual(len(related_data_new_author), 4)
@@ -435,7 +437,7 @@ class ModelTest(TestCase):
         related_sixth_book = Book.get_related_objects_selected_book(self.anonymous_user, sixth_book.id)
 
         self.assertEqual(related_third_book['book'], third_book)
-        self.assertEqual(related_third_book['avg_book_rating'], {'rating__avg': 6.0})
+        self.assertEqual(related_third_book['avg_book_rating'], 6.0)
         self.assertEqual(related_third_book['book_rating_count'], 3)
         self.assertEqual(related_third_book['added_book'], None)
         self.assertEqual(related_third_book['comments'].count(), 1)
@@ -443,7 +445,7 @@ class ModelTest(TestCase):
                          BookComment.objects.filter(id_book=third_book).order_by('-id')[0])
 
         self.assertEqual(related_sixth_book['book'], sixth_book)
-        self.assertEqual(related_sixth_book['avg_book_rating'], {'rating__avg': 4.0})
+        self.assertEqual(related_sixth_book['avg_book_rating'], 4.0)
         self.assertEqual(related_sixth_book['book_rating_count'], 1)
         self.assertEqual(related_sixth_book['added_book'], None)
         self.assertEqual(related_sixth_book['comments'].count(), 0)
@@ -455,7 +457,7 @@ class ModelTest(TestCase):
         related_third_book = Book.get_related_objects_selected_book(self.anonymous_user, third_book.id)
 
         self.assertEqual(related_third_book['book'], third_book)
-        self.assertEqual(related_third_book['avg_book_rating'], {'rating__avg': 7.0})
+        self.assertEqual(related_third_book['avg_book_rating'], 7.0)
         self.assertEqual(related_third_book['book_rating_count'], 4)
         self.assertEqual(related_third_book['added_book'], None)
         self.assertEqual(related_third_book['comments'].count(), 2)
@@ -491,7 +493,7 @@ class ModelTest(TestCase):
         )
 
         self.assertEqual(related_third_book['book'], third_book)
-        self.assertEqual(related_third_book['avg_book_rating'], {'rating__avg': 6.0})
+        self.assertEqual(related_third_book['avg_book_rating'], 6.0)
         self.assertEqual(related_third_book['book_rating_count'], 3)
         self.assertEqual(related_third_book['added_book'],
                          AddedBook.objects.get(id_book=third_book, id_user=self.the_user1))
@@ -664,21 +666,6 @@ class ModelTest(TestCase):
         self.assertEqual(Book.generate_books(books)[0], Utils.generate_sort_dict(books[0]))
         self.assertEqual(Book.generate_books(books)[6], Utils.generate_sort_dict(books[6]))
 
-    # ------------------------------------------------------------------------------------------------------------------
-    def test_fetch_books(self):
-        """
-        Must generate list of dicts with Books data depending on different criteria.
-        """
-        self.assertTrue(isinstance(Book.fetch_books('book'), list))
-
-        self.assertEqual(len(Book.fetch_books('Second Book')), 1)
-        self.assertEqual(len(Book.fetch_books('book')), 7)
-        self.assertEqual(len(Book.fetch_books('ook')), 7)
-        self.assertEqual(len(Book.fetch_books('trueAuthorNew')), 3)
-        self.assertEqual(len(Book.fetch_books('author')), 7)
-        self.assertEqual(len(Book.fetch_books('new')), 3)
-        self.assertEqual(len(Book.fetch_books('True')), 3)
-
     # ------------------------------------------------------------------------------------------------------------------
     def test_generate_existing_books(self):
         """
@@ -830,6 +817,41 @@ class ModelTest(TestCase):
         self.assertEqual(AddedBook.get_count_added(sixth_book.id), 3)
         self.assertEqual(AddedBook.get_count_added(not_existing_id), 0)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_readers_count(self):
+        """
+        Must keep the readers counter of book in sync with added books.
+        """
+        fifth_book = Book.objects.get(book_name='Fifth Book')
+        readers_count = fifth_book.readers_count
+
+        added_book = AddedBook.objects.create(id_user=self.the_user5, id_book=fifth_book)
+        added_book.save()
+        self.assertEqual(Book.objects.get(id=fifth_book.id).readers_count, readers_count + 1)
+
+        added_book.delete()
+        self.assertEqual(Book.objects.get(id=fifth_book.id).readers_count, readers_count)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_rebuild_readers_command(self):
+        Book.objects.update(readers_count=0)
+
+        with mock.patch('builtins.print'):
+            call_command('rebuildreaders')
+
+        self.assertEqual(Book.objects.get(book_name='Third Book').readers_count, 2)
+        self.assertEqual(Book.objects.get(book_name='Sixth Book').readers_count, 4)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_sort_by_readable_queries(self):
+        """
+        Must fetch the most readable books by one query.
+        """
+        with self.assertNumQueries(1):
+            books = Book.sort_by_readable(self.anonymous_user, count=None)
+
+        self.assertEqual(books[0]['id'], Book.objects.get(book_name='Sixth Book').id)
+
     # ------------------------------------------------------------------------------------------------------------------
     def test_book_rating(self):
         self.assertEqual(BookRating.objects.all().count(), 6)
@@ -874,6 +896,56 @@ class ModelTest(TestCase):
         self.assertEqual(BookRating.objects.filter(rating=4).count(), 2)
         self.assertEqual(BookRating.objects.filter(rating=3).count(), 2)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_book_rating_counters(self):
+        """
+        Must update the precomputed rating counters of book after creating, changing and removing ratings.
+        """
+        third_book = Book.objects.get(book_name='Third Book')
+
+        self.assertEqual(third_book.rating_sum, 18)
+        self.assertEqual(third_book.rating_count, 3)
+        self.assertEqual(third_book.avg_rating, 6.0)
+        self.assertEqual(third_book.get_rating_histogram(),
+                         {1: 0, 2: 0, 3: 1, 4: 0, 5: 1, 6: 0, 7: 0, 8: 0, 9: 0, 10: 1})
+
+        changed_rating = BookRating.objects.get(id_book=third_book, id_user=self.the_user2)
+        changed_rating.rating = 8
+        changed_rating.save()
+        BookRating.objects.create(id_book=third_book, id_user=self.the_user6, rating=8)
+        BookRating.objects.get(id_book=third_book, id_user=self.the_user1).delete()
+
+        third_book.refresh_from_db()
+        self.assertEqual(third_book.rating_sum, 19)
+        self.assertEqual(third_book.rating_count, 3)
+        self.assertEqual(third_book.get_rating_histogram()[8], 2)
+        self.assertEqual(third_book.get_rating_histogram()[10], 0)
+
+        fifth_book = Book.objects.get(book_name='Fifth Book')
+        self.assertEqual(fifth_book.rating_count, 0)
+        self.assertEqual(fifth_book.avg_rating, None)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('builtins.print', new=mock.Mock())
+    def test_rebuild_ratings_command(self):
+        Book.objects.update(rating_sum=0, rating_count=0)
+
+        call_command('rebuildratings')
+
+        third_book = Book.objects.get(book_name='Third Book')
+        self.assertEqual(third_book.rating_sum, 18)
+        self.assertEqual(third_book.rating_count, 3)
+        self.assertEqual(third_book.get_rating_histogram()[5], 1)
+        self.assertEqual(Book.objects.get(book_name='Fifth Book').rating_count, 0)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_sort_by_estimation_queries(self):
+        """
+        Must not run separate query for rating of each book.
+        """
+        with self.assertNumQueries(1):
+            Book.sort_by_estimation(self.anonymous_user, self.category1)
+
     # ------------------------------------------------------------------------------------------------------------------
     def test_book_comment(self):
         self.assertEqual(BookComment.objects.all().count(), 5)
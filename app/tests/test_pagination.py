@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+from django.test import TestCase
+
+from ..models import Category
+from ..pagination import (InvalidCursor, encode_cursor, decode_cursor, get_ordering, paginate_by_cursor,
+                          paginate_list_by_cursor)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class PaginationTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        cls.categories = [Category.objects.create(category_name=name) for name in ('b', 'a', 'c', 'a', 'b')]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def collect_pages(self, ordering, per_page):
+        objects = []
+        cursor = ''
+
+        while True:
+            page = paginate_by_cursor(Category.objects.all(), ordering, cursor, per_page)
+            objects.extend(page.object_list)
+
+            if not page.has_next():
+                return objects
+
+            cursor = page.next_cursor
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_encode_decode_cursor(self):
+        self.assertEqual(decode_cursor(encode_cursor(['Книга', 15])), ['Книга', 15])
+
+        for cursor in ('not-a-cursor', encode_cursor({'id': 1})[:-2], encode_cursor(15)):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_ordering(self):
+        self.assertEqual(get_ordering(('book_name',)), ('book_name', 'id'))
+        self.assertEqual(get_ordering(('-id',)), ('-id',))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_paginate_by_cursor(self):
+        """
+        Must return all objects once in the order of the fields with equal values ordered by the tiebreaker.
+        """
+        expected = list(Category.objects.order_by('category_name', 'id'))
+
+        self.assertEqual(self.collect_pages(('category_name',), 2), expected)
+        self.assertEqual(self.collect_pages(('category_name',), 5), expected)
+        self.assertEqual(self.collect_pages(('-category_name',), 2),
+                         list(Category.objects.order_by('-category_name', 'id')))
+        self.assertEqual(self.collect_pages(('-id',), 3), list(Category.objects.order_by('-id')))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_paginate_by_cursor_queries(self):
+        """
+        Must fetch the page by one query without counting the objects.
+        """
+        cursor = paginate_by_cursor(Category.objects.all(), ('category_name',), '', 2).next_cursor
+
+        with self.assertNumQueries(1):
+            page = paginate_by_cursor(Category.objects.all(), ('category_name',), cursor, 2)
+
+        self.assertEqual(len(page.object_list), 2)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_paginate_by_cursor_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            paginate_by_cursor(Category.objects.all(), ('category_name',), encode_cursor([1]), 2)
+
+        with self.assertRaises(InvalidCursor):
+            paginate_by_cursor(Category.objects.all(), ('-id',), encode_cursor(['abc']), 2)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_paginate_list_by_cursor(self):
+        items = list(range(5))
+        first_page = paginate_list_by_cursor(items, '', 2)
+        second_page = paginate_list_by_cursor(items, first_page.next_cursor, 2)
+        last_page = paginate_list_by_cursor(items, second_page.next_cursor, 2)
+
+        self.assertEqual(first_page.object_list, [0, 1])
+        self.assertEqual(second_page.object_list, [2, 3])
+        self.assertEqual(last_page.object_list, [4])
+        self.assertFalse(last_page.has_next())
+
+        with self.assertRaises(InvalidCursor):
+            paginate_list_by_cursor([], encode_cursor([-1]), 2)
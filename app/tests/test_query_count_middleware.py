@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from django.db import connection
+from django.shortcuts import reverse
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..middleware.query_count_middleware import view_queries_recorded
+from .utils import query_budget
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class QueryCountMiddlewareTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        self.client = Client()
+        self.recorded = []
+
+        view_queries_recorded.connect(self.record)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def tearDown(self):
+        view_queries_recorded.disconnect(self.record)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def record(self, sender, view_name=None, query_count=0, **kwargs):
+        self.recorded.append((view_name, query_count))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @override_settings(DEBUG=True)
+    def test_debug_headers(self):
+        response = self.client.get(reverse('about'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.recorded, [('about', int(response['X-Query-Count']))])
+        self.assertIn('X-Query-Time-Ms', response)
+        self.assertIn('X-Wall-Time-Ms', response)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_no_headers_without_debug(self):
+        response = self.client.get(reverse('about'))
+
+        self.assertNotIn('X-Query-Count', response)
+        self.assertEqual(self.recorded[0][0], 'about')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_query_count(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('about'))
+
+        self.assertEqual(self.recorded, [('about', len(context.captured_queries))])
+        self.assertGreater(len(context.captured_queries), 0)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_query_log_not_used(self):
+        connection.queries_log.clear()
+
+        self.client.get(reverse('about'))
+
+        self.assertGreater(self.recorded[0][1], 0)
+        self.assertEqual(len(connection.queries_log), 0)
+        self.assertNotIn('cursor', connection.__dict__)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_query_budget(self):
+        """
+        Must fail the test if the view made more queries than its budget.
+        """
+        @query_budget(about=0)
+        def test_about(test_case):
+            test_case.client.get(reverse('about'))
+
+        with self.assertRaisesRegex(AssertionError, 'about made [1-9][0-9]* queries, budget is 0'):
+            test_about(self)
+
+        query_budget(about=self.recorded[0][1])(test_about.__wrapped__)(self)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, mock
+
+from .. import reading_progress
+from ..models import TheUser, Category, Author, Language, Book, AddedBook
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class ReadingProgressTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(category_name='progress_category')
+        author = Author.objects.create(author_name='progress_author')
+        language = Language.objects.create(language='English')
+
+        cls.the_users = []
+        for number in range(2):
+            user = User.objects.create_user('progress_user{}'.format(number), 'progress_user@user.com', 'password')
+            cls.the_users.append(TheUser.objects.get(id_user=user))
+
+        with open(os.path.join(TEST_DATA_DIR, 'test_book.pdf'), 'rb') as book_file:
+            book_data = book_file.read()
+
+        cls.book = Book.objects.create(book_name='progress_book', id_author=author, id_category=category,
+                                       language=language, book_file=SimpleUploadedFile('book.pdf', book_data),
+                                       who_added=cls.the_users[0])
+
+        cls.added_books = [AddedBook.objects.create(id_user=the_user, id_book=cls.book) for the_user in cls.the_users]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def tearDownClass(cls):
+        if os.path.exists(cls.book.book_file.path):
+            os.remove(cls.book.book_file.path)
+
+        super().tearDownClass()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        cache.clear()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_pages(self):
+        return [AddedBook.objects.get(id=added_book.id).last_page for added_book in self.added_books]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_record_progress(self):
+        for page in (5, 6, 7):
+            reading_progress.record_progress(self.the_users[0].id, self.book.id, page)
+
+        self.assertEqual(reading_progress.get_progress(self.the_users[0].id, self.book.id)['last_page'], 7)
+        self.assertIsNone(reading_progress.get_progress(self.the_users[1].id, self.book.id))
+
+        # The changes of the same added book are logged once until the flush.
+        self.assertEqual(cache.get(reading_progress.SEQUENCE_KEY), 1)
+        self.assertEqual(self.get_pages(), [1, 1])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_flush_progress(self):
+        reading_progress.record_progress(self.the_users[0].id, self.book.id, 10)
+        reading_progress.record_progress(self.the_users[1].id, self.book.id, 20)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(reading_progress.flush_progress(), 2)
+
+        self.assertEqual(self.get_pages(), [10, 20])
+        self.assertEqual(AddedBook.objects.get(id=self.added_books[1].id).last_read,
+                         reading_progress.get_progress(self.the_users[1].id, self.book.id)['last_read'])
+
+        # The change after the flush is logged again, the flushed changes are not written twice.
+        reading_progress.record_progress(self.the_users[0].id, self.book.id, 11)
+
+        self.assertEqual(reading_progress.flush_progress(), 1)
+        self.assertEqual(reading_progress.flush_progress(), 0)
+        self.assertEqual(self.get_pages(), [11, 20])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_flush_progress_locked(self):
+        reading_progress.record_progress(self.the_users[0].id, self.book.id, 10)
+        cache.set(reading_progress.FLUSH_LOCK_KEY, True)
+
+        self.assertEqual(reading_progress.flush_progress(), 0)
+        self.assertEqual(self.get_pages(), [1, 1])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_update_reading_progress_batches(self):
+        progress = reading_progress.get_progress
+
+        for number, the_user in enumerate(self.the_users):
+            reading_progress.record_progress(the_user.id, self.book.id, 30 + number)
+
+        with self.assertNumQueries(2):
+            AddedBook.update_reading_progress({(the_user.id, self.book.id): progress(the_user.id, self.book.id)
+                                               for the_user in self.the_users}, batch_size=1)
+
+        self.assertEqual(self.get_pages(), [30, 31])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_remove_added_book_clears_progress(self):
+        reading_progress.record_progress(self.the_users[0].id, self.book.id, 10)
+        AddedBook.objects.get(id=self.added_books[0].id).delete()
+
+        self.assertIsNone(reading_progress.get_progress(self.the_users[0].id, self.book.id))
+        self.assertEqual(reading_progress.flush_progress(), 0)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_flush_waits_for_reserved_entry(self):
+        reading_progress.record_progress(self.the_users[0].id, self.book.id, 10)
+
+        # The second change took the number of log entry, but did not write the entry yet.
+        cache.add(reading_progress.get_dirty_key(self.the_users[1].id, self.book.id), True)
+        cache.set(reading_progress.get_progress_key(self.the_users[1].id, self.book.id),
+                  {'last_page': 20, 'last_read': reading_progress.timezone.now()})
+        number = cache.incr(reading_progress.SEQUENCE_KEY)
+
+        self.assertEqual(reading_progress.flush_progress(), 1)
+        self.assertEqual(cache.get(reading_progress.FLUSHED_KEY), number - 1)
+
+        cache.set(reading_progress.get_entry_key(number), (self.the_users[1].id, self.book.id))
+
+        self.assertEqual(reading_progress.flush_progress(), 1)
+        self.assertEqual(self.get_pages(), [10, 20])
+        self.assertIsNone(cache.get(reading_progress.get_dirty_key(self.the_users[1].id, self.book.id)))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_flush_skips_lost_entry(self):
+        reading_progress.record_progress(self.the_users[0].id, self.book.id, 10)
+        reading_progress.record_progress(self.the_users[1].id, self.book.id, 20)
+        cache.delete(reading_progress.get_entry_key(1))
+
+        with mock.patch('app.reading_progress.time.time', return_value=1000):
+            self.assertEqual(reading_progress.flush_progress(), 0)
+
+        with mock.patch('app.reading_progress.time.time', return_value=1000 + reading_progress.MISSING_ENTRY_TIMEOUT):
+            self.assertEqual(reading_progress.flush_progress(), 1)
+
+        self.assertEqual(self.get_pages(), [1, 20])
+        self.assertEqual(cache.get(reading_progress.FLUSHED_KEY), 2)
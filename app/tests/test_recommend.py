@@ -2,12 +2,13 @@
 
 import os
 
+import numpy as np
 from django.contrib import auth
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase, Client
+from django.test import TestCase, Client, mock
 
-from ..models import TheUser, Category, Author, Language, Book, AddedBook
+from ..models import TheUser, Category, Author, Language, Book, AddedBook, BookNeighbour
 from .. import recommend
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -102,3 +103,100 @@ class RecommendTest(TestCase):
                 os.remove(book.photo.path)
 
         recommend.START_RECOMMEND = 10
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_build_neighbours(self):
+        """
+        Must score the pairs of books by the cosine of readers and keep only the top neighbours of each book.
+        """
+        user_ids = np.array([1, 1, 1, 2, 2, 3, 3, 3])
+        book_ids = np.array([10, 20, 30, 10, 20, 10, 30, 30])
+
+        book_ids, neighbour_ids, scores = recommend.build_neighbours(user_ids, book_ids, 1)
+
+        self.assertEqual(list(book_ids), [10, 20, 30])
+        self.assertEqual(list(neighbour_ids), [20, 10, 10])
+        self.assertAlmostEqual(scores[0], 2 / np.sqrt(3 * 2))
+        self.assertAlmostEqual(scores[2], 2 / np.sqrt(2 * 3))
+
+        book_ids, neighbour_ids, scores = recommend.build_neighbours(np.array([1]), np.array([10]))
+        self.assertEqual(len(book_ids), 0)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_rebuild_neighbours(self):
+        self.assertEqual(recommend.rebuild_neighbours(), 4)
+        self.assertEqual(
+            set(BookNeighbour.objects.values_list('id_book', 'id_neighbour')),
+            {(self.book1.id, self.book7.id), (self.book7.id, self.book1.id),
+             (self.book2.id, self.book7.id), (self.book7.id, self.book2.id)}
+        )
+
+        AddedBook.objects.all().delete()
+        self.assertEqual(recommend.rebuild_neighbours(), 0)
+        self.assertFalse(BookNeighbour.objects.exists())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('app.recommend.INSERT_CHUNK_SIZE', 3)
+    def test_rebuild_neighbours_chunks(self):
+        bulk_create = BookNeighbour.objects.bulk_create
+        chunk_sizes = []
+
+        def insert_chunk(objs):
+            objs = list(objs)
+            chunk_sizes.append(len(objs))
+            return bulk_create(objs)
+
+        with mock.patch.object(BookNeighbour.objects, 'bulk_create', insert_chunk):
+            self.assertEqual(recommend.rebuild_neighbours(), 4)
+
+        self.assertEqual(chunk_sizes, [3, 1])
+        self.assertEqual(BookNeighbour.objects.count(), 4)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_recommend_by_neighbours(self):
+        """
+        Must return the similar books first and fill the rest by random books without added and extra books.
+        """
+        recommend.rebuild_neighbours()
+
+        recommend_books = recommend.get_recommend(self.user1, AddedBook.get_user_added_books(self.user1), 3, [])
+        self.assertEqual(recommend_books[0], self.book2)
+        self.assertEqual(len(set(recommend_books)), 3)
+        self.assertNotIn(self.book1, recommend_books)
+
+        recommend_books = recommend.get_recommend(
+            self.user2, AddedBook.get_user_added_books(self.user2), 3, [self.book1.id]
+        )
+        self.assertEqual(len(recommend_books), 3)
+        self.assertFalse({self.book1, self.book2, self.book7} & set(recommend_books))
+
+        self.assertEqual(len(recommend.get_recommend(self.anonymous_user, [], 3, [])), 3)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_by_neighbours_private_books(self):
+        """
+        Must not return the private books of other users.
+        """
+        AddedBook.objects.create(id_user=self.the_user1, id_book=self.book6)
+        recommend.rebuild_neighbours()
+
+        self.assertEqual(
+            recommend.get_by_neighbours(self.user2, AddedBook.get_user_added_books(self.user2), 5, []), [self.book1]
+        )
+        self.assertEqual(
+            recommend.get_by_neighbours(self.user1, AddedBook.get_user_added_books(self.user1), 5, []), [self.book2]
+        )
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_by_neighbours_blocked_books(self):
+        """
+        Must not return the blocked books.
+        """
+        recommend.rebuild_neighbours()
+        added_books = AddedBook.get_user_added_books(self.user1)
+
+        self.assertIn(self.book2, recommend.get_by_neighbours(self.user1, added_books, 5, []))
+
+        Book.objects.filter(id=self.book2.id).update(blocked_book=True)
+
+        self.assertNotIn(self.book2, recommend.get_by_neighbours(self.user1, added_books, 5, []))
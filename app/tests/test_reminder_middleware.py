@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.shortcuts import reverse
+from django.test import TestCase, Client, RequestFactory, mock
+from django.test.utils import CaptureQueriesContext
+
+from ..middleware.reminder_middleware import (ReminderMiddleware, REMINDER_COOKIE, SHOW_REMINDER_COUNT,
+                                              get_web_reminders)
+from ..middleware.the_user_middleware import TheUserMiddleware
+from ..models import TheUser
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class ReminderMiddlewareTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reminder_user', 'reminder_user@user.com', 'Dummy#password')
+        cls.the_user = TheUser.objects.get(id_user=cls.user)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        cache.clear()
+        self.middleware = ReminderMiddleware(lambda request: HttpResponse())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def make_request(self, path='/', counter=None, user=None):
+        """
+        Returns the request of the user which passed the middleware and the response.
+        """
+        request = RequestFactory().get(path)
+        request.user = user or self.user
+
+        if counter is not None:
+            request.COOKIES[REMINDER_COOKIE] = self.sign_counter(counter)
+
+        return request, TheUserMiddleware(self.middleware)(request)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def sign_counter(self, counter):
+        response = HttpResponse()
+        self.middleware.set_counter(response, counter)
+
+        return response.cookies[REMINDER_COOKIE].value
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_counter_in_signed_cookie(self):
+        request, response = self.make_request()
+
+        self.assertIsNone(request.reminder)
+        self.assertEqual(response.cookies[REMINDER_COOKIE].value, self.sign_counter(0))
+
+        request, response = self.make_request(counter=10)
+
+        self.assertIsNone(request.reminder)
+        self.assertEqual(response.cookies[REMINDER_COOKIE].value, self.sign_counter(11))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_forged_counter(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        request.COOKIES[REMINDER_COOKIE] = '{}'.format(SHOW_REMINDER_COUNT)
+
+        response = self.middleware(request)
+
+        self.assertIsNone(request.reminder)
+        self.assertEqual(response.cookies[REMINDER_COOKIE].value, self.sign_counter(0))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_show_reminder(self):
+        with mock.patch('app.middleware.reminder_middleware.random.choice', side_effect=sorted) as choice_mock:
+            request, response = self.make_request(counter=SHOW_REMINDER_COUNT - 1)
+
+        self.assertEqual(choice_mock.call_count, 1)
+        self.assertEqual(request.reminder, ['app_download', 'fb_group', 'fb_page', 'twitter', 'vk'])
+        self.assertEqual(response.cookies[REMINDER_COOKIE].value, self.sign_counter(0))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_show_reminder_disabled(self):
+        self.the_user.update_reminder('disabled_all', True)
+
+        request, response = self.make_request(counter=SHOW_REMINDER_COUNT - 1)
+
+        self.assertIsNone(request.reminder)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_skipped_requests(self):
+        for request, response in (self.make_request(user=AnonymousUser()), self.make_request('/static/app.js'),
+                                  self.make_request('/media/book_cover/cover.png')):
+            self.assertIsNone(request.reminder)
+            self.assertNotIn(REMINDER_COOKIE, response.cookies)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_web_reminders_cached(self):
+        request, response = self.make_request()
+
+        with self.assertNumQueries(1):
+            get_web_reminders(request)
+            get_web_reminders(request)
+
+        self.the_user.update_reminder('fb_page', False)
+
+        with self.assertNumQueries(1):
+            self.assertFalse(get_web_reminders(self.make_request()[0])['fb_page'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_requests_not_save_session(self):
+        client = Client()
+        client.login(username='reminder_user', password='Dummy#password')
+
+        for number in range(SHOW_REMINDER_COUNT + 1):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(reverse('update_reminder'))
+
+            self.assertEqual(response.status_code, 404)
+            self.assertFalse([query for query in context.captured_queries
+                              if query['sql'].startswith(('UPDATE', 'INSERT')) and 'django_session' in query['sql']])
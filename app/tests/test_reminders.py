@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, mock
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import get_token_key
+from ..middleware.reminder_middleware import get_web_reminders_key
+from ..models import TheUser
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class RemindersTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            User.objects.create_user('reminders_user{}'.format(number), 'reminders{}@user.com'.format(number), 'pass')
+
+        cls.the_users = list(TheUser.objects.order_by('id'))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        cache.clear()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_default_reminders(self):
+        the_user = self.the_users[0]
+
+        self.assertEqual(the_user.reminder_flags, TheUser.DEFAULT_REMINDER_FLAGS)
+        self.assertEqual(the_user.get_api_reminders(), {'fb_page': True, 'fb_group': True, 'twitter': True, 'vk': True,
+                                                        'disabled_all': False, 'app_rate': True})
+        self.assertEqual(the_user.get_web_reminders(), {'fb_page': True, 'fb_group': True, 'twitter': True, 'vk': True,
+                                                        'disabled_all': False, 'app_download': True})
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_update_reminder_single_column(self):
+        the_user = TheUser.objects.get(id=self.the_users[0].id)
+
+        with CaptureQueriesContext(connection) as context:
+            the_user.update_reminder('fb_page', False)
+            the_user.update_reminder('disabled_all', True)
+            the_user.update_reminder('not_existing', True)
+
+        self.assertEqual(len(context.captured_queries), 2)
+        for query in context.captured_queries:
+            self.assertTrue(query['sql'].startswith('UPDATE'))
+            self.assertIn('SET "reminder_flags" =', query['sql'].replace('`', '"'))
+            self.assertNotIn('"subscription"', query['sql'])
+
+        reminders = TheUser.objects.get(id=the_user.id).get_web_reminders()
+
+        self.assertFalse(reminders['fb_page'])
+        self.assertTrue(reminders['disabled_all'])
+        self.assertTrue(reminders['fb_group'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_update_reminder_removes_cached_web_reminders(self):
+        the_user = self.the_users[0]
+        cache.set(get_web_reminders_key(the_user.id_user_id), {'fb_page': True})
+
+        the_user.update_reminder('fb_page', False)
+
+        self.assertIsNone(cache.get(get_web_reminders_key(the_user.id_user_id)))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_decoded_reminders_memoized(self):
+        TheUser.decode_reminders.cache_clear()
+
+        for the_user in self.the_users:
+            the_user.get_web_reminders()
+
+        self.assertEqual(TheUser.decode_reminders.cache_info().misses, 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_convert_reminders(self):
+        stored_reminder = json.dumps({
+            'common': {'fb_page': False, 'fb_group': True, 'twitter': True, 'vk': False, 'disabled_all': True},
+            'api': {'app_rate': False},
+            'web': {'app_download': True}
+        })
+        TheUser.objects.filter(id__in=[self.the_users[0].id, self.the_users[1].id]).update(reminder=stored_reminder)
+        TheUser.objects.filter(id=self.the_users[2].id).update(reminder='not json')
+        cache.set(get_web_reminders_key(self.the_users[0].id_user_id), {'fb_page': True})
+
+        with mock.patch('builtins.print'):
+            call_command('convertreminders', batch_size=2)
+
+        for the_user in self.the_users[:2]:
+            the_user = TheUser.objects.get(id=the_user.id)
+
+            self.assertEqual(the_user.reminder, '')
+            self.assertEqual(the_user.get_api_reminders(), {'fb_page': False, 'fb_group': True, 'twitter': True,
+                                                            'vk': False, 'disabled_all': True, 'app_rate': False})
+            self.assertTrue(the_user.get_web_reminders()['app_download'])
+
+        self.assertEqual(TheUser.objects.get(id=self.the_users[2].id).reminder_flags, TheUser.DEFAULT_REMINDER_FLAGS)
+        self.assertIsNone(cache.get(get_web_reminders_key(self.the_users[0].id_user_id)))
+
+        # The converted users are skipped, so the changed reminders are not overwritten.
+        TheUser.objects.get(id=self.the_users[0].id).update_reminder('fb_page', True)
+
+        with mock.patch('builtins.print'):
+            call_command('convertreminders')
+
+        self.assertTrue(TheUser.objects.get(id=self.the_users[0].id).get_web_reminders()['fb_page'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_unconverted_reminders(self):
+        stored_reminder = json.dumps({'common': {'fb_page': False, 'disabled_all': True}, 'web': {}})
+        TheUser.objects.filter(id=self.the_users[0].id).update(reminder=stored_reminder)
+
+        the_user = TheUser.objects.get(id=self.the_users[0].id)
+
+        self.assertFalse(the_user.get_web_reminders()['fb_page'])
+        self.assertTrue(the_user.get_web_reminders()['disabled_all'])
+
+        the_user.update_reminder('vk', False)
+
+        the_user = TheUser.objects.get(id=the_user.id)
+        self.assertEqual(the_user.reminder, '')
+        self.assertEqual(the_user.get_web_reminders(), {'fb_page': False, 'fb_group': True, 'twitter': True,
+                                                        'vk': False, 'disabled_all': True, 'app_download': True})
+
+        with mock.patch('builtins.print'):
+            call_command('convertreminders')
+
+        self.assertFalse(TheUser.objects.get(id=the_user.id).get_web_reminders()['vk'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_convert_reminders_skips_changed_users(self):
+        stored_reminder = json.dumps({'common': {'fb_page': False}})
+        TheUser.objects.filter(id=self.the_users[0].id).update(reminder=stored_reminder)
+
+        parse_reminder_flags = TheUser.parse_reminder_flags
+
+        # The user changes the reminders between the select and the update of the command.
+        def change_reminders(reminder):
+            TheUser.objects.filter(id=self.the_users[0].id).update(reminder_flags=TheUser.DEFAULT_REMINDER_FLAGS,
+                                                                   reminder='')
+            return parse_reminder_flags(reminder)
+
+        with mock.patch('builtins.print'), mock.patch.object(TheUser, 'parse_reminder_flags',
+                                                             staticmethod(change_reminders)):
+            call_command('convertreminders')
+
+        self.assertTrue(TheUser.objects.get(id=self.the_users[0].id).get_web_reminders()['fb_page'])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_convert_reminders_removes_cached_api_user(self):
+        TheUser.objects.filter(id=self.the_users[0].id).update(auth_token='reminders_token', reminder='{}')
+        cache.set(get_token_key('reminders_token'), self.the_users[0])
+
+        with mock.patch('builtins.print'):
+            call_command('convertreminders')
+
+        self.assertIsNone(cache.get(get_token_key('reminders_token')))
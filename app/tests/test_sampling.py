@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from django.contrib import auth
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client
+
+from ..models import TheUser, Category, Author, Language, Book
+from .. import sampling
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class SamplingTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        client = Client()
+        cls.anonymous_user = auth.get_user(client)
+
+        cls.user1 = User.objects.create_user('sampling_user1', 'sampling_user1@user1.com', 'testpassword1')
+        cls.user2 = User.objects.create_user('sampling_user2', 'sampling_user2@user2.com', 'testpassword2')
+        cls.the_user1 = TheUser.objects.get(id_user=cls.user1)
+        cls.the_user2 = TheUser.objects.get(id_user=cls.user2)
+
+        cls.category1 = Category.objects.create(category_name='sampling_category1')
+        cls.category2 = Category.objects.create(category_name='sampling_category2')
+        cls.language = Language.objects.create(language='English')
+        cls.author = Author.objects.create(author_name='Sampling Author')
+
+        cls.book1 = cls.create_book('book1', cls.category1, cls.the_user1)
+        cls.book2 = cls.create_book('book2', cls.category1, cls.the_user2)
+        cls.book3 = cls.create_book('book3', cls.category2, cls.the_user2)
+        cls.blocked_book = cls.create_book('blocked', cls.category1, cls.the_user1, blocked=True)
+        cls.private_book = cls.create_book('private', cls.category1, cls.the_user2, private=True)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def create_book(cls, name, category, who_added, private=False, blocked=False):
+        test_book_path = os.path.join(TEST_DATA_DIR, 'test_book.pdf')
+
+        return Book.objects.create(
+            book_name=name,
+            id_author=cls.author,
+            id_category=category,
+            language=cls.language,
+            book_file=SimpleUploadedFile('test_book.pdf', open(test_book_path, 'rb').read()),
+            who_added=who_added,
+            private_book=private,
+            blocked_book=blocked
+        )
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def tearDownClass(cls):
+        for book in Book.objects.all():
+            if os.path.exists(book.book_file.path):
+                os.remove(book.book_file.path)
+
+        super().tearDownClass()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        cache.clear()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_eligible_book_ids(self):
+        self.assertEqual(list(sampling.get_eligible_book_ids(self.anonymous_user, self.category1.id)),
+                         [self.book1.id, self.book2.id])
+        self.assertEqual(list(sampling.get_eligible_book_ids(self.user2, self.category1.id)),
+                         [self.book1.id, self.book2.id, self.private_book.id])
+        self.assertEqual(list(sampling.get_eligible_book_ids(self.user1, self.category1.id, [self.book1.id])),
+                         [self.book2.id])
+        self.assertEqual(list(sampling.get_eligible_book_ids(self.anonymous_user)),
+                         [self.book1.id, self.book2.id, self.book3.id])
+        self.assertEqual(list(sampling.get_eligible_book_ids(self.user2, excluded=[self.book2.id, str(self.book3.id)])),
+                         [self.book1.id, self.private_book.id])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_cached_book_ids(self):
+        """
+        Must generate the arrays of all categories by one query, take them from the cache after and refresh them
+        after changing the books of the category.
+        """
+        with self.assertNumQueries(1):
+            sampling.get_public_book_ids([self.category1.id, self.category2.id])
+
+        with self.assertNumQueries(0):
+            sampling.get_public_book_ids([self.category1.id, self.category2.id])
+
+        new_book = self.create_book('new book', self.category2, self.the_user1)
+        self.assertEqual(list(sampling.get_public_book_ids([self.category2.id])[self.category2.id]),
+                         [self.book3.id, new_book.id])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_cached_all_book_ids(self):
+        """
+        Must take the array of all categories from the cache and refresh it after changing the books of any category.
+        """
+        with self.assertNumQueries(2):
+            sampling.get_all_public_book_ids()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(list(sampling.get_all_public_book_ids()), [self.book1.id, self.book2.id, self.book3.id])
+
+        new_book = self.create_book('new book', self.category2, self.the_user1)
+        self.assertEqual(list(sampling.get_all_public_book_ids()),
+                         [self.book1.id, self.book2.id, self.book3.id, new_book.id])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_sample_books(self):
+        """
+        Must hydrate the sampled books by one query and return all books if there are not more than needed.
+        """
+        book_ids = [self.book3.id, self.book1.id, self.book2.id]
+
+        with self.assertNumQueries(1):
+            books = sampling.sample_books(book_ids, 2)
+
+        self.assertEqual(len(set(books)), 2)
+        self.assertTrue(set(books) <= {self.book1, self.book2, self.book3})
+
+        self.assertEqual(sampling.sample_books(book_ids, 5), [self.book1, self.book2, self.book3])
+        self.assertEqual(sampling.sample_books([], 5), [])
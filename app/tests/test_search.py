@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from django.contrib import auth
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client, mock
+
+from ..models import TheUser, Category, Author, Language, Book, SearchToken
+from .. import search
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class SearchTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        client = Client()
+        cls.anonymous_user = auth.get_user(client)
+
+        cls.user1 = User.objects.create_user('search_user1', 'search_user1@user1.com', 'testpassword1')
+        cls.user2 = User.objects.create_user('search_user2', 'search_user2@user2.com', 'testpassword2')
+        cls.the_user1 = TheUser.objects.get(id_user=cls.user1)
+        cls.the_user2 = TheUser.objects.get(id_user=cls.user2)
+
+        cls.category = Category.objects.create(category_name='category')
+        cls.language = Language.objects.create(language='English')
+
+        cls.author1 = Author.objects.create(author_name='Best Author 1')
+        cls.author2 = Author.objects.create(author_name='trueAuthorNew')
+        cls.author3 = Author.objects.create(author_name='Фёдор Достоевский')
+
+        cls.book1 = cls.create_book('First Book', cls.author1, cls.the_user1, True)
+        cls.book2 = cls.create_book('Second Book', cls.author2, cls.the_user2)
+        cls.book3 = cls.create_book('Notebook', cls.author2, cls.the_user2)
+        cls.book4 = cls.create_book('Book', cls.author1, cls.the_user2)
+        cls.book5 = cls.create_book('Идиот', cls.author3, cls.the_user2)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def create_book(cls, name, author, who_added, private=False):
+        test_book_path = os.path.join(TEST_DATA_DIR, 'test_book.pdf')
+
+        return Book.objects.create(
+            book_name=name,
+            id_author=author,
+            id_category=cls.category,
+            language=cls.language,
+            book_file=SimpleUploadedFile('test_book.pdf', open(test_book_path, 'rb').read()),
+            who_added=who_added,
+            private_book=private
+        )
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_normalize(self):
+        self.assertEqual(search.normalize('  The <Best>   Book_1 '), 'the best book 1')
+        self.assertEqual(search.normalize('Фёдор ДОСТОЕВСКИЙ'), 'федор достоевскии')
+        self.assertEqual(search.normalize('Émile Zola'), 'emile zola')
+        self.assertEqual(search.normalize('&"<>'), '')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_generate_suffixes(self):
+        self.assertEqual(search.generate_suffixes(self.book4), {
+            'book', 'ook', 'ok', 'k', 'best', 'est', 'st', 't', 'author', 'uthor', 'thor', 'hor', 'or', 'r', '1'
+        })
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_find_book_ids(self):
+        """
+        Must return ids of books depending on different criteria.
+        """
+        self.assertTrue(isinstance(search.find_book_ids(self.user1, 'book'), list))
+
+        self.assertEqual(len(search.find_book_ids(self.user1, 'Second Book')), 1)
+        self.assertEqual(len(search.find_book_ids(self.user1, 'book')), 4)
+        self.assertEqual(len(search.find_book_ids(self.user1, 'ook')), 4)
+        self.assertEqual(len(search.find_book_ids(self.user1, 'trueAuthorNew')), 2)
+        self.assertEqual(len(search.find_book_ids(self.user1, 'author')), 4)
+        self.assertEqual(len(search.find_book_ids(self.user1, 'new')), 2)
+        self.assertEqual(len(search.find_book_ids(self.user1, 'True')), 2)
+        self.assertEqual(search.find_book_ids(self.user1, 'not_existing'), [])
+        self.assertEqual(search.find_book_ids(self.user1, '&"'), [])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_find_book_ids_ranking(self):
+        """
+        Must return exact matches at first, then matches by words beginning and then matches inside words.
+        """
+        self.assertEqual(search.find_book_ids(self.user1, 'book'),
+                         [self.book4.id, self.book1.id, self.book2.id, self.book3.id])
+        self.assertEqual(search.find_book_ids(self.user1, 'BOOK second'), [self.book2.id])
+        self.assertEqual(search.find_book_ids(self.user1, 'достоевский'), [self.book5.id])
+        self.assertEqual(search.find_book_ids(self.user1, 'федор'), [self.book5.id])
+        self.assertEqual(search.find_book_ids(self.user1, 'ИДИОТ'), [self.book5.id])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('app.search.MAX_CANDIDATES', 2)
+    def test_find_book_ids_limited_candidates(self):
+        """
+        Must select the limited count of books, the books where the word matches the whole end of word at first.
+        """
+        with self.assertNumQueries(1):
+            self.assertCountEqual(search.find_book_ids(self.user1, 'author'), [self.book1.id, self.book4.id])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_find_book_ids_private_books(self):
+        self.assertEqual(search.find_book_ids(self.user1, 'first'), [self.book1.id])
+        self.assertEqual(search.find_book_ids(self.user2, 'first'), [])
+        self.assertEqual(search.find_book_ids(self.anonymous_user, 'first'), [])
+        self.assertEqual(len(search.find_book_ids(self.anonymous_user, 'book')), 3)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_index_updated_by_signals(self):
+        self.book2.book_name = 'Renamed'
+        self.book2.save()
+
+        self.assertEqual(search.find_book_ids(self.user1, 'second'), [])
+        self.assertEqual(search.find_book_ids(self.user1, 'renamed'), [self.book2.id])
+
+        self.author2.author_name = 'Changed Name'
+        self.author2.save()
+
+        self.assertEqual(search.find_book_ids(self.user1, 'trueauthornew'), [])
+        self.assertEqual(search.find_book_ids(self.user1, 'changed'), [self.book3.id, self.book2.id])
+
+        self.book3.delete()
+
+        self.assertEqual(search.find_book_ids(self.user1, 'changed'), [self.book2.id])
+        self.assertFalse(SearchToken.objects.filter(id_book__id=self.book3.id).exists())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_books(self):
+        book_ids = [self.book3.id, self.book1.id, self.book2.id]
+
+        with self.assertNumQueries(1):
+            books = search.get_books(book_ids)
+
+        self.assertEqual(books, [self.book3, self.book1, self.book2])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('builtins.print', new=mock.Mock())
+    def test_rebuild_search_index_command(self):
+        tokens_count = SearchToken.objects.count()
+        SearchToken.objects.all().delete()
+
+        self.assertEqual(search.find_book_ids(self.user1, 'book'), [])
+
+        call_command('rebuildsearchindex')
+
+        self.assertEqual(SearchToken.objects.count(), tokens_count)
+        self.assertEqual(len(search.find_book_ids(self.user1, 'book')), 4)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def tearDownClass(cls):
+        for book in Book.objects.all():
+            if os.path.exists(book.book_file.path):
+                os.remove(book.book_file.path)
+
+        super().tearDownClass()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, RequestFactory, mock, override_settings
+
+from ..constants import Queues
+from ..models import TheUser, Category, Author, Language, Book
+from ..storage import FILE_MODE, SAVED_FILE_GRACE, ContentAddressedStorage, get_file_hash
+from ..tasks import remove_book_file
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+
+UPLOAD_HANDLERS = ['app.upload_handlers.HashingMemoryFileUploadHandler',
+                   'app.upload_handlers.HashingTemporaryFileUploadHandler']
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class StorageTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('storage_user', 'storage_user@user.com', 'testpassword')
+
+        cls.the_user = TheUser.objects.get(id_user=user)
+        cls.category = Category.objects.create(category_name='storage_category')
+        cls.author = Author.objects.create(author_name='storage_author')
+        cls.language = Language.objects.create(language='English')
+
+        with open(os.path.join(TEST_DATA_DIR, 'test_book.pdf'), 'rb') as book_file:
+            cls.book_data = book_file.read()
+
+        cls.book_hash = hashlib.sha256(cls.book_data).hexdigest()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+        for book in Book.objects.all():
+            if os.path.exists(book.book_file.path):
+                os.remove(book.book_file.path)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_book(self, book_name):
+        return Book.objects.create(
+            book_name=book_name,
+            id_author=self.author,
+            id_category=self.category,
+            language=self.language,
+            book_file=SimpleUploadedFile('{}.pdf'.format(book_name), self.book_data),
+            who_added=self.the_user
+        )
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_file_hash(self):
+        content = ContentFile(self.book_data)
+
+        self.assertEqual(get_file_hash(content), self.book_hash)
+
+        content.sha256 = 'precomputed'
+        self.assertEqual(get_file_hash(content), 'precomputed')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_save_same_content_once(self):
+        first_name = self.storage.save('book_file/first.pdf', ContentFile(self.book_data))
+        second_name = self.storage.save('book_file/Second.PDF', ContentFile(self.book_data))
+        other_name = self.storage.save('book_file/other.pdf', ContentFile(b'other content'))
+
+        self.assertEqual(first_name, 'book_file/{}.pdf'.format(self.book_hash))
+        self.assertEqual(second_name, first_name)
+        self.assertNotEqual(other_name, first_name)
+        self.assertEqual(len(os.listdir(os.path.join(self.location, 'book_file'))), 2)
+
+        with self.storage.open(first_name) as stored_file:
+            self.assertEqual(stored_file.read(), self.book_data)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_upload_handlers_set_hash(self):
+        for max_memory_size in [10 * 1024 * 1024, 100]:
+            with override_settings(FILE_UPLOAD_HANDLERS=UPLOAD_HANDLERS, FILE_UPLOAD_MAX_MEMORY_SIZE=max_memory_size):
+                request = RequestFactory().post('/', {'book_file': SimpleUploadedFile('book.pdf', self.book_data)})
+                uploaded_file = request.FILES['book_file']
+
+                self.assertEqual(uploaded_file.sha256, self.book_hash)
+                self.assertEqual(uploaded_file.read(), self.book_data)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def age_file(self, path):
+        saved_time = time.time() - SAVED_FILE_GRACE - 1
+        os.utime(path, (saved_time, saved_time))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_save_renames_complete_file(self):
+        name = self.storage.save('book_file/first.pdf', ContentFile(self.book_data))
+
+        self.assertEqual(os.listdir(os.path.join(self.location, 'book_file')), [os.path.basename(name)])
+        self.assertEqual(os.stat(self.storage.path(name)).st_mode & 0o777, FILE_MODE)
+        self.assertEqual(self.storage.get_available_name(name), name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_delete_unused(self):
+        name = self.storage.save('book_file/first.pdf', ContentFile(self.book_data))
+
+        self.assertFalse(self.storage.delete_unused(name, lambda: False))
+        self.assertTrue(self.storage.exists(name))
+
+        # The file saved again while its removal is pending is kept.
+        self.age_file(self.storage.path(name))
+        self.storage.save('book_file/second.pdf', ContentFile(self.book_data))
+        self.assertFalse(self.storage.delete_unused(name, lambda: False))
+
+        self.age_file(self.storage.path(name))
+        self.assertTrue(self.storage.delete_unused(name, lambda: True))
+        self.assertTrue(self.storage.exists(name))
+
+        self.assertTrue(self.storage.delete_unused(name, lambda: False))
+        self.assertFalse(self.storage.exists(name))
+        self.assertTrue(self.storage.delete_unused(name, lambda: False))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @mock.patch('app.signals.remove_book_file')
+    def test_remove_shared_book_file(self, signal_remove_book_file):
+        first_book = self.create_book('storage_first_book')
+        second_book = self.create_book('storage_second_book')
+
+        self.assertEqual(first_book.book_file.name, 'book_file/{}.pdf'.format(self.book_hash))
+        self.assertEqual(second_book.book_file.name, first_book.book_file.name)
+
+        with mock.patch('app.signals.transaction.on_commit', lambda func: func()):
+            first_book.delete()
+
+        signal_remove_book_file.apply_async.assert_called_once_with(args=(first_book.book_file.name,),
+                                                                    queue=Queues.default)
+
+        self.age_file(second_book.book_file.path)
+        remove_book_file(first_book.book_file.name)
+        self.assertTrue(os.path.exists(second_book.book_file.path))
+
+        with mock.patch('app.signals.transaction.on_commit', lambda func: func()):
+            second_book.delete()
+
+        # The same file is saved again for the book which is not committed yet, so it's modified recently.
+        os.utime(second_book.book_file.path)
+
+        with mock.patch('app.tasks.remove_book_file.apply_async') as apply_async:
+            remove_book_file(second_book.book_file.name)
+
+        apply_async.assert_called_once_with(args=(second_book.book_file.name,), countdown=SAVED_FILE_GRACE,
+                                            queue=Queues.default)
+        self.assertTrue(os.path.exists(second_book.book_file.path))
+
+        self.age_file(second_book.book_file.path)
+        remove_book_file(second_book.book_file.name)
+        self.assertFalse(os.path.exists(second_book.book_file.path))
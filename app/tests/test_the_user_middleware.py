@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.shortcuts import reverse
+from django.test import TestCase, Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from ..middleware.the_user_middleware import get_the_user
+from ..models import TheUser, Category, Author, Language, Book, AddedBook
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class TheUserMiddlewareTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('middleware_user', 'middleware_user@user.com', 'Dummy#password')
+        cls.the_user = TheUser.objects.get(id_user=cls.user)
+
+        cls.logged_client = Client()
+        cls.logged_client.login(username='middleware_user', password='Dummy#password')
+        cls.xhr = 'XMLHttpRequest'
+
+        test_book_path = os.path.join(TEST_DATA_DIR, 'test_book.pdf')
+
+        cls.book = Book.objects.create(
+            book_name='middleware book',
+            id_author=Author.objects.create(author_name='middleware author'),
+            id_category=Category.objects.create(category_name='middleware category'),
+            language=Language.objects.create(language='English'),
+            book_file=SimpleUploadedFile('test_book.pdf', open(test_book_path, 'rb').read()),
+            who_added=cls.the_user
+        )
+        AddedBook.objects.create(id_user=cls.the_user, id_book=cls.book)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def tearDownClass(cls):
+        for book in Book.objects.all():
+            if os.path.exists(book.book_file.path):
+                os.remove(book.book_file.path)
+
+        super().tearDownClass()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def count_the_user_queries(self, url, data):
+        """
+        Returns the count of queries to the table of '.models.TheUser' made by the request.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.logged_client.post(url, data, HTTP_X_REQUESTED_WITH=self.xhr)
+
+        self.assertEqual(response.status_code, 200)
+
+        return len([query for query in context.captured_queries
+                    if 'FROM "{}"'.format(TheUser._meta.db_table) in query['sql'].replace('`', '"')])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_get_the_user(self):
+        """
+        Must load the user once per request and return None for anonymous users without queries.
+        """
+        request = RequestFactory().get('/')
+        request.user = self.user
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_the_user(request), self.the_user)
+            self.assertEqual(get_the_user(request), self.the_user)
+            self.assertEqual(get_the_user(request).id_user.username, 'middleware_user')
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_the_user(request))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_views_load_user_once(self):
+        self.assertEqual(
+            self.count_the_user_queries(reverse('change_rating_app'), {'book': self.book.id, 'rating': 7}), 1
+        )
+        self.assertEqual(
+            self.count_the_user_queries(reverse('add_comment_app'), {'book': self.book.id, 'comment': 'comment'}), 1
+        )
+        self.assertEqual(self.count_the_user_queries(reverse('set_current_page'), {'book': self.book.id, 'page': 3}), 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_the_user_attribute(self):
+        """
+        Must set the lazy loaded user for logged users and None for anonymous users.
+        """
+        response = self.logged_client.get(reverse('book', kwargs={'book_id': self.book.id}))
+
+        self.assertEqual(response.wsgi_request.the_user, self.the_user)
+
+        response = Client().get(reverse('book', kwargs={'book_id': self.book.id}))
+
+        self.assertIsNone(response.wsgi_request.the_user)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, mock
+
+from ..management.commands.helpers.categories_mapper import mapper
+from ..management.commands.uploadbooks import MANIFEST_NAME
+from ..models import TheUser, Category, Author, Language, Book
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+
+SOURCE_CATEGORY = next(iter(mapper))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+@mock.patch('builtins.print', new=mock.Mock())
+class UploadBooksCommandTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user('upload_user', 'upload_user@user.com', 'testpassword')
+
+        Language.objects.create(id=1, language='English')
+        cls.the_user = TheUser.objects.get(id_user__username='upload_user')
+        cls.category = Category.objects.create(category_name=mapper[SOURCE_CATEGORY])
+        cls.author = Author.objects.create(author_name='Existing Author')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+        # The command uploads the books by the first user.
+        TheUser.objects.filter(id=self.the_user.id).update(id=1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+        for book in Book.objects.all():
+            for file in (book.book_file, book.photo):
+                if file and os.path.exists(file.path):
+                    os.remove(file.path)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_folder(self, name, author='Existing Author', book_file='test_book.pdf', cover=True):
+        folder = os.path.join(self.path, name)
+        os.makedirs(folder)
+
+        with open(os.path.join(folder, 'meta.json'), 'w') as json_file:
+            json.dump({'name': name, 'author': author, 'description': 'x' * 1000, 'category': SOURCE_CATEGORY},
+                      json_file)
+
+        shutil.copy(os.path.join(TEST_DATA_DIR, book_file), os.path.join(folder, 'book.pdf'))
+
+        if cover:
+            shutil.copy(os.path.join(TEST_DATA_DIR, 'test_book_image.png'), os.path.join(folder, 'cover.png'))
+
+        return folder
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def read_manifest(self):
+        with open(os.path.join(self.path, MANIFEST_NAME)) as manifest_file:
+            return [json.loads(line) for line in manifest_file]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_upload_books(self):
+        self.create_folder('first_book')
+        self.create_folder('second_book', author='New Author', cover=False)
+        invalid_folder = self.create_folder('invalid_book', book_file='test_book_image.png')
+
+        call_command('uploadbooks', path=self.path, workers=2, batch_size=1)
+
+        first_book = Book.objects.get(book_name='first_book')
+        second_book = Book.objects.get(book_name='second_book')
+
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertEqual(first_book.id_author, self.author)
+        self.assertEqual(first_book.id_category, self.category)
+        self.assertTrue(first_book.description.endswith('...'))
+        self.assertEqual(first_book.book_file.name, second_book.book_file.name)
+        self.assertTrue(os.path.exists(first_book.photo.path))
+        self.assertFalse(second_book.photo)
+        self.assertEqual(second_book.id_author.author_name, 'New Author')
+
+        self.assertEqual(sorted(os.listdir(self.path)), [MANIFEST_NAME, 'invalid_book'])
+        self.assertTrue(os.path.exists(invalid_folder))
+        self.assertEqual(sorted(self.read_manifest(), key=lambda entry: entry['book_id']), [
+            {'folder': 'first_book', 'book_id': first_book.id},
+            {'folder': 'second_book', 'book_id': second_book.id}
+        ])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_upload_books_resume(self):
+        self.create_folder('uploaded_book')
+        self.create_folder('committed_book')
+        self.create_folder('new_book')
+
+        # The previous run uploaded the first book and crashed after the commit of the second book.
+        with open(os.path.join(self.path, MANIFEST_NAME), 'w') as manifest_file:
+            manifest_file.write(json.dumps({'folder': 'uploaded_book', 'book_id': 0}) + '\n')
+
+        with open(os.path.join(TEST_DATA_DIR, 'test_book.pdf'), 'rb') as book_file:
+            file_name = 'book_file/{}.pdf'.format(hashlib.sha256(book_file.read()).hexdigest())
+
+        committed_book = Book.objects.create(book_name='committed_book', id_author=self.author,
+                                             id_category=self.category, language_id=1, book_file=file_name,
+                                             who_added=self.the_user)
+
+        call_command('uploadbooks', path=self.path, workers=1, batch_size=10)
+
+        self.assertEqual(sorted(Book.objects.values_list('book_name', flat=True)), ['committed_book', 'new_book'])
+        self.assertEqual(sorted(os.listdir(self.path)), [MANIFEST_NAME, 'uploaded_book'])
+        self.assertEqual(self.read_manifest(), [
+            {'folder': 'uploaded_book', 'book_id': 0},
+            {'folder': 'committed_book', 'book_id': committed_book.id},
+            {'folder': 'new_book', 'book_id': Book.objects.get(book_name='new_book').id}
+        ])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_upload_books_dry_run(self):
+        self.create_folder('first_book', author='New Author')
+        self.create_folder('invalid_book', book_file='test_book_image.png')
+
+        call_command('uploadbooks', path=self.path, workers=1, batch_size=10, dry_run=True)
+
+        self.assertFalse(Book.objects.exists())
+        self.assertFalse(Author.objects.filter(author_name='New Author').exists())
+        self.assertEqual(sorted(os.listdir(self.path)), ['first_book', 'invalid_book'])
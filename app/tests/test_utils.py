@@ -1,15 +1,11 @@
 # -*- coding: utf-8 -*-
 
-import os
+import time
 
 from django.test import TestCase, mock
-from PIL import Image
 
 from .. import utils
 
-TEST_DIR = os.path.dirname(os.path.abspath(__file__))
-TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
-
 
 # ----------------------------------------------------------------------------------------------------------------------
 class JsonMock:
@@ -31,24 +27,6 @@ class UtilsTest(TestCase):
         self.assertTrue(isinstance(password, str))
         self.assertTrue(password.isalnum())
 
-    # ------------------------------------------------------------------------------------------------------------------
-    def test_resize_image(self):
-        img_path = os.path.join(TEST_DATA_DIR, 'test_resize_image.png')
-        default_size = (400, 500)
-
-        img = Image.open(img_path)
-        self.assertEqual((img.width, img.height), default_size)
-
-        utils.resize_image(img_path, 500)
-
-        img = Image.open(img_path)
-        self.assertEqual((img.width, img.height), (500, 625))
-
-        utils.resize_image(img_path, default_size[0])
-
-        img = Image.open(img_path)
-        self.assertEqual((img.width, img.height), default_size)
-
     # ------------------------------------------------------------------------------------------------------------------
     @mock.patch('app.utils.requests.post', new=mock.Mock(return_value=JsonMock(True)))
     def test_validate_captcha_success(self):
@@ -60,3 +38,16 @@ class UtilsTest(TestCase):
     def test_validate_captcha_fail(self):
         result = utils.validate_captcha('some_key')
         self.assertFalse(result)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_signed_book_file_url(self):
+        url, signature = utils.get_signed_book_file_url(5, 7).split('&signature=')
+
+        self.assertEqual(url, '/read-book/5/file/?user=7')
+        self.assertTrue(utils.is_book_file_signature_valid(5, '7', signature))
+        self.assertFalse(utils.is_book_file_signature_valid(6, '7', signature))
+        self.assertFalse(utils.is_book_file_signature_valid(5, '8', signature))
+        self.assertFalse(utils.is_book_file_signature_valid(5, '7', 'wrong'))
+
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + utils.BOOK_FILE_URL_MAX_AGE + 1):
+            self.assertFalse(utils.is_book_file_signature_valid(5, '7', signature))
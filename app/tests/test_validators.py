@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from ..models import TheUser, Category, Author, Language, Book
+from ..tasks import validate_book_file
+from ..validators import validate_pdf, validate_pdf_content, PDF_HEADER_SIZE
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_DATA_DIR = os.path.join(TEST_DIR, 'fixtures')
+TEST_BOOK_PATH = os.path.join(TEST_DATA_DIR, 'test_book.pdf')
+TEST_ENCRYPTED_BOOK_PATH = os.path.join(TEST_DATA_DIR, 'test_book_encrypted.pdf')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class ValidatorsTest(TestCase):
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('validators_user', 'validators_user@user.com', 'testpassword')
+
+        cls.the_user = TheUser.objects.get(id_user=user)
+        cls.category = Category.objects.create(category_name='validators_category')
+        cls.author = Author.objects.create(author_name='validators_author')
+        cls.language = Language.objects.create(language='English')
+
+        with open(TEST_BOOK_PATH, 'rb') as book_file:
+            cls.book_data = book_file.read()
+
+        # The comment after the header shifts the objects, so the offsets in the cross reference table are wrong.
+        cls.damaged_book_data = cls.book_data[:9] + b'%' + b' ' * 100 + b'\n' + cls.book_data[9:]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+        for book in Book.objects.all():
+            if os.path.exists(book.book_file.path):
+                os.remove(book.book_file.path)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def write_file(self, data):
+        path = os.path.join(self.temp_dir.name, 'book.pdf')
+
+        with open(path, 'wb') as book_file:
+            book_file.write(data)
+
+        return path
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_book(self, data):
+        return Book.objects.create(
+            book_name='validators_book',
+            id_author=self.author,
+            id_category=self.category,
+            language=self.language,
+            book_file=SimpleUploadedFile('test_book.pdf', data),
+            who_added=self.the_user
+        )
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_pdf(self):
+        uploaded_file = SimpleUploadedFile('test_book.pdf', self.book_data)
+        uploaded_file.read(10)
+
+        validate_pdf(uploaded_file)
+
+        self.assertEqual(uploaded_file.tell(), 0)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_pdf_large_file(self):
+        """
+        The body of the file is not checked, only the header and the trailer.
+        """
+        data = self.book_data[:PDF_HEADER_SIZE] + b'\0' * 10 * 1024 * 1024 + self.book_data[PDF_HEADER_SIZE:]
+
+        validate_pdf(SimpleUploadedFile('test_book.pdf', data))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_pdf_invalid(self):
+        with open(os.path.join(TEST_DATA_DIR, 'test_book_image.png'), 'rb') as image_file:
+            image_data = image_file.read()
+
+        invalid_files = [
+            image_data,
+            b'',
+            self.book_data[:-100],
+            self.book_data.replace(b'%PDF-', b'%PNG-'),
+            self.book_data.replace(b'startxref\n1346', b'startxref\n999999'),
+        ]
+
+        for data in invalid_files:
+            with self.assertRaisesMessage(ValidationError, 'Tried to upload not PDF as a book!'):
+                validate_pdf(SimpleUploadedFile('test_book.pdf', data))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_pdf_content(self):
+        self.assertFalse(validate_pdf_content(TEST_BOOK_PATH))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_pdf_content_damaged(self):
+        path = self.write_file(self.damaged_book_data)
+
+        self.assertTrue(validate_pdf_content(path))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_pdf_content_corrupted(self):
+        path = self.write_file(b'%PDF-1.4 not a pdf at all')
+
+        with self.assertRaisesMessage(ValidationError, 'The book is corrupted'):
+            validate_pdf_content(path)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_pdf_content_encrypted(self):
+        with self.assertRaisesMessage(ValidationError, 'The book is encrypted!'):
+            validate_pdf_content(TEST_ENCRYPTED_BOOK_PATH)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_book_file(self):
+        book = self.create_book(self.book_data)
+
+        validate_book_file(book.id)
+
+        book.refresh_from_db()
+        self.assertEqual(book.file_status, Book.FILE_VALID)
+        self.assertFalse(book.blocked_book)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_book_file_damaged(self):
+        book = self.create_book(self.damaged_book_data)
+
+        validate_book_file(book.id)
+
+        book.refresh_from_db()
+        self.assertEqual(book.file_status, Book.FILE_DAMAGED)
+        self.assertFalse(book.blocked_book)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_book_file_invalid(self):
+        book = self.create_book(b'%PDF-1.4 not a pdf at all')
+
+        validate_book_file(book.id)
+
+        book.refresh_from_db()
+        self.assertEqual(book.file_status, Book.FILE_INVALID)
+        self.assertTrue(book.blocked_book)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_validate_deleted_book_file(self):
+        book = self.create_book(self.book_data)
+        Book.objects.filter(id=book.id).delete()
+
+        validate_book_file(book.id)
+
+        self.assertFalse(Book.objects.exists())
@@ -5,9 +5,11 @@ from django.test import TestCase, Client
 
 from ...models import Post, SupportMessage, Book
 from ...views.about_views import about, send_message
+from ..utils import query_budget
 
 
 # ----------------------------------------------------------------------------------------------------------------------
+@query_budget(about=2, send_message=1)
 class AboutViewsTestCase(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
 import json
 import os
 
@@ -9,13 +10,16 @@ from django.test import TestCase, Client, mock
 from django.shortcuts import reverse
 
 from ...models import Category, Language, Author, TheUser, Book, AddedBook
-from ...views.add_book_views import add_book, generate_authors, generate_books, add_book_successful
+from ...views.add_book_views import (add_book, generate_authors, generate_books, add_book_successful,
+                                     find_duplicate_books)
+from ..utils import query_budget
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 TEST_DATA_DIR = os.path.join(TEST_DIR, '../fixtures')
 
 
 # ----------------------------------------------------------------------------------------------------------------------
+@query_budget(add_book=7, book_successful=22, find_duplicate_books=6, generate_authors=6, generate_books=6)
 class AddBookViewsTest(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -277,6 +281,46 @@ class AddBookViewsTest(TestCase):
         self.assertEqual(response_content[0]['name'], 'Second Book')
         self.assertEqual(response_content[0]['url'], '/book/{}/'.format(Book.objects.get(book_name='Second Book').id))
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_find_duplicate_books_not_ajax(self):
+        response = self.logged_client.get(reverse('find_duplicate_books'), {'file_hash': 'a' * 64})
+
+        self.assertEqual(response.resolver_match.func, find_duplicate_books)
+        self.assertEqual(response.status_code, 404)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_find_duplicate_books_invalid_params(self):
+        for file_hash in ['', 'a' * 63, 'g' * 64, 'A' * 64]:
+            response = self.logged_client.get(reverse('find_duplicate_books'), {'file_hash': file_hash},
+                                              HTTP_X_REQUESTED_WITH=self.xhr)
+
+            self.assertEqual(response.resolver_match.func, find_duplicate_books)
+            self.assertEqual(response.status_code, 404)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_find_duplicate_books_success(self):
+        with open(os.path.join(TEST_DATA_DIR, 'test_book.pdf'), 'rb') as book_file:
+            file_hash = hashlib.sha256(book_file.read()).hexdigest()
+
+        Book.objects.filter(book_name='Third Book').update(private_book=True)
+
+        response = self.logged_client.get(reverse('find_duplicate_books'), {'file_hash': file_hash},
+                                          HTTP_X_REQUESTED_WITH=self.xhr)
+        response_content = json.loads(response.content.decode('utf-8'))
+
+        self.assertEqual(response.resolver_match.func, find_duplicate_books)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_content, [
+            {'url': reverse('book', args=[Book.objects.get(book_name=book_name).id]), 'name': book_name,
+             'author': 'New Author Name'}
+            for book_name in ['First Book', 'Second Book']
+        ])
+
+        response = self.logged_client.get(reverse('find_duplicate_books'), {'file_hash': '0' * 64},
+                                          HTTP_X_REQUESTED_WITH=self.xhr)
+
+        self.assertEqual(json.loads(response.content.decode('utf-8')), [])
+
     # ------------------------------------------------------------------------------------------------------------------
     def test_generate_books_success_different_case(self):
         response = self.logged_client.get(reverse('generate_books'), {'part': 'second book'},
@@ -441,3 +485,10 @@ class AddBookViewsTest(TestCase):
         self.assertEqual(AddedBook.objects.all().count(), added_book_count + 1)
         self.assertTrue(Book.objects.filter(book_name='book_existing_author').exists())
         self.assertEqual(Book.objects.filter(book_name='book_existing_author').count(), 1)
+
+        # The same file is stored once by its content.
+        with open(test_book_path, 'rb') as book_file:
+            file_hash = hashlib.sha256(book_file.read()).hexdigest()
+
+        self.assertEqual(created_book.book_file.name, 'book_file/{}.pdf'.format(file_hash))
+        self.assertEqual(Book.objects.filter(book_file=created_book.book_file.name).count(), books_count + 1)
@@ -11,6 +11,7 @@ from django.test import TestCase, Client
 
 from ...models import TheUser
 from ...views.additional_views import user_logout, share_txt, share_xml, unsubscribe
+from ..utils import query_budget
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 TEST_DATA_DIR = os.path.join(TEST_DIR, '../fixtures')
@@ -19,6 +20,7 @@ DESTINATION_DIR = os.path.join(settings.BASE_DIR, 'Plamber/additional/{}')
 
 
 # ----------------------------------------------------------------------------------------------------------------------
+@query_budget(logout=5, share_txt=5, share_xml=5, unsubscribe=8)
 class AdditionalViewsTest(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -41,6 +43,8 @@ class AdditionalViewsTest(TestCase):
         os.remove(DESTINATION_DIR.format('test.txt'))
         os.remove(DESTINATION_DIR.format('test.xml'))
 
+        super().tearDownClass()
+
     # ------------------------------------------------------------------------------------------------------------------
     def test_user_logout_not_post(self):
         response = self.logged_client.get(reverse('logout'))
@@ -11,12 +11,14 @@ from django.test import TestCase, Client
 
 from ...models import Author, Book, AddedBook, Category, Language, TheUser
 from ...views.index_views import index, is_user_exists, is_mail_exists, sign_in, restore_data
+from ..utils import query_budget
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 TEST_DATA_DIR = os.path.join(TEST_DIR, '../fixtures')
 
 
 # ----------------------------------------------------------------------------------------------------------------------
+@query_budget(index=17, is_mail_exists=6, is_user_exists=6, restore_data=5, sign_in=13)
 class IndexViewsTestCase(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -65,6 +67,8 @@ class IndexViewsTestCase(TestCase):
             if book.photo and os.path.exists(book.photo.path):
                 os.remove(book.photo.path)
 
+        super().tearDownClass()
+
     # ------------------------------------------------------------------------------------------------------------------
     def test_index(self):
         response = self.anonymous_client.get(reverse('index'))
@@ -14,7 +14,7 @@ from ...views.library_views import all_categories, selected_category, selected_a
 from ...views.selected_book_views import (
     selected_book, add_book_to_home, remove_book_from_home, change_rating, add_comment, load_comments, report_book
 )
-from ..utils import Utils
+from ..utils import Utils, query_budget
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 TEST_DATA_DIR = os.path.join(TEST_DIR, '../fixtures')
@@ -23,6 +23,8 @@ NOT_EXISTS_CATEGORY = 10000
 
 # ----------------------------------------------------------------------------------------------------------------------
 @override_settings(BOOKS_PER_PAGE=2)
+@query_budget(add_book_home_app=12, add_comment_app=8, author=5, book=19, book_sort=2, categories=3, category=5,
+              change_rating_app=21, load_books=3, load_comments_app=8, remove_book_home_app=11, search_book_app=2)
 class LibraryViewsTestCase(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -106,6 +108,8 @@ class LibraryViewsTestCase(TestCase):
             if book.photo and os.path.exists(book.photo.path):
                 os.remove(book.photo.path)
 
+        super().tearDownClass()
+
     # ------------------------------------------------------------------------------------------------------------------
     def test_all_categories_invalid_request_method(self):
         response = self.anonymous_client.post(reverse('categories'))
@@ -154,9 +158,16 @@ class LibraryViewsTestCase(TestCase):
         self.assertIn('has_next', response.context)
         self.assertEqual(response.context['category'].category_name, 'CustomCategoryName')
         self.assertEqual(len(response.context['books']), 2)
-        self.assertEqual(response.context['total_books_count'], 5)
+        self.assertEqual(response.context['total_books_count'], 4)
         self.assertEqual(response.context['has_next'], True)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_selected_category_count_with_private_books(self):
+        url = reverse('category', kwargs={'category_id': self.category.id})
+
+        self.assertEqual(self.logged_client.get(url).context['total_books_count'], 5)
+        self.assertEqual(self.logged_client2.get(url).context['total_books_count'], 4)
+
     # ------------------------------------------------------------------------------------------------------------------
     def test_selected_author_invalid_request_method(self):
         response = self.anonymous_client.post(reverse('author', kwargs={'author_id': 10000}))
@@ -494,6 +505,75 @@ class LibraryViewsTestCase(TestCase):
         self.assertEqual(response_data['has_next'], False)
         self.assertEqual(response_data['next_page'], 2)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_load_books_by_cursor(self):
+        response = self.anonymous_client.get(
+            reverse('load_books', kwargs={'category_id': self.category.id}),
+            {'cursor': ''},
+            HTTP_X_REQUESTED_WITH=self.xhr
+        )
+        response_data = json.loads(response.content.decode('utf-8'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_data['books'], [Utils.generate_sort_dict(self.book1),
+                                                  Utils.generate_sort_dict(self.book2)])
+        self.assertTrue(response_data['has_next'])
+
+        response = self.anonymous_client.get(
+            reverse('load_books', kwargs={'category_id': self.category.id}),
+            {'cursor': response_data['next_cursor']},
+            HTTP_X_REQUESTED_WITH=self.xhr
+        )
+        response_data = json.loads(response.content.decode('utf-8'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_data['books'], [Utils.generate_sort_dict(self.book3),
+                                                  Utils.generate_sort_dict(self.book5)])
+        self.assertFalse(response_data['has_next'])
+        self.assertIsNone(response_data['next_cursor'])
+        self.assertNotIn('next_page', response_data)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_load_books_invalid_cursor(self):
+        for cursor in ('not-a-cursor', 'WzFd'):
+            response = self.anonymous_client.get(
+                reverse('load_books', kwargs={'category_id': self.category.id}),
+                {'cursor': cursor},
+                HTTP_X_REQUESTED_WITH=self.xhr
+            )
+            self.assertEqual(response.status_code, 400)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_sort_by_cursor(self):
+        """
+        Must return all books of each criterion once in the cursor mode.
+        """
+        expected_books = {
+            'book_name': [self.book1.id, self.book2.id, self.book3.id, self.book5.id],
+            'author': [self.book1.id, self.book2.id, self.book3.id, self.book5.id],
+            'estimation': [self.book3.id, self.book2.id, self.book1.id, self.book5.id],
+            'most_readable': [self.book1.id, self.book2.id]
+        }
+
+        for criterion in expected_books:
+            books = []
+            params = {'category': self.category.id, 'criterion': criterion, 'cursor': ''}
+
+            while True:
+                response = self.anonymous_client.get(reverse('book_sort'), params, HTTP_X_REQUESTED_WITH=self.xhr)
+                response_data = json.loads(response.content.decode('utf-8'))
+
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(all(('upload_date' in book) == (criterion in ('book_name', 'author'))
+                                    for book in response_data['books']))
+                books.extend(book['id'] for book in response_data['books'])
+
+                if not response_data['has_next']:
+                    break
+                params['cursor'] = response_data['next_cursor']
+
+            self.assertEqual(books, expected_books[criterion])
+
     # ------------------------------------------------------------------------------------------------------------------
     # Selected Book test cases.
     # Done here due to issues with Django / MySQL closed connection...
@@ -542,10 +622,6 @@ class LibraryViewsTestCase(TestCase):
         self.assertIsNone(response.context['user_rated'])
         self.assertTrue(isinstance(response.context['report_form'], ReportForm))
 
-    # ------------------------------------------------------------------------------------------------------------------
-    def test_store_image(self):
-        pass  # TODO add tests for storing images.
-
     # ------------------------------------------------------------------------------------------------------------------
     def test_add_book_to_home_not_ajax(self):
         response = self.logged_client.post(reverse('add_book_home_app'), {})
@@ -11,13 +11,14 @@ from django.test import TestCase, Client, override_settings, mock
 
 from ...models import Book, TheUser, Category, Language, Author, AddedBook
 from ...views.profile_views import profile, upload_avatar, change_password, load_uploaded_books
-from ..utils import Utils
+from ..utils import Utils, query_budget
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 TEST_DATA_DIR = os.path.join(TEST_DIR, '../fixtures')
 
 @override_settings(BOOKS_PER_PAGE=2)
 # ----------------------------------------------------------------------------------------------------------------------
+@query_budget(change_password=9, load_uploaded_books_app=8, profile=16, upload_avatar=10)
 class ProfileViewsTest(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -60,6 +61,8 @@ class ProfileViewsTest(TestCase):
             if os.path.exists(avatar_path):
                 os.remove(avatar_path)
 
+        super().tearDownClass()
+
     # ------------------------------------------------------------------------------------------------------------------
     @classmethod
     def generate_books(cls):
@@ -206,6 +209,29 @@ class ProfileViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response_data, expected_response)
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_load_uploaded_books_by_cursor(self):
+        profile_response = self.logged_client.get(reverse('profile', kwargs={'profile_id': self.user1.id}))
+
+        response = self.logged_client.get(
+            reverse('load_uploaded_books_app', kwargs={'profile_id': self.the_user1.id}),
+            {'cursor': profile_response.context['next_cursor']},
+            HTTP_X_REQUESTED_WITH=self.xhr
+        )
+        response_data = json.loads(response.content.decode('utf-8'))
+
+        expected_response = {
+            'profile_id': str(self.the_user1.id),
+            'books': [
+                Utils.generate_sort_dict(self.book3),
+                Utils.generate_sort_dict(self.book1)
+            ],
+            'has_next': False,
+            'next_cursor': None
+        }
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_data, expected_response)
+
     # ------------------------------------------------------------------------------------------------------------------
     def test_load_uploaded_books_success_zero_books(self):
         response = self.logged_client.get(
@@ -269,6 +295,7 @@ class ProfileViewsTest(TestCase):
         self.assertEqual(response_data['message'], 'Аватар успешно изменен!')
         self.assertTrue(os.path.exists(avatar_path))
         self.assertTrue(TheUser.objects.get(id=self.the_user1.id).user_photo)
+        self.assertFalse(TheUser.objects.get(id=self.the_user1.id).user_photo_variants)
 
     # ------------------------------------------------------------------------------------------------------------------
     def test_change_password_not_ajax(self):
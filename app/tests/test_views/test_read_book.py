@@ -4,18 +4,23 @@ import os
 from http.cookies import SimpleCookie
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.shortcuts import reverse
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 
 from ...models import TheUser, Book, AddedBook, Category, Language, Author
-from ...views.read_book_views import open_book, set_current_page
+from ...reading_progress import flush_progress
+from ...utils import get_signed_book_file_url
+from ...views.read_book_views import open_book, set_current_page, book_file
+from ..utils import query_budget
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 TEST_DATA_DIR = os.path.join(TEST_DIR, '../fixtures')
 
 
 # ----------------------------------------------------------------------------------------------------------------------
+@query_budget(book=20, read_book=10, set_current_page=11)
 class ReadBookViewsTest(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -59,6 +64,10 @@ class ReadBookViewsTest(TestCase):
             who_added=cls.the_user
         )
 
+    # ------------------------------------------------------------------------------------------------------------------
+    def setUp(self):
+        cache.clear()
+
     # ------------------------------------------------------------------------------------------------------------------
     @classmethod
     def tearDownClass(cls):
@@ -68,6 +77,8 @@ class ReadBookViewsTest(TestCase):
             if book.photo and os.path.exists(book.photo.path):
                 os.remove(book.photo.path)
 
+        super().tearDownClass()
+
     # ------------------------------------------------------------------------------------------------------------------
     def test_open_book_anonymous_success_no_cookies(self):
         self.anonymous_client.cookies.pop('plamber_book_{}'.format(self.book.id), None)
@@ -177,12 +188,14 @@ class ReadBookViewsTest(TestCase):
     # ------------------------------------------------------------------------------------------------------------------
     def test_open_book_last_read_date_change(self):
         response = self.logged_client.get(reverse('read_book', kwargs={'book_id': self.book.id}))
+        flush_progress()
         last_read_date = AddedBook.objects.get(id=self.added_book.id).last_read
 
         self.assertEqual(response.resolver_match.func, open_book)
         self.assertEqual(response.status_code, 200)
 
         response = self.logged_client.get(reverse('read_book', kwargs={'book_id': self.book.id}))
+        flush_progress()
         new_last_read = AddedBook.objects.get(id=self.added_book.id).last_read
 
         self.assertEqual(response.resolver_match.func, open_book)
@@ -270,7 +283,7 @@ class ReadBookViewsTest(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
     def test_set_current_page_invalid_book_param(self):
-        response = self.logged_client.post(reverse('set_current_page'), {'page': 12, 'book': str(self.book.id) * 500},
+        response = self.logged_client.post(reverse('set_current_page'), {'page': 12, 'book': str(self.book.id) * 501},
                                            HTTP_X_REQUESTED_WITH=self.xhr)
         self.assertEqual(response.resolver_match.func, set_current_page)
         self.assertEqual(response.status_code, 404)
@@ -279,6 +292,7 @@ class ReadBookViewsTest(TestCase):
     def test_set_current_page_success(self):
         response = self.logged_client.post(reverse('set_current_page'), {'page': 14, 'book': self.book.id},
                                            HTTP_X_REQUESTED_WITH=self.xhr)
+        flush_progress()
         page = AddedBook.objects.get(id_user=self.the_user, id_book=self.book).last_page
         self.assertEqual(response.resolver_match.func, set_current_page)
         self.assertEqual(response.status_code, 200)
@@ -286,7 +300,132 @@ class ReadBookViewsTest(TestCase):
 
         response = self.logged_client.post(reverse('set_current_page'), {'page': 300, 'book': self.book.id},
                                            HTTP_X_REQUESTED_WITH=self.xhr)
+        flush_progress()
         page = AddedBook.objects.get(id_user=self.the_user, id_book=self.book).last_page
         self.assertEqual(response.resolver_match.func, set_current_page)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(page, 300)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_set_current_page_buffered(self):
+        for page in (20, 21):
+            response = self.logged_client.post(reverse('set_current_page'), {'page': page, 'book': self.book.id},
+                                               HTTP_X_REQUESTED_WITH=self.xhr)
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(AddedBook.objects.get(id=self.added_book.id).last_page, self.added_book.last_page)
+
+        response = self.logged_client.get(reverse('read_book', kwargs={'book_id': self.book.id}))
+        self.assertEqual(response.context['book_page'], 21)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_set_current_page_not_added_book(self):
+        response = self.logged_client.post(reverse('set_current_page'), {'page': 14, 'book': self.not_added_book.id},
+                                           HTTP_X_REQUESTED_WITH=self.xhr)
+        self.assertEqual(response.resolver_match.func, set_current_page)
+        self.assertEqual(response.status_code, 404)
+
+        response = self.logged_client.post(reverse('set_current_page'), {'page': 14, 'book': 'book'},
+                                           HTTP_X_REQUESTED_WITH=self.xhr)
+        self.assertEqual(response.status_code, 404)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_book_file_whole(self):
+        response = self.anonymous_client.get(reverse('book_file', kwargs={'book_id': self.book.id}))
+        content = b''.join(response.streaming_content)
+
+        with open(self.book.book_file.path, 'rb') as file:
+            self.assertEqual(content, file.read())
+
+        self.assertEqual(response.resolver_match.func, book_file)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Length'], str(len(content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_book_file_range(self):
+        url = reverse('book_file', kwargs={'book_id': self.book.id})
+        size = self.book.book_file.size
+
+        with open(self.book.book_file.path, 'rb') as file:
+            content = file.read()
+
+        response = self.logged_client.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), content[10:20])
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/{}'.format(size))
+        self.assertEqual(response['Content-Length'], '10')
+
+        response = self.logged_client.get(url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), content[-5:])
+
+        response = self.logged_client.get(url, HTTP_RANGE='bytes={}-'.format(size - 3))
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), content[-3:])
+
+        response = self.logged_client.get(url, HTTP_RANGE='bytes={}-'.format(size))
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */{}'.format(size))
+
+        response = self.logged_client.get(url, HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual(response.status_code, 200)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_book_file_conditional(self):
+        url = reverse('book_file', kwargs={'book_id': self.book.id})
+        etag = self.logged_client.get(url)['ETag']
+
+        response = self.logged_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.logged_client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+        response = self.logged_client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"changed"')
+        self.assertEqual(response.status_code, 200)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_book_file_private(self):
+        Book.objects.filter(id=self.not_added_book.id).update(private_book=True)
+        url = reverse('book_file', kwargs={'book_id': self.not_added_book.id})
+
+        self.assertEqual(self.anonymous_client.get(url).status_code, 404)
+        self.assertEqual(self.anonymous_client.get(url, {'signature': 'wrong'}).status_code, 404)
+        self.assertEqual(self.logged_client.get(url).status_code, 200)
+        other_user = User.objects.create_user(username='other_read_user', email='other_read@user.com',
+                                              password='Dummy#password')
+        other_the_user = TheUser.objects.get(id_user=other_user)
+        signed_url = get_signed_book_file_url(self.not_added_book.id, self.the_user.id)
+
+        self.assertEqual(self.anonymous_client.get(signed_url).status_code, 200)
+        self.assertEqual(self.anonymous_client.get(signed_url.replace(
+            'user={}'.format(self.the_user.id), 'user={}'.format(other_the_user.id)
+        )).status_code, 404)
+        self.assertEqual(self.anonymous_client.get(get_signed_book_file_url(self.book.id, self.the_user.id).replace(
+            str(self.book.id), str(self.not_added_book.id), 1
+        )).status_code, 404)
+        self.assertEqual(self.anonymous_client.get(
+            get_signed_book_file_url(self.not_added_book.id, other_the_user.id)
+        ).status_code, 404)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_book_file_blocked(self):
+        Book.objects.filter(id__in=[self.book.id, self.not_added_book.id]).update(blocked_book=True)
+
+        self.assertEqual(self.logged_client.get(reverse('book_file', args=[self.book.id])).status_code, 200)
+        self.assertEqual(self.anonymous_client.get(reverse('book_file', args=[self.book.id])).status_code, 404)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @override_settings(BOOK_FILE_ACCEL_REDIRECT=True)
+    def test_book_file_accel_redirect(self):
+        response = self.logged_client.get(reverse('book_file', kwargs={'book_id': self.book.id}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], self.book.book_file.url)
+        self.assertEqual(response.content, b'')
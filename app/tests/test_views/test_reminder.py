@@ -6,9 +6,11 @@ from django.shortcuts import reverse
 
 from ...models import TheUser
 from ...views.reminder_views import update_reminder
+from ..utils import query_budget
 
 
 # ----------------------------------------------------------------------------------------------------------------------
+@query_budget(update_reminder=7)
 class ReminderViewsTest(TestCase):
 
     # ------------------------------------------------------------------------------------------------------------------
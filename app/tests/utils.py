@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 
+from functools import wraps
+
 from django.utils.html import escape
 
+from ..middleware.query_count_middleware import view_queries_recorded
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 class Utils:
@@ -19,3 +23,39 @@ class Utils:
             'url': book.photo.url if book.photo else '',
             'upload_date': book.upload_date.strftime('%d-%m-%Y')
         }
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def query_budget(**budgets):
+    """
+    Decorates the test methods or test classes with the max count of SQL queries of views by view names. The test
+    fails if any request to the view made more queries than its budget.
+
+    :param dict[str, int] budgets: The max counts of queries by view names.
+    """
+    def decorate(test):
+        if isinstance(test, type):
+            for name in dir(test):
+                if name.startswith('test') and callable(getattr(test, name)):
+                    setattr(test, name, decorate(getattr(test, name)))
+            return test
+
+        @wraps(test)
+        def inner(test_case, *args, **kwargs):
+            exceeded = []
+
+            def check_budget(sender, view_name=None, query_count=0, **kwargs):
+                if view_name in budgets and query_count > budgets[view_name]:
+                    exceeded.append('{} made {} queries, budget is {}'.format(view_name, query_count,
+                                                                              budgets[view_name]))
+
+            view_queries_recorded.connect(check_budget)
+            try:
+                result = test(test_case, *args, **kwargs)
+            finally:
+                view_queries_recorded.disconnect(check_budget)
+
+            test_case.assertFalse(exceeded, 'Query budget exceeded: {}'.format('; '.join(exceeded)))
+            return result
+        return inner
+    return decorate
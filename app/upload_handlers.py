@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class HashingUploadHandlerMixin:
+    """
+    Computes the SHA-256 of the uploaded file while it is received, the hash is set as 'sha256' attribute of
+    the uploaded file, so the file is not read again to store it by content.
+    """
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def new_file(self, *args, **kwargs):
+        # The hash is created first, the memory handler stops the next handlers by exception from new_file.
+        self.sha256 = hashlib.sha256()
+
+        super(HashingUploadHandlerMixin, self).new_file(*args, **kwargs)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+
+        return super(HashingUploadHandlerMixin, self).receive_data_chunk(raw_data, start)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def file_complete(self, file_size):
+        uploaded_file = super(HashingUploadHandlerMixin, self).file_complete(file_size)
+
+        if uploaded_file is not None:
+            uploaded_file.sha256 = self.sha256.hexdigest()
+
+        return uploaded_file
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
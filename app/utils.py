@@ -1,15 +1,16 @@
 # -*- coding: utf-8 -*-
 
-import os
 import random
 import string
 
 import requests
-from PIL import Image
 
 from django.conf import settings
+from django.core.signing import TimestampSigner, BadSignature
+from django.urls import reverse
 
 PASSWORD_LENGTH = 12
+BOOK_FILE_URL_MAX_AGE = 60 * 60 * 24
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -22,27 +23,6 @@ def generate_password():
     return ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(PASSWORD_LENGTH))
 
 
-# ----------------------------------------------------------------------------------------------------------------------
-def resize_image(path, width):
-    """
-    Resizes the image.
-
-    :param str path:  The path to the image file.
-    :param int width: The width of the output image.
-    """
-    try:
-        img = Image.open(path)
-
-        ratio = width / float(img.width)
-        height = int(float(img.height) * float(ratio))
-
-        new_img = img.resize((width, height), Image.ANTIALIAS)
-        new_img.save(path)
-
-    except IOError:
-        pass
-
-
 # ----------------------------------------------------------------------------------------------------------------------
 def validate_captcha(captcha_post):
     """
@@ -63,3 +43,40 @@ def validate_captcha(captcha_post):
         validated = True
 
     return validated
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_signed_book_file_url(book_id, user_id):
+    """
+    Generates the URL of the book file with the signature, which gives the user access to the file without the session
+    for a limited time, e.g. for the mobile application.
+
+    :param int book_id: The id of the book.
+    :param int user_id: The id of the user the URL is issued to.
+
+    :return str: The URL.
+    """
+    value = '{}:{}'.format(book_id, user_id)
+    signature = TimestampSigner(salt='book_file').sign(value)[len(value) + 1:]
+
+    return '{}?user={}&signature={}'.format(reverse('book_file', kwargs={'book_id': book_id}), user_id, signature)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def is_book_file_signature_valid(book_id, user_id, signature):
+    """
+    Checks the signature of the book file URL.
+
+    :param int book_id:   The id of the book.
+    :param str user_id:   The id of the user from the URL.
+    :param str signature: The signature from the URL.
+
+    :return bool: Whether the signature is valid and not expired.
+    """
+    try:
+        TimestampSigner(salt='book_file').unsign(
+            '{}:{}:{}'.format(book_id, user_id, signature), max_age=BOOK_FILE_URL_MAX_AGE
+        )
+        return True
+    except BadSignature:
+        return False
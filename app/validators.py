@@ -1,12 +1,19 @@
 # -*- coding: utf-8 -*-
 
 import imghdr
-import io
+import re
 
-import PyPDF2
+import pypdfium2
+import pypdfium2.raw as pdfium
 
 from django.core.exceptions import ValidationError
 
+# The header must be in the first kilobyte and the end of file marker in the last kilobyte by PDF specification.
+PDF_HEADER_SIZE = 1024
+PDF_TRAILER_SIZE = 1024
+PDF_HEADER_REGEX = re.compile(br'%PDF-\d\.\d')
+PDF_TRAILER_REGEX = re.compile(br'startxref\s+(\d+)\s+%%EOF')
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 def validate_image(value):
@@ -23,12 +30,47 @@ def validate_image(value):
 # ----------------------------------------------------------------------------------------------------------------------
 def validate_pdf(value):
     """
-    Validates the uploading file if it is a PDF.
+    Validates the uploading file if it is a PDF. Only the header and the trailer of the file are read, so the
+    validation takes constant memory and time. The whole file is checked after upload by the worker.
     Raises an error if validation not passed.
 
     :param value: The file object.
     """
-    try:
-        PyPDF2.PdfFileReader(io.BytesIO(value.read()))
-    except PyPDF2.utils.PdfReadError:
+    value.seek(0)
+    header = value.read(PDF_HEADER_SIZE)
+
+    value.seek(max(value.size - PDF_TRAILER_SIZE, 0))
+    trailer = PDF_TRAILER_REGEX.search(value.read(PDF_TRAILER_SIZE))
+
+    value.seek(0)
+
+    if not PDF_HEADER_REGEX.search(header) or not trailer or int(trailer.group(1)) >= value.size:
         raise ValidationError('Tried to upload not PDF as a book!')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def validate_pdf_content(path):
+    """
+    Validates the whole PDF file: the file must be readable without password and have pages. The damaged files
+    which the reader can repair are valid, the repaired files have the cross reference table rebuilt on reading.
+    Raises an error if validation not passed.
+
+    :param str path: The path to the PDF file.
+
+    :return bool: Whether the file is damaged and was repaired on reading.
+    """
+    try:
+        with pypdfium2.PdfDocument(path) as document:
+            if not len(document):
+                raise ValidationError('The book has no pages!')
+
+            for page in document:
+                page.get_size()
+
+            return not pdfium.FPDF_DocumentHasValidCrossReferenceTable(document.raw)
+
+    except pypdfium2.PdfiumError as exc:
+        if exc.err_code == pdfium.FPDF_ERR_PASSWORD:
+            raise ValidationError('The book is encrypted!')
+
+        raise ValidationError('The book is corrupted: {}!'.format(exc))
@@ -8,7 +8,7 @@ from django.db import transaction
 from django.http import HttpResponse
 from django.shortcuts import redirect, render, reverse
 
-from ..forms import GenerateAuthorsForm, AddBookForm, GenerateBooksForm
+from ..forms import GenerateAuthorsForm, AddBookForm, GenerateBooksForm, FindDuplicateBooksForm
 from ..models import AddedBook, Author, Book, Category, Language
 from ..views import process_method, process_ajax, process_form
 
@@ -56,6 +56,18 @@ def generate_books(request, form):
     return HttpResponse(json.dumps(list_of_books), content_type='application/json')
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+@process_ajax(404)
+@process_form('GET', FindDuplicateBooksForm, 404)
+def find_duplicate_books(request, form):
+    """
+    Returns a list of public books with the same file as the file which user is going to upload.
+    """
+    list_of_books = Book.get_public_duplicates(form.cleaned_data['file_hash'])
+
+    return HttpResponse(json.dumps(list_of_books), content_type='application/json')
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 @process_method('POST', 404)
 @process_form('POST', AddBookForm, 404)
@@ -64,7 +76,7 @@ def add_book_successful(request, form):
     Creates new book object.
     """
     with transaction.atomic():
-        related_data = Book.get_related_objects_for_create(request.user.id, form)
+        related_data = Book.get_related_objects_for_create(request.the_user, form)
 
         book = Book.objects.create(
             book_name=form.cleaned_data['bookname'],
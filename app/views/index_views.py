@@ -162,7 +162,7 @@ def restore_data(request, form):
 
         user = get_object_or_404(User, email=form.cleaned_data['email'])
         user.set_password(temp_password)
-        user.save()
+        user.save(update_fields=['password'])
 
         restore_account.apply_async(
             args=(user.username, temp_password, form.cleaned_data['email']), queue=Queues.high_priority
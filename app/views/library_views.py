@@ -6,12 +6,28 @@ from django.core.paginator import Paginator
 from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404
 
+from ..category_cache import get_sorted_book_ids
 from ..forms import SortForm, SearchBookForm, BookPagingForm
 from ..models import Category, Book, Author
+from ..pagination import InvalidCursor, paginate_by_cursor, paginate_list_by_cursor
+from ..search import find_book_ids, get_books
 from ..views import process_method, process_ajax, process_form
 
 MOST_READ_BOOKS_COUNT = 9
 
+CATEGORY_BOOKS_ORDERING = ('book_name',)
+SORT_ORDERINGS = {
+    'book_name': ('book_name',),
+    'author': ('id_author__author_name',),
+    'most_readable': ('-readers_count',)
+}
+SORTED_BOOKS_GENERATORS = {
+    'book_name': Book.generate_books,
+    'author': Book.generate_books,
+    'estimation': Book.generate_rated_books,
+    'most_readable': Book.generate_readable_books
+}
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 @process_method('GET', 404)
@@ -32,20 +48,21 @@ def all_categories(request):
 @process_method('GET', 404)
 def selected_category(request, category_id):
     """
-    Returns page with selected category.
+    Returns page with selected category. The count of books available for the user is taken from the cached entries
+    of the category merged with the private books of the user.
     """
     category = get_object_or_404(Category, id=category_id)
-    books = Book.objects.filter(id_category=category).order_by('book_name')
-    filtered_books = Book.exclude_private_books(request.user, books)
+    books = Book.objects.filter(id_category=category)
+    filtered_books = Book.exclude_private_books(request.user, books).select_related('id_author')
 
-    paginator = Paginator(filtered_books, settings.BOOKS_PER_PAGE)
-    page = paginator.page(1)
+    page = paginate_by_cursor(filtered_books, CATEGORY_BOOKS_ORDERING, '', settings.BOOKS_PER_PAGE)
 
     context = {
         'category': category,
         'books': page.object_list,
-        'total_books_count': books.count(),
-        'has_next': page.has_next()
+        'total_books_count': len(get_sorted_book_ids(request.user, category, 'book_name')),
+        'has_next': page.has_next(),
+        'next_cursor': page.next_cursor
     }
     return render(request, 'selected_category.html', context)
 
@@ -70,27 +87,25 @@ def selected_author(request, author_id):
 @process_form('GET', SortForm, 400)
 def sort(request, form):
     """
-    Returns data sorted data depending on criterion.
+    Returns data sorted data depending on criterion. The sorted ids of public books are taken from the shared cache.
     """
-    criterion_dict = {'book_name': Book.sort_by_book_name,
-                      'author': Book.sort_by_author,
-                      'estimation': Book.sort_by_estimation}
-
     category = Category.objects.get(id=form.cleaned_data['category'])
-    books_count = Book.objects.filter(id_category=category).count()
 
-    if form.cleaned_data['criterion'] == 'most_readable':
-        books = Book.sort_by_readable(request.user, category, books_count)
-    else:
-        books = criterion_dict[form.cleaned_data['criterion']](request.user, category)
+    if form.cleaned_data['page'] is None:
+        return sort_by_cursor(request.user, category, form.cleaned_data['criterion'], form.cleaned_data['cursor'])
+
+    criterion = form.cleaned_data['criterion']
+
+    if criterion not in SORTED_BOOKS_GENERATORS:
+        return HttpResponse(status=400)
 
-    paginator = Paginator(books, settings.BOOKS_PER_PAGE)
+    paginator = Paginator(get_sorted_book_ids(request.user, category, criterion), settings.BOOKS_PER_PAGE)
     page = paginator.page(form.cleaned_data['page'])
 
     context = {
         'category': category.id,
-        'criterion': form.cleaned_data['criterion'],
-        'books': page.object_list,
+        'criterion': criterion,
+        'books': SORTED_BOOKS_GENERATORS[criterion](get_books(page.object_list)),
         'has_next': page.has_next(),
         'next_page': page.next_page_number() if page.has_next() else paginator.num_pages
     }
@@ -103,17 +118,16 @@ def sort(request, form):
 @process_form('GET', SearchBookForm, 400)
 def find_books(request, form):
     """
-    Generates list with books of data which user entered. At first it check full equality in name,
-    after tries to check if contains some part of entered data.
+    Generates list with books of data which user entered. At first returns books with fully equal name or author,
+    after books where words start with entered data and after books where words contain entered data.
     """
-    search_data = form.cleaned_data['data']
-    filtered_books = Book.exclude_private_books(request.user, Book.fetch_books(search_data))
+    book_ids = find_book_ids(request.user, form.cleaned_data['data'])
 
-    paginator = Paginator(filtered_books, settings.BOOKS_PER_PAGE)
+    paginator = Paginator(book_ids, settings.BOOKS_PER_PAGE)
     page = paginator.page(form.cleaned_data['page'])
 
     response = {
-        'books': Book.generate_books(page.object_list),
+        'books': Book.generate_books(get_books(page.object_list)),
         'has_next': page.has_next(),
         'next_page': page.next_page_number() if page.has_next() else paginator.num_pages
     }
@@ -128,16 +142,74 @@ def load_books(request, category_id, form):
     Ajax request handler for outputting books page by page.
     """
     category = get_object_or_404(Category, id=category_id)
-    books = Book.objects.filter(id_category=category).order_by('book_name')
+    books = Book.objects.filter(id_category=category).select_related('id_author')
     filtered_books = Book.exclude_private_books(request.user, books)
 
-    paginator = Paginator(filtered_books, settings.BOOKS_PER_PAGE)
+    if form.cleaned_data['page'] is None:
+        try:
+            page = paginate_by_cursor(filtered_books, CATEGORY_BOOKS_ORDERING, form.cleaned_data['cursor'],
+                                      settings.BOOKS_PER_PAGE)
+        except InvalidCursor:
+            return HttpResponse(status=400)
+
+        response = {
+            'category_id': category_id,
+            'books': Book.generate_books(page.object_list),
+            'has_next': page.has_next(),
+            'next_cursor': page.next_cursor
+        }
+        return HttpResponse(json.dumps(response), content_type='application/json')
+
+    paginator = Paginator(get_sorted_book_ids(request.user, category, 'book_name'), settings.BOOKS_PER_PAGE)
     page = paginator.page(form.cleaned_data['page'])
 
     response = {
         'category_id': category_id,
-        'books': Book.generate_books(page.object_list),
+        'books': Book.generate_books(get_books(page.object_list)),
         'has_next': page.has_next(),
         'next_page': page.next_page_number() if page.has_next() else paginator.num_pages
     }
     return HttpResponse(json.dumps(response), content_type='application/json')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def sort_by_cursor(user, category, criterion, cursor):
+    """
+    Returns the page of sorted books after the cursor. The books sorted by database fields are fetched by the seek
+    method, the cached ids of books sorted by estimation are sliced by the position kept in the cursor.
+
+    :param django.contrib.auth.models.User user:      The request user.
+    :param app.models.Category             category:  The category.
+    :param str                             criterion: The sorting criterion.
+    :param str                             cursor:    The cursor of previous page or empty string for the first page.
+
+    :return django.http.HttpResponse: The response with books.
+    """
+    try:
+        if criterion in SORT_ORDERINGS:
+            books = Book.exclude_private_books(user, Book.objects.filter(id_category=category))
+            books = books.select_related('id_author')
+
+            if criterion == 'most_readable':
+                books = books.filter(readers_count__gt=0)
+
+            page = paginate_by_cursor(books, SORT_ORDERINGS[criterion], cursor, settings.BOOKS_PER_PAGE)
+            page.object_list = SORTED_BOOKS_GENERATORS[criterion](page.object_list)
+        elif criterion == 'estimation':
+            page = paginate_list_by_cursor(get_sorted_book_ids(user, category, criterion), cursor,
+                                           settings.BOOKS_PER_PAGE)
+            page.object_list = Book.generate_rated_books(get_books(page.object_list))
+        else:
+            return HttpResponse(status=400)
+    except InvalidCursor:
+        return HttpResponse(status=400)
+
+    context = {
+        'category': category.id,
+        'criterion': criterion,
+        'books': page.object_list,
+        'has_next': page.has_next(),
+        'next_cursor': page.next_cursor
+    }
+
+    return HttpResponse(json.dumps(context), content_type='application/json')
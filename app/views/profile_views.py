@@ -8,17 +8,17 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.paginator import Paginator
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect, render, get_object_or_404
 
 from ..constants import Queues
 from ..forms import UploadAvatarForm, ChangePasswordForm, BookPagingForm
 from ..models import AddedBook, Book, TheUser
-from ..tasks import changed_password
-from ..utils import resize_image
+from ..pagination import InvalidCursor, paginate_by_cursor
+from ..tasks import changed_password, generate_avatar_variants
 from ..views import process_method, process_ajax, process_form
 
-AVATAR_WIDTH = 250
+UPLOADED_BOOKS_ORDERING = ('-id',)
 
 logger = logging.getLogger('changes')
 
@@ -34,10 +34,9 @@ def profile(request, profile_id):
         profile_user = get_object_or_404(TheUser, id_user=user)
 
         added_books = AddedBook.objects.filter(id_user=profile_user).order_by('-id')
-        uploaded_books = Book.objects.filter(who_added=profile_user).order_by('-id')
+        uploaded_books = Book.objects.filter(who_added=profile_user).select_related('id_author')
 
-        paginator = Paginator(uploaded_books, settings.BOOKS_PER_PAGE)
-        page = paginator.page(1)
+        page = paginate_by_cursor(uploaded_books, UPLOADED_BOOKS_ORDERING, '', settings.BOOKS_PER_PAGE)
 
         context = {
             'profile_user': profile_user,
@@ -45,6 +44,7 @@ def profile(request, profile_id):
             'uploaded_books': page.object_list,
             'uploaded_books_count': uploaded_books.count(),
             'has_next': page.has_next(),
+            'next_cursor': page.next_cursor,
             'img_random': random.randint(0, 1000)
         }
 
@@ -64,9 +64,24 @@ def load_uploaded_books(request, profile_id, form):
     Loads uploaded books on profile page with pagination.
     """
     profile_user = get_object_or_404(TheUser, id=profile_id)
-    uploaded_books = Book.objects.filter(who_added=profile_user).order_by('-id')
+    uploaded_books = Book.objects.filter(who_added=profile_user).select_related('id_author')
+
+    if form.cleaned_data['page'] is None:
+        try:
+            page = paginate_by_cursor(uploaded_books, UPLOADED_BOOKS_ORDERING, form.cleaned_data['cursor'],
+                                      settings.BOOKS_PER_PAGE)
+        except InvalidCursor:
+            return HttpResponse(status=400)
+
+        response = {
+            'profile_id': profile_id,
+            'books': Book.generate_books(page.object_list),
+            'has_next': page.has_next(),
+            'next_cursor': page.next_cursor
+        }
+        return HttpResponse(json.dumps(response), content_type='application/json')
 
-    paginator = Paginator(uploaded_books, settings.BOOKS_PER_PAGE)
+    paginator = Paginator(uploaded_books.order_by('-id'), settings.BOOKS_PER_PAGE)
     page = paginator.page(form.cleaned_data['page'])
 
     books = Book.generate_books(page.object_list)
@@ -89,17 +104,21 @@ def upload_avatar(request):
     upload_avatar_form = UploadAvatarForm(request.POST, request.FILES)
 
     with transaction.atomic():
-        user = get_object_or_404(User, id=request.user.id)
-        profile_user = get_object_or_404(TheUser, id_user=user)
+        profile_user = request.the_user
+
+        if profile_user is None:
+            raise Http404
 
         if upload_avatar_form.is_valid():
+            profile_user.user_photo_variants = False
             profile_user.user_photo.save('user_{}.png'.format(profile_user.id),
                                          upload_avatar_form.cleaned_data['avatar'])
             profile_user.save()
             logger.info("User '{}' changed his avatar.".format(profile_user))
 
-            resize_image(profile_user.user_photo.path, AVATAR_WIDTH)
-            logger.info("Image '{}' successfully resized!".format(profile_user.user_photo.path))
+            transaction.on_commit(
+                lambda: generate_avatar_variants.apply_async(args=(profile_user.id,), queue=Queues.images)
+            )
 
             response_data = {'message': 'Аватар успешно изменен!'}
             return HttpResponse(json.dumps(response_data), content_type='application/json')
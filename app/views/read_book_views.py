@@ -3,14 +3,17 @@
 import json
 import logging
 
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import transaction
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, Http404
 from django.shortcuts import redirect, render, get_object_or_404
+from django.utils.cache import patch_cache_control
 
 from .selected_book_views import selected_book
+from ..file_streaming import get_file_response
 from ..forms import SetCurrentPageForm
 from ..models import Book, AddedBook, TheUser
+from ..reading_progress import get_progress, record_progress
+from ..utils import is_book_file_signature_valid
 from ..views import process_ajax, process_form
 
 logger = logging.getLogger('changes')
@@ -24,19 +27,20 @@ def open_book(request, book_id):
     book = get_object_or_404(Book, id=book_id)
 
     if request.user.is_authenticated():
-        user = TheUser.objects.get(id_user=request.user)
+        user = request.the_user
+        last_page = AddedBook.objects.filter(id_book=book, id_user=user).values_list('last_page', flat=True).first()
 
-        try:
-            added_book = AddedBook.objects.get(id_book=book, id_user=user)
-            added_book.last_read = added_book.last_read.now()
-            added_book.save()
+        if last_page is None:
+            return redirect(selected_book, book_id=book_id)
 
-            logger.info("User '{}' opened book with id: '{}'.".format(user, book.id))
-            context = {'book': book, 'book_page': added_book.last_page}
-            return render(request, 'read_book.html', context)
+        # The opening is buffered like the page changes, it updates the last read date of the added book.
+        progress = get_progress(user.id, book.id)
+        book_page = progress['last_page'] if progress else last_page
+        record_progress(user.id, book.id, book_page)
 
-        except ObjectDoesNotExist:
-            return redirect(selected_book, book_id=book_id)
+        logger.info("User '{}' opened book with id: '{}'.".format(user, book.id))
+        context = {'book': book, 'book_page': book_page}
+        return render(request, 'read_book.html', context)
     else:
         if book.blocked_book:
             return redirect(selected_book, book_id=book_id)
@@ -52,22 +56,79 @@ def open_book(request, book_id):
         return render(request, 'read_book.html', context)
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+def is_book_available(book, the_user):
+    """
+    Checks if the user can read the file of the book. The public books are available to everyone unless they are
+    blocked, the other books are available only to the users who added or uploaded them.
+
+    :param app.models.Book         book:     The book.
+    :param app.models.TheUser|None the_user: The user, None if the user is anonymous.
+
+    :return bool: Whether the file is available.
+    """
+    if not book.private_book and not book.blocked_book:
+        return True
+
+    if the_user is None:
+        return False
+
+    return book.who_added_id == the_user.id or AddedBook.objects.filter(id_user=the_user, id_book=book).exists()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def book_file(request, book_id):
+    """
+    Returns the PDF file of the book if the user can read it. Without the session the user is taken from the signed
+    URL. In production the file is sent by nginx from the internal location by 'X-Accel-Redirect' header, otherwise
+    it's streamed with the support of 'Range' requests, so pdf.js loads only the viewed pages.
+    """
+    book = get_object_or_404(Book, id=book_id)
+    the_user = request.the_user
+
+    if the_user is None and is_book_file_signature_valid(book.id, request.GET.get('user', ''),
+                                                         request.GET.get('signature', '')):
+        the_user = TheUser.objects.filter(id=request.GET['user']).first()
+
+    if not is_book_available(book, the_user):
+        raise Http404
+
+    if settings.BOOK_FILE_ACCEL_REDIRECT:
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = book.book_file.url
+    else:
+        try:
+            response = get_file_response(request, book.book_file.path, 'application/pdf')
+        except FileNotFoundError:
+            raise Http404
+
+    patch_cache_control(response, private=True)
+
+    return response
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 @process_ajax(404)
 @process_form('POST', SetCurrentPageForm, 404)
 def set_current_page(request, form):
     """
-    Changes current readed page for book of user.
+    Changes current readed page for book of user. The page is buffered and written to the database by the periodic
+    task.
     """
-    with transaction.atomic():
-        book = Book.objects.get(id=form.cleaned_data['book'])
-        user = TheUser.objects.get(id_user=request.user)
+    user = request.the_user
+
+    try:
+        book_id = int(form.cleaned_data['book'])
+    except ValueError:
+        raise Http404
+
+    # The buffered progress exists only for the added books, the database is checked only for the first change.
+    if not get_progress(user.id, book_id) and not AddedBook.objects.filter(id_book=book_id, id_user=user).exists():
+        raise Http404
 
-        added_book = AddedBook.objects.get(id_book=book, id_user=user)
-        added_book.last_page = form.cleaned_data['page']
-        added_book.save()
+    record_progress(user.id, book_id, form.cleaned_data['page'])
 
-        logger.info("User '{}' on book with id: '{}' changed page to: '{}'."
-                    .format(user, book.id, form.cleaned_data['page']))
+    logger.info("User '{}' on book with id: '{}' changed page to: '{}'."
+                .format(user, book_id, form.cleaned_data['page']))
 
-        return HttpResponse(json.dumps(True), content_type='application/json')
+    return HttpResponse(json.dumps(True), content_type='application/json')